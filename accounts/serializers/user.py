@@ -1,10 +1,11 @@
 from rest_framework.serializers import ModelSerializer
 from django.contrib.auth import get_user_model
+from core.utils.sparse_fields import SparseFieldsetSerializerMixin
 
 User = get_user_model()
 
 
-class UserSerializer(ModelSerializer):
+class UserSerializer(SparseFieldsetSerializerMixin, ModelSerializer):
     """
     Serializer for User model - Display user data.
     """
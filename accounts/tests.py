@@ -1,3 +1,33 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
+from accounts.models import User
 
-# Create your tests here.
+
+class ProfileSparseFieldsetTests(TestCase):
+    """?fields= / ?omit= prune the profile; writes ignore them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='client', email='client@example.com', password='x')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_fields_and_omit(self):
+        response = self.client.get('/api/auth/profile/?fields=id,email')
+        self.assertEqual(set(response.data), {'id', 'email'})
+
+        response = self.client.get('/api/auth/profile/?omit=date_of_birth,phone')
+        self.assertNotIn('phone', response.data)
+        self.assertIn('email', response.data)
+
+    def test_unknown_field_is_rejected(self):
+        self.assertEqual(self.client.get('/api/auth/profile/?fields=password').status_code, 400)
+
+    def test_writes_render_every_field(self):
+        response = self.client.patch('/api/auth/profile/?fields=id', {'first_name': 'Alix'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['first_name'], 'Alix')
+        self.assertIn('email', response.data)
@@ -4,6 +4,7 @@ from .views import (
     BusinessKPIsView,
     ProductKPIsView,
     UserKPIsView,
+    CacheStatsView,
 )
 
 urlpatterns = [
@@ -11,5 +12,6 @@ urlpatterns = [
     path('business/', BusinessKPIsView.as_view(), name='analytics-business'),
     path('products/', ProductKPIsView.as_view(), name='analytics-products'),
     path('users/', UserKPIsView.as_view(), name='analytics-users'),
+    path('cache/', CacheStatsView.as_view(), name='analytics-cache'),
 ]
 
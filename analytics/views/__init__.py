@@ -4,11 +4,13 @@ from .kpis import (
     ProductKPIsView,
     UserKPIsView,
 )
+from .cache import CacheStatsView
 
 __all__ = [
     'DashboardKPIsView',
     'BusinessKPIsView',
     'ProductKPIsView',
     'UserKPIsView',
+    'CacheStatsView',
 ]
 
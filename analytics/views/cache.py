@@ -0,0 +1,23 @@
+"""
+Cache monitoring API view.
+"""
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from core.cache import get_cache_stats
+from core.utils.response_cache import get_response_cache_stats
+
+
+class CacheStatsView(APIView):
+    """
+    GET: Cache backend statistics (hit ratio, entries, memory usage, evictions)
+    and hit/miss counters of the cached catalog routes.
+    Admin only, never cached.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response({
+            'backend': get_cache_stats(),
+            'routes': get_response_cache_stats(),
+        })
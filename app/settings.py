@@ -1,4 +1,5 @@
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from decouple import config
 from datetime import timedelta
 import os
@@ -19,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
@@ -134,19 +136,61 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+MEDIA_URL = '/media/'
+MEDIA_ROOT = config('MEDIA_ROOT', default=os.path.join(BASE_DIR, 'media'))
 
-CORS_ALLOW_ALL_ORIGINS = True  # TODO: Restrict to specific origins in production
+# Resized image variants (/media/resize/<w>x<h>/<path>)
+IMAGE_VARIANT_SIZES = [(160, 160), (320, 320), (640, 640), (1280, 1280)]
+IMAGE_VARIANT_CACHE_DIR = config('IMAGE_VARIANT_CACHE_DIR', default='/var/tmp/shop-api-variants')
+IMAGE_VARIANT_CACHE_MAX_SIZE = config('IMAGE_VARIANT_CACHE_MAX_SIZE', default=512 * 1024 * 1024, cast=int)
+IMAGE_VARIANT_WORKERS = config('IMAGE_VARIANT_WORKERS', default=2, cast=int)
 
-# Cache configuration (for analytics KPIs)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'shop-analytics-cache',
-        'OPTIONS': {
-            'MAX_ENTRIES': 1000
+# Idempotency-Key header (order creation and actions): seconds during which
+# a stored response is replayed to retries
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=24 * 60 * 60, cast=int)
+
+# Stock reservations (cart at checkout): seconds before a hold expires and
+# is released by `release_expired_reservations`
+STOCK_RESERVATION_TTL = config('STOCK_RESERVATION_TTL', default=15 * 60, cast=int)
+
+
+CORS_ALLOW_ALL_ORIGINS = True  # TODO: Restrict to specific origins in production
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
+# Cache configuration (analytics KPIs, catalog responses)
+# CACHE_BACKEND=sqlite: one file shared by every worker of the host (default)
+# CACHE_BACKEND=redis: shared by every host (CACHE_LOCATION=redis://host:6379/0)
+# CACHE_BACKEND=locmem: per-process memory (tests, single process)
+CACHE_BACKEND = config('CACHE_BACKEND', default='sqlite')
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('CACHE_LOCATION', default='redis://localhost:6379/0'),
+        }
+    }
+elif CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'shop-analytics-cache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000
+            }
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': config('CACHE_LOCATION', default='/var/tmp/shop-api-cache.sqlite3'),
+            'OPTIONS': {
+                'MAX_SIZE': config('CACHE_MAX_SIZE', default=64 * 1024 * 1024, cast=int),
+                'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int),
+            }
         }
     }
-}
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.urls import path, include
+from products.views import ImageVariantView
 
 urlpatterns = [
     # Admin
@@ -16,4 +17,7 @@ urlpatterns = [
     
     # Analytics
     path('api/analytics/', include('analytics.urls')),
+    
+    # Resized media images
+    path('media/resize/<int:width>x<int:height>/<path:path>', ImageVariantView.as_view(), name='image-variant'),
 ]
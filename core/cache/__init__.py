@@ -0,0 +1,7 @@
+from .sqlite import SQLiteCache
+from .stats import get_cache_stats
+
+__all__ = [
+    'SQLiteCache',
+    'get_cache_stats',
+]
@@ -0,0 +1,308 @@
+"""
+SQLite-backed cache shared by every process on the host.
+
+`LocMemCache` lives in each worker's memory: with N gunicorn workers the same
+payload is computed and stored N times. This backend keeps entries in one
+SQLite file (WAL mode, so readers never block the writer), compresses large
+values with zlib and evicts the least recently used entries once `MAX_SIZE`
+bytes or `MAX_ENTRIES` entries are exceeded.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': '/var/tmp/shop-api-cache.sqlite3',
+            'OPTIONS': {'MAX_SIZE': 64 * 1024 * 1024, 'MAX_ENTRIES': 10000},
+        }
+    }
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS cache_entry (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        compressed INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        expires REAL,
+        accessed REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS cache_entry_accessed_idx ON cache_entry (accessed)",
+    "CREATE INDEX IF NOT EXISTS cache_entry_expires_idx ON cache_entry (expires)",
+    """
+    CREATE TABLE IF NOT EXISTS cache_stat (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    """,
+)
+
+# Live entries only: NULL expiry means "never expires"
+LIVE = "(expires IS NULL OR expires > ?)"
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cross-process cache stored in a SQLite file.
+
+    Options (besides Django's TIMEOUT / KEY_PREFIX / VERSION):
+        MAX_SIZE: total stored bytes before LRU eviction (default 64 MiB)
+        MAX_ENTRIES: entry count before LRU eviction (default 10000)
+        COMPRESS_MIN_LENGTH: values at least this long are zlib-compressed
+        COMPRESS_LEVEL: zlib level (default 6)
+        CULL_EVERY: check the limits every N writes of a process (default 50)
+    """
+
+    # Reads only refresh the LRU clock if it is older than this (seconds),
+    # so hot keys do not turn every hit into a write
+    TOUCH_INTERVAL = 1.0
+    # Hit/miss counters are buffered in-process and flushed at this interval
+    # (and whenever get_stats() is called)
+    STATS_FLUSH_INTERVAL = 5.0
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location or os.path.join('/tmp', 'django-sqlite-cache.sqlite3')
+        options = params.get('OPTIONS', {})
+        self._max_size = int(options.get('MAX_SIZE', 64 * 1024 * 1024))
+        self._max_entries = int(params.get('max_entries', options.get('MAX_ENTRIES', 10000)))
+        self._compress_min_length = int(options.get('COMPRESS_MIN_LENGTH', 1024))
+        self._compress_level = int(options.get('COMPRESS_LEVEL', 6))
+        self._cull_every = int(options.get('CULL_EVERY', 50))
+        self._local = threading.local()
+
+    # Connection
+
+    @property
+    def _db(self):
+        """Per-thread connection, reopened after a fork."""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            local.conn = conn
+            local.pid = os.getpid()
+            local.writes = 0
+            local.stats = {'hits': 0, 'misses': 0}
+            local.flushed_at = time.monotonic()
+        return local.conn
+
+    # Serialization
+
+    def _encode(self, value):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) >= self._compress_min_length:
+            packed = zlib.compress(data, self._compress_level)
+            if len(packed) < len(data):
+                return packed, 1
+        return data, 0
+
+    def _decode(self, data, compressed):
+        if compressed:
+            data = zlib.decompress(data)
+        return pickle.loads(data)
+
+    def _expiry(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    # Stats
+
+    def _record(self, outcome):
+        stats = self._local.stats
+        stats[outcome] += 1
+        if time.monotonic() - self._local.flushed_at >= self.STATS_FLUSH_INTERVAL:
+            self._flush_stats()
+
+    def _bump_stats(self, db, counts):
+        db.executemany(
+            "INSERT INTO cache_stat (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            [(name, count) for name, count in counts.items() if count],
+        )
+
+    def _flush_stats(self):
+        db = self._db
+        stats = self._local.stats
+        self._bump_stats(db, stats)
+        self._local.stats = {'hits': 0, 'misses': 0}
+        self._local.flushed_at = time.monotonic()
+
+    def get_stats(self):
+        """Hit ratio, evictions and memory usage, aggregated over all processes."""
+        self._flush_stats()
+        db = self._db
+        now = time.time()
+        counters = dict(db.execute("SELECT name, value FROM cache_stat"))
+        entries, size = db.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entry WHERE {LIVE}", (now,)
+        ).fetchone()
+        page_count = db.execute("PRAGMA page_count").fetchone()[0]
+        page_size = db.execute("PRAGMA page_size").fetchone()[0]
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        total = hits + misses
+        return {
+            'backend': 'sqlite',
+            'location': self._path,
+            'entries': entries,
+            'bytes': size,
+            'file_bytes': page_count * page_size,
+            'max_bytes': self._max_size,
+            'max_entries': self._max_entries,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+            'evictions': counters.get('evictions', 0),
+        }
+
+    # Eviction
+
+    def _after_write(self, db):
+        self._local.writes += 1
+        if self._local.writes % self._cull_every == 0:
+            self._cull(db)
+
+    def _cull(self, db):
+        """Drop expired entries, then the least recently used over the limits."""
+        now = time.time()
+        db.execute("DELETE FROM cache_entry WHERE expires <= ?", (now,))
+        entries, size = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entry"
+        ).fetchone()
+        if entries <= self._max_entries and size <= self._max_size:
+            return
+
+        # Walk from the oldest access until both limits are met again
+        excess_entries = entries - self._max_entries
+        excess_size = size - self._max_size
+        evict = []
+        for key, entry_size in db.execute(
+            "SELECT key, size FROM cache_entry ORDER BY accessed"
+        ):
+            if excess_entries <= 0 and excess_size <= 0:
+                break
+            evict.append((key,))
+            excess_entries -= 1
+            excess_size -= entry_size
+        db.executemany("DELETE FROM cache_entry WHERE key = ?", evict)
+        self._bump_stats(db, {'evictions': len(evict)})
+
+    # Cache API
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        data, compressed = self._encode(value)
+        now = time.time()
+        db = self._db
+        # Insert, or take over an expired entry; a live entry is left untouched
+        cursor = db.execute(
+            "INSERT INTO cache_entry (key, value, compressed, size, expires, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+            "compressed = excluded.compressed, size = excluded.size, "
+            "expires = excluded.expires, accessed = excluded.accessed "
+            "WHERE cache_entry.expires IS NOT NULL AND cache_entry.expires <= ?",
+            (key, data, compressed, len(data), self._expiry(timeout), now, now),
+        )
+        self._after_write(db)
+        return cursor.rowcount > 0
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        db = self._db
+        row = db.execute(
+            f"SELECT value, compressed, accessed FROM cache_entry WHERE key = ? AND {LIVE}",
+            (key, now),
+        ).fetchone()
+        if row is None:
+            self._record('misses')
+            return default
+
+        data, compressed, accessed = row
+        if now - accessed >= self.TOUCH_INTERVAL:
+            db.execute("UPDATE cache_entry SET accessed = ? WHERE key = ?", (now, key))
+        self._record('hits')
+        return self._decode(data, compressed)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        data, compressed = self._encode(value)
+        db = self._db
+        db.execute(
+            "INSERT OR REPLACE INTO cache_entry "
+            "(key, value, compressed, size, expires, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, data, compressed, len(data), self._expiry(timeout), time.time()),
+        )
+        self._after_write(db)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        cursor = self._db.execute(
+            f"UPDATE cache_entry SET expires = ?, accessed = ? WHERE key = ? AND {LIVE}",
+            (self._expiry(timeout), now, key, now),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._db.execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._db.execute(
+            f"SELECT 1 FROM cache_entry WHERE key = ? AND {LIVE}", (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        db = self._db
+        # BEGIN IMMEDIATE takes the write lock up front: concurrent incr()
+        # calls from other processes are serialized, no update is lost
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                f"SELECT value, compressed FROM cache_entry WHERE key = ? AND {LIVE}",
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            new_value = self._decode(*row) + delta
+            data, compressed = self._encode(new_value)
+            db.execute(
+                "UPDATE cache_entry SET value = ?, compressed = ?, size = ? WHERE key = ?",
+                (data, compressed, len(data), key),
+            )
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        return new_value
+
+    def clear(self):
+        db = self._db
+        db.execute("DELETE FROM cache_entry")
+        db.execute("DELETE FROM cache_stat")
+        self._local.stats = {'hits': 0, 'misses': 0}
+
+    def close(self, **kwargs):
+        # Connections live as long as their thread; Django calls close() at
+        # the end of every request, reopening there would cost a connect
+        pass
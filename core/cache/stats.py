@@ -0,0 +1,47 @@
+"""
+Hit ratio and memory usage of the configured cache backend.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+
+def get_cache_stats(alias='default'):
+    """Backend statistics; `None` values are not measurable on that backend."""
+    backend = caches[alias]
+
+    if hasattr(backend, 'get_stats'):
+        return backend.get_stats()
+
+    if isinstance(backend, RedisCache):
+        info = backend._cache.get_client(write=False).info()
+        hits = info.get('keyspace_hits', 0)
+        misses = info.get('keyspace_misses', 0)
+        total = hits + misses
+        return {
+            'backend': 'redis',
+            'entries': sum(
+                db.get('keys', 0) for name, db in info.items()
+                if name.startswith('db') and isinstance(db, dict)
+            ),
+            'bytes': info.get('used_memory'),
+            'max_bytes': info.get('maxmemory') or None,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+            'evictions': info.get('evicted_keys', 0),
+        }
+
+    if isinstance(backend, LocMemCache):
+        return {
+            'backend': 'locmem',
+            'entries': len(backend._cache),
+            'bytes': sum(len(value) for value in backend._cache.values()),
+            'max_entries': backend._max_entries,
+            'hits': None,
+            'misses': None,
+            'hit_ratio': None,
+            'evictions': None,
+        }
+
+    return {'backend': type(backend).__name__}
@@ -0,0 +1,17 @@
+"""
+Management command to delete expired idempotency keys (run daily, e.g. cron).
+Usage: python manage.py purge_idempotency_keys
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete idempotency keys past their expiry date'
+
+    def handle(self, *args, **options):
+        # Served by the expires_at index
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} expired idempotency keys deleted'))
@@ -1,4 +1,4 @@
 from .base_model import AuditedModel
+from .idempotency import IdempotencyKey
 
-__all__ = ['AuditedModel']
-
+__all__ = ['AuditedModel', 'IdempotencyKey']
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from .base_model import AuditedModel
+
+
+class IdempotencyKey(AuditedModel):
+    """
+    Response stored for an `Idempotency-Key` header, replayed on retries.
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys',
+        help_text="User who sent the request"
+    )
+    
+    key = models.CharField(
+        max_length=255,
+        help_text="Idempotency-Key header value"
+    )
+    
+    fingerprint = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of method, path and body of the first request"
+    )
+    
+    status_code = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text="Stored response status (empty while in flight)"
+    )
+    
+    response_body = models.JSONField(
+        null=True,
+        blank=True,
+        encoder=DjangoJSONEncoder,
+        help_text="Stored response data"
+    )
+    
+    expires_at = models.DateTimeField(
+        help_text="After this date the key can be reused"
+    )
+    
+    class Meta:
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+        indexes = [
+            # purge_idempotency_keys
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.key} ({self.status_code or 'in flight'})"
@@ -1,3 +1,97 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import time
+from django.test import SimpleTestCase
+from core.cache import SQLiteCache, get_cache_stats
 
-# Create your tests here.
+
+class SQLiteCacheTests(SimpleTestCase):
+    """The SQLite backend behaves like a Django cache shared across instances."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'cache.sqlite3')
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_basic_operations(self):
+        cache = self.make_cache()
+
+        cache.set('a', {'x': 1})
+        self.assertEqual(cache.get('a'), {'x': 1})
+        self.assertFalse(cache.add('a', 'other'))
+        self.assertTrue(cache.add('b', 1))
+        self.assertEqual(cache.incr('b', 5), 6)
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': {'x': 1}, 'b': 6})
+        self.assertTrue(cache.delete('a'))
+        self.assertIsNone(cache.get('a'))
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+    def test_expiry(self):
+        cache = self.make_cache()
+
+        cache.set('short', 1, timeout=0.05)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('short'))
+        # An expired entry can be taken over by add()
+        self.assertTrue(cache.add('short', 2))
+        self.assertEqual(cache.get('short'), 2)
+
+    def test_large_values_are_compressed(self):
+        cache = self.make_cache(COMPRESS_MIN_LENGTH=100)
+        value = 'x' * 10000
+
+        cache.set('big', value)
+
+        self.assertEqual(cache.get('big'), value)
+        self.assertLess(cache.get_stats()['bytes'], 1000)
+
+    def test_shared_between_instances(self):
+        self.make_cache().set('shared', 'value')
+        self.assertEqual(self.make_cache().get('shared'), 'value')
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_EVERY=1)
+        cache.TOUCH_INTERVAL = 0
+
+        for key in 'abc':
+            cache.set(key, key)
+        cache.get('a')
+        cache.set('d', 'd')
+
+        self.assertEqual(cache.get_many(['a', 'b', 'c', 'd']), {'a': 'a', 'c': 'c', 'd': 'd'})
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_concurrent_incr(self):
+        cache = self.make_cache()
+        cache.set('counter', 0)
+
+        def increment():
+            for _ in range(50):
+                cache.incr('counter')
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(cache.get('counter'), 200)
+
+    def test_stats(self):
+        cache = self.make_cache()
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('missing')
+
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_ratio']), (1, 1, 0.5))
+        self.assertEqual(stats['entries'], 1)
+
+    def test_get_cache_stats(self):
+        self.assertIn(get_cache_stats()['backend'], {'sqlite', 'locmem', 'redis'})
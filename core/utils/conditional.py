@@ -0,0 +1,56 @@
+"""
+Conditional GET (ETag / Last-Modified) for DRF views.
+"""
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """Weak ETag built from the given validator parts."""
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'W/"{digest}"'
+
+
+class ConditionalGetMixin:
+    """
+    Answer `304 Not Modified` before the serializer runs.
+    
+    Views implement `get_validators()`, returning the parts the ETag is
+    built from and the last modification datetime, computed with a cheap
+    query. Returning None (e.g. object not found) skips the check.
+    """
+    
+    def get_validators(self):
+        raise NotImplementedError('Views using ConditionalGetMixin must implement get_validators()')
+    
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+        
+        parts, last_modified = validators
+        
+        # Same object, different representation: query string, host, format
+        etag = make_etag(
+            *parts,
+            request.get_full_path(),
+            request.get_host(),
+            request.accepted_renderer.format,
+        )
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        
+        not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        response = not_modified or super().get(request, *args, **kwargs)
+        
+        if 200 <= response.status_code < 300 or response.status_code == 304:
+            response['ETag'] = etag
+            if timestamp:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+def latest(*datetimes):
+    """Most recent of the given datetimes, ignoring None."""
+    values = [value for value in datetimes if value is not None]
+    return max(values) if values else None
@@ -0,0 +1,99 @@
+"""
+`Idempotency-Key` header support for unsafe requests.
+
+The first response for a (user, key) pair is stored and replayed to
+retries, without running the view again. The key row is inserted in the
+same transaction as the view's work: a concurrent duplicate blocks on the
+row until the first request commits (then replays its response) or rolls
+back (then runs as the first request).
+"""
+import hashlib
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.response import Response
+from core.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    """SHA-256 of what must not change between retries: method, path, body."""
+    digest = hashlib.sha256()
+    for part in (request.method.encode('ascii'), request.get_full_path().encode('utf-8'), request.body):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.status_code)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def idempotent(handler):
+    """
+    Honor `Idempotency-Key` on an APIView handler (authenticated views).
+
+    Responses below 500 are stored; server errors roll the key back so the
+    client can retry. Reusing a key for a different request is a 422.
+    """
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f"{IDEMPOTENCY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters."},
+                status=400
+            )
+
+        fingerprint = request_fingerprint(request)
+        now = timezone.now()
+
+        with transaction.atomic():
+            # Blocks while another transaction holds the same (user, key)
+            IdempotencyKey.objects.bulk_create([
+                IdempotencyKey(
+                    user=request.user,
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                )
+            ], ignore_conflicts=True)
+            record = IdempotencyKey.objects.select_for_update().get(user=request.user, key=key)
+
+            if record.status_code is not None and record.expires_at > now:
+                if record.fingerprint != fingerprint:
+                    return Response(
+                        {'error': f"{IDEMPOTENCY_HEADER} already used for a different request."},
+                        status=422
+                    )
+                return _replay(record)
+
+            # Exceptions become responses here, so that client errors are stored too
+            try:
+                response = handler(view, request, *args, **kwargs)
+            except Exception as exc:
+                response = view.handle_exception(exc)
+
+            if response.status_code >= 500 or not isinstance(response, Response):
+                transaction.set_rollback(True)
+                return response
+
+            record.fingerprint = fingerprint
+            record.status_code = response.status_code
+            record.response_body = response.data
+            record.expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+            record.save(update_fields=['fingerprint', 'status_code', 'response_body', 'expires_at', 'updated_at'])
+            return response
+
+    return wrapper
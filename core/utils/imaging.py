@@ -0,0 +1,48 @@
+"""
+Image resizing, run in worker processes.
+
+Kept free of Django imports: the pool uses the `spawn` start method, and
+the workers only need Pillow.
+"""
+import io
+from PIL import Image, ImageOps
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+
+
+def resize_image(data, width, height, image_format, quality=80):
+    """
+    Fit an encoded image within `width` x `height` (no upscaling).
+
+    Returns the encoded variant as bytes.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEG only: decode at a reduced scale (still >= the target size,
+        # whichever the EXIF orientation)
+        side = max(width, height)
+        image.draft('RGB', (side, side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((width, height), Image.Resampling.LANCZOS)
+
+        if image_format == 'jpeg':
+            if image.mode in ('RGBA', 'LA', 'P'):
+                # No alpha in JPEG: flatten on white
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+
+        output = io.BytesIO()
+        pil_format = FORMATS[image_format][0]
+        if pil_format == 'JPEG':
+            image.save(output, pil_format, quality=quality, optimize=True, progressive=True)
+        else:
+            image.save(output, pil_format, quality=quality, method=4)
+        return output.getvalue()
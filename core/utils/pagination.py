@@ -0,0 +1,167 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are fetched with `WHERE (field, id) > (last_field, last_id)` instead of
+`OFFSET`, and no `COUNT(*)` is issued, so page N costs the same as page 1.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(payload):
+    """Encode a JSON-serializable payload as an opaque, URL-safe token."""
+    data = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a token produced by `encode_cursor`. Returns None if invalid."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (TypeError, ValueError, binascii.Error):
+        return None
+
+
+def cursor_value(value):
+    """Convert a column value to a JSON-safe value without losing precision."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+def keyset_filter(queryset, field, value, pk, descending, tiebreaker='pk'):
+    """
+    Restrict `queryset` to rows strictly after `(value, pk)`.
+
+    Written as `field <= value AND (field < value OR pk < pk)` rather than a
+    plain OR so the planner can use `field` as an index range condition.
+    `tiebreaker` is the unique column compared with `pk`.
+    """
+    if descending:
+        return queryset.filter(**{f'{field}__lte': value}).filter(
+            Q(**{f'{field}__lt': value}) | Q(**{f'{tiebreaker}__lt': pk})
+        )
+    return queryset.filter(**{f'{field}__gte': value}).filter(
+        Q(**{f'{field}__gt': value}) | Q(**{f'{tiebreaker}__gt': pk})
+    )
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on `(ordering field, pk)`.
+
+    The ordering is read from `?ordering=` and restricted to `ordering_fields`;
+    the primary key is always used as tiebreaker, so the ordering fields do not
+    need to be unique. Cursors are opaque and bound to the ordering they were
+    issued for.
+    """
+
+    ordering_param = 'ordering'
+    ordering_fields = ()
+    default_ordering = '-created_at'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+
+        field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor['r'])
+        if reverse:
+            descending = not descending
+
+        if descending:
+            queryset = queryset.order_by(f'-{field}', '-pk')
+        else:
+            queryset = queryset.order_by(field, 'pk')
+
+        if self.cursor:
+            value, pk = self.cursor['p']
+            queryset = keyset_filter(queryset, field, value, pk, descending)
+
+        results = list(queryset[:self.page_size + 1])
+        has_following = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        if reverse:
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        """Return the requested ordering if allowed, else the default one."""
+        ordering = request.query_params.get(self.ordering_param) or self.default_ordering
+        if ordering.lstrip('-') not in self.ordering_fields:
+            return self.default_ordering
+        return ordering
+
+    def decode_cursor(self, request):
+        """Return the decoded cursor, None for the first page."""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+
+        payload = decode_cursor(token)
+        try:
+            if payload['o'] != self.ordering:
+                raise ValueError
+            value, pk = payload['p']
+            field = self.model._meta.get_field(self.ordering.lstrip('-'))
+            return {
+                'p': (field.to_python(value), self.model._meta.pk.to_python(pk)),
+                'r': bool(payload['r']),
+            }
+        except (TypeError, KeyError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, item, reverse):
+        field = self.ordering.lstrip('-')
+        if isinstance(item, dict):
+            position = [item[field], item['id']]
+        else:
+            position = [getattr(item, field), item.pk]
+        token = encode_cursor({
+            'o': self.ordering,
+            'p': [cursor_value(value) for value in position],
+            'r': int(reverse),
+        })
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
@@ -0,0 +1,150 @@
+"""
+Full-response cache for anonymous GET requests.
+
+Entries are keyed on the route, the representation (host, format) and the
+normalized query string, plus version counters (see `versioning`): bumping
+a version invalidates every entry of the route in O(1).
+"""
+import hashlib
+import threading
+import time
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+from .versioning import get_version
+
+# Validators stored alongside the data, replayed on cache hits
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+
+# Hit/miss counters are buffered in-process and flushed to the cache at
+# this interval (and whenever the stats are read): a cache write per
+# request would serialize workers on a write lock just for a statistic
+STATS_FLUSH_INTERVAL = 5.0
+
+_routes = set()
+_pending = {}
+_pending_lock = threading.Lock()
+_flushed_at = time.monotonic()
+
+
+def _stats_key(route, outcome):
+    return f"response:stats:{route}:{outcome}"
+
+
+def _flush_stats():
+    global _flushed_at
+    with _pending_lock:
+        counts = dict(_pending)
+        _pending.clear()
+        _flushed_at = time.monotonic()
+    for key, count in counts.items():
+        if not cache.add(key, count, timeout=None):
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                cache.set(key, count, timeout=None)
+
+
+def _count(route, outcome):
+    key = _stats_key(route, outcome)
+    with _pending_lock:
+        _pending[key] = _pending.get(key, 0) + 1
+        due = time.monotonic() - _flushed_at >= STATS_FLUSH_INTERVAL
+    if due:
+        _flush_stats()
+
+
+def get_response_cache_stats():
+    """
+    Hit/miss counters of every cached route.
+
+    Counts buffered by other processes show up once they flush (at most
+    `STATS_FLUSH_INTERVAL` seconds later).
+    """
+    _flush_stats()
+    stats = {}
+    for route in sorted(_routes):
+        hits = cache.get(_stats_key(route, 'hits'), 0)
+        misses = cache.get(_stats_key(route, 'misses'), 0)
+        total = hits + misses
+        stats[route] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+    return stats
+
+
+class CachedResponseMixin:
+    """
+    Serve anonymous GETs from the cache.
+    
+    Views set `cache_route` (stats/key prefix), `cache_version_name` (the
+    version counter, or tuple of counters, whose bump invalidates them) and
+    `cache_timeout`. Views can override `get_cache_version()` to key entries
+    on their own data as well.
+    """
+    
+    cache_route = None
+    cache_version_name = None
+    cache_timeout = 300
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_route:
+            _routes.add(cls.cache_route)
+    
+    def get_response_cache_key(self, request):
+        """Key on route, version, representation and sorted query params."""
+        query = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        raw = '|'.join([
+            request.get_host(),
+            request.path,
+            request.accepted_renderer.format,
+            repr(query),
+        ])
+        digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+        return f"response:{self.cache_route}:{self.get_cache_version()}:{digest}"
+    
+    def get_cache_version(self):
+        """Version part of the key: the current value of every counter."""
+        names = self.cache_version_name
+        if isinstance(names, str):
+            names = (names,)
+        return '.'.join(str(get_version(name)) for name in names)
+    
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        
+        cache_key = self.get_response_cache_key(request)
+        entry = cache.get(cache_key)
+        
+        if entry is not None:
+            _count(self.cache_route, 'hits')
+            data, headers = entry
+            
+            # Conditional request against the stored validators
+            response = get_conditional_response(
+                request,
+                etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(headers.get('Last-Modified', '')),
+            ) or Response(data)
+            for header, value in headers.items():
+                response[header] = value
+            response['X-Cache'] = 'HIT'
+            return response
+        
+        _count(self.cache_route, 'misses')
+        response = super().get(request, *args, **kwargs)
+        
+        if response.status_code == 200 and isinstance(response, Response):
+            headers = {header: response[header] for header in CACHED_HEADERS if header in response}
+            cache.set(cache_key, (response.data, headers), timeout=self.cache_timeout)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,103 @@
+"""
+Sparse fieldsets: `?fields=a,b` / `?omit=c` on read endpoints.
+
+The serializer mixin prunes the rendered fields (root level only); the view
+mixin prunes the query to match, so columns and relations nobody renders
+are not loaded at all.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _parse(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def get_field_selection(request):
+    """
+    `(fields, omit)` requested by a read request.
+
+    `fields` is None when every field is requested; `omit` may be empty.
+    Both are ignored on writes, where the serializer also parses input.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+    fields = request.query_params.get(FIELDS_PARAM)
+    omit = request.query_params.get(OMIT_PARAM, '')
+    return (_parse(fields) if fields is not None else None), _parse(omit)
+
+
+def is_rendered(name, selection):
+    """Whether field `name` is rendered under `selection` (`(fields, omit)`)."""
+    fields, omit = selection
+    return (fields is None or name in fields) and name not in omit
+
+
+def check_field_selection(selection, available):
+    """Reject field names that the serializer does not have (400)."""
+    fields, omit = selection
+    unknown = ((fields or set()) | omit) - set(available)
+    if unknown:
+        raise ValidationError({'fields': f"Unknown field(s): {', '.join(sorted(unknown))}."})
+
+
+class SparseFieldsetSerializerMixin:
+    """Drop the fields excluded by `?fields=` / `?omit=` from the output."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selection = get_field_selection(self.context.get('request'))
+        fields, omit = selection
+        if fields is None and not omit:
+            return
+
+        check_field_selection(selection, self.fields)
+        for name in list(self.fields):
+            if not is_rendered(name, selection):
+                self.fields.pop(name)
+
+
+class SparseFieldsetQueryMixin:
+    """
+    Project the view's queryset on the fields being rendered.
+
+    Views map serializer fields to what they cost in the query:
+        sparse_select: {field: [lookups]} select_related only if rendered
+        sparse_prefetch: {field: [lookups]} prefetch_related only if rendered
+        sparse_defer: {field: [columns]} deferred when the field is not rendered
+    """
+
+    sparse_select = {}
+    sparse_prefetch = {}
+    sparse_defer = {}
+
+    def get_queryset(self):
+        return self.apply_sparse_fieldset(super().get_queryset())
+
+    def apply_sparse_fieldset(self, queryset):
+        selection = get_field_selection(self.request)
+
+        for field, lookups in self.sparse_select.items():
+            if is_rendered(field, selection):
+                queryset = queryset.select_related(*lookups)
+        for field, lookups in self.sparse_prefetch.items():
+            if is_rendered(field, selection):
+                queryset = queryset.prefetch_related(*lookups)
+
+        # A column shared with a rendered field stays loaded
+        needed = {
+            column
+            for field, columns in self.sparse_defer.items() if is_rendered(field, selection)
+            for column in columns
+        }
+        deferred = {
+            column
+            for field, columns in self.sparse_defer.items() if not is_rendered(field, selection)
+            for column in columns
+        } - needed
+        if deferred:
+            queryset = queryset.defer(*sorted(deferred))
+        return queryset
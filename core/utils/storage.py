@@ -0,0 +1,93 @@
+"""
+Content-addressed file storage.
+
+Files are stored under the SHA-256 of their content, computed while the
+upload is written (single pass): `<upload_to>/<h[:2]>/<h><ext>`. Saving a
+file whose content is already stored writes nothing and returns the
+existing name, so identical uploads share one file.
+
+Several rows may then point at the same file: callers must only delete it
+once it is no longer referenced. A save reusing an existing file and a
+delete of that file are serialized by `lock_stored_name`: the delete must
+see the reference the save's transaction is about to commit.
+"""
+import hashlib
+import os
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.utils.deconstruct import deconstructible
+
+# First key of the advisory locks taken on stored names
+STORED_NAME_LOCK_CLASS = 0x5354
+
+
+def file_digest(file):
+    """SHA-256 of a Django File, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_name(directory, digest, extension):
+    """Storage name of a file given its directory, hash and extension."""
+    return '/'.join(part for part in (directory, digest[:2], f"{digest}{extension.lower()}") if part)
+
+
+def lock_stored_name(name):
+    """
+    Lock a stored name until the current transaction ends.
+
+    PostgreSQL transaction-level advisory lock on a hash of the name (two
+    names sharing a hash only wait for each other). No-op outside a
+    transaction, where the lock would be released at once, and on other
+    databases.
+    """
+    if connection.vendor != 'postgresql' or not connection.in_atomic_block:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s))", [STORED_NAME_LOCK_CLASS, name])
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    
+    def get_available_name(self, name, max_length=None):
+        # The final name depends on the content only, see _save()
+        return name
+    
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1]
+        os.makedirs(self.path(directory or '.'), exist_ok=True)
+        
+        # Hash while writing to a temporary file next to the destination
+        digest = hashlib.sha256()
+        fd, temporary = tempfile.mkstemp(dir=self.path(directory or '.'), suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode('utf-8')
+                    digest.update(chunk)
+                    output.write(chunk)
+            
+            name = content_name(directory, digest.hexdigest(), extension)
+            full_path = self.path(name)
+            # Held until the row referencing the file commits, so a
+            # concurrent release cannot delete it in between
+            lock_stored_name(name)
+            if os.path.exists(full_path):
+                os.remove(temporary)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temporary, self.file_permissions_mode)
+                os.replace(temporary, full_path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        
+        return name
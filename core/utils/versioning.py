@@ -0,0 +1,41 @@
+"""
+Cache version counters.
+
+A version is a number stored in the cache. Everything built for a given
+version (cache keys, in-process snapshots) is invalidated in O(1) by bumping
+the counter.
+"""
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(name):
+    return f"version:{name}"
+
+
+def get_version(name):
+    """Current version of `name`, initialized on first use."""
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # Start from a timestamp so a cache flush never reuses an old version
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Increment the version of `name`, invalidating what was built for it."""
+    key = _version_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def bump_version_on_commit(name):
+    """Bump once the current transaction commits (immediately in autocommit)."""
+    transaction.on_commit(lambda: bump_version(name))
@@ -0,0 +1,157 @@
+"""
+Management command to measure checkout throughput on one hot product, for
+several stock shard counts (0 = not sharded, the row-locking checkout).
+Concurrent workers place real orders through the checkout serializer on a
+throwaway product, user and category, deleted afterwards. Meant for a
+staging PostgreSQL database: SQLite locks the whole database on writes.
+--hold-ms keeps each checkout transaction open a little longer, like the
+network round trips of a production checkout, which is when the row lock
+of an unsharded product becomes the bottleneck.
+Usage: python manage.py benchmark_stock_shards [--shards 0,1,4,16] [--workers 32] [--checkouts 2000] [--hold-ms 0]
+"""
+import threading
+import time
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections, transaction
+from rest_framework.exceptions import ValidationError
+
+from orders.models import Order
+from orders.serializers import OrderCreateSerializer
+from products.models import Category, Product
+from products.services import MAX_STOCK_SHARDS, set_stock_shards
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark checkouts per second against the stock shard count'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--shards',
+            default='0,1,4,16',
+            help='Comma-separated shard counts to measure, 0 = not sharded (default: 0,1,4,16)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=32,
+            help='Concurrent checkouts (threads, one connection each) (default: 32)',
+        )
+        parser.add_argument(
+            '--checkouts',
+            type=int,
+            default=2000,
+            help='Checkouts per shard count (default: 2000)',
+        )
+        parser.add_argument(
+            '--quantity',
+            type=int,
+            default=1,
+            help='Units bought per checkout (default: 1)',
+        )
+        parser.add_argument(
+            '--hold-ms',
+            type=float,
+            default=0,
+            help='Extra time each checkout transaction stays open, in ms (default: 0)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            counts = [int(count) for count in options['shards'].split(',')]
+        except ValueError:
+            raise CommandError('--shards must be comma-separated integers')
+        if any(not 0 <= count <= MAX_STOCK_SHARDS for count in counts):
+            raise CommandError(f'Shard counts must be between 0 and {MAX_STOCK_SHARDS}')
+        if options['workers'] < 1 or options['checkouts'] < 1 or options['quantity'] < 1:
+            raise CommandError('--workers, --checkouts and --quantity must be positive')
+        if options['hold_ms'] < 0:
+            raise CommandError('--hold-ms cannot be negative')
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f'{connection.vendor} database: results do not reflect row-level locking'
+            ))
+
+        name = f'benchmark-stock-shards-{uuid.uuid4().hex[:8]}'
+        user = User.objects.create_user(username=name, email=f'{name}@example.com', password=None)
+        category = Category.objects.create(name=name, slug=name)
+        product = Product.objects.create(
+            name=name, slug=name, description=name, price=Decimal('1.00'), category=category,
+        )
+
+        try:
+            self.stdout.write(f"{'shards':>6}  {'checkouts':>9}  {'failed':>6}  {'seconds':>8}  {'checkouts/s':>11}")
+            for count in counts:
+                # Enough stock for every checkout: only lock waits slow them down
+                set_stock_shards(product, 0)
+                Product.objects.filter(pk=product.pk).update(stock=options['checkouts'] * options['quantity'])
+                product = set_stock_shards(product, count)
+
+                done, failed, elapsed = self._run(product, user, options)
+                self.stdout.write(
+                    f'{count:>6}  {done:>9}  {failed:>6}  {elapsed:>8.2f}  {done / elapsed:>11.1f}'
+                )
+        finally:
+            Order.objects.filter(user=user).delete()
+            product.delete()
+            category.delete()
+            user.delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['workers']} workers, {options['checkouts']} checkouts per shard count, "
+            f"{options['hold_ms']:g} ms hold"
+        ))
+
+    def _run(self, product, user, options):
+        """Run the checkouts, returns `(succeeded, failed, seconds)`."""
+        request = SimpleNamespace(user=user)
+        data = {
+            'items': [{'product': str(product.id), 'quantity': options['quantity']}],
+            'shipping_address': '1 rue du Test',
+            'shipping_city': 'Paris',
+            'shipping_postal_code': '75001',
+            'shipping_country': 'France',
+        }
+        hold = options['hold_ms'] / 1000
+        lock = threading.Lock()
+        state = {'left': options['checkouts'], 'done': 0, 'failed': 0}
+        start = threading.Barrier(options['workers'] + 1)
+
+        def worker():
+            close_old_connections()
+            try:
+                start.wait()
+                while True:
+                    with lock:
+                        if not state['left']:
+                            return
+                        state['left'] -= 1
+                    serializer = OrderCreateSerializer(data=data, context={'request': request})
+                    serializer.is_valid(raise_exception=True)
+                    try:
+                        # Stock rows stay locked until the outer transaction commits
+                        with transaction.atomic():
+                            serializer.save()
+                            if hold:
+                                time.sleep(hold)
+                        outcome = 'done'
+                    except ValidationError:
+                        outcome = 'failed'
+                    with lock:
+                        state[outcome] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['workers'])]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return state['done'], state['failed'], time.perf_counter() - began
@@ -0,0 +1,40 @@
+"""
+Management command to release expired stock reservations.
+Run it every minute (cron), or as a long-running worker with --loop.
+Usage: python manage.py release_expired_reservations [--batch-size 500] [--loop] [--interval 30]
+"""
+import time
+from django.core.management.base import BaseCommand
+
+from orders.services import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = 'Release stock held by expired reservations, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Reservations released per transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, sweeping every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=30,
+            help='Seconds between two sweeps with --loop (default: 30)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired_reservations(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{released} expired reservations released'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
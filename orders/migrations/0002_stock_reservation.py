@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:55
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0008_product_reserved'),
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier (UUID)', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated')),
+                ('is_active', models.BooleanField(default=True, help_text='Soft delete flag - False means deleted')),
+                ('token', models.UUIDField(db_index=True, help_text='Reservation identifier, sent back at checkout')),
+                ('quantity', models.PositiveIntegerField(help_text='Quantity held', validators=[django.core.validators.MinValueValidator(1)])),
+                ('expires_at', models.DateTimeField(help_text='Released by the sweeper after this date')),
+                ('product', models.ForeignKey(help_text='Reserved product', on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='products.product')),
+                ('user', models.ForeignKey(help_text='Customer holding the stock', on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Stock Reservation',
+                'verbose_name_plural': 'Stock Reservations',
+                'ordering': ['expires_at'],
+                'indexes': [models.Index(fields=['expires_at'], name='reservation_expires_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stockreservation',
+            constraint=models.UniqueConstraint(fields=('token', 'product'), name='unique_reservation_product'),
+        ),
+    ]
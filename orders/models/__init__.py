@@ -1,10 +1,11 @@
 from .choices import OrderStatus
 from .order import Order
 from .order_item import OrderItem
+from .reservation import StockReservation
 
 __all__ = [
     'OrderStatus',
     'Order',
     'OrderItem',
+    'StockReservation',
 ]
-
@@ -1,8 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
 from core.models import AuditedModel
+from products.models import Product
+from products.services.catalog import invalidate_stock
+from products.services.stock_shards import restore_sharded_stock
 from .choices import OrderStatus
 
 
@@ -102,18 +106,58 @@ class Order(AuditedModel):
         return self.status in [OrderStatus.PENDING, OrderStatus.CONFIRMED]
     
     def cancel(self):
-        """Cancel order and restore stock."""
-        if not self.can_be_cancelled():
-            raise ValueError(f"Cannot cancel order with status {self.status}")
+        """
+        Cancel order and restore stock.
         
-        # Restore stock for each item
-        for item in self.items.all():
-            item.product.increase_stock(item.quantity)
+        The status change is conditional (`WHERE status IN (pending,
+        confirmed)`), so of two concurrent cancellations only one restores
+        the stock. Returns True if this call cancelled the order, False if
+        it was already cancelled.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            cancelled = Order.objects.filter(
+                pk=self.pk,
+                status__in=[OrderStatus.PENDING, OrderStatus.CONFIRMED],
+            ).update(status=OrderStatus.CANCELLED, cancelled_at=now, updated_at=now)
+            
+            if not cancelled:
+                self.refresh_from_db(fields=['status', 'cancelled_at', 'updated_at'])
+                if self.status == OrderStatus.CANCELLED:
+                    return False
+                raise ValueError(f"Cannot cancel order with status {self.status}")
+            
+            # Restore stock: one UPDATE for all products, quantities summed per product
+            totals = dict(
+                self.items.order_by().values('product').annotate(total=Sum('quantity'))
+                .values_list('product', 'total')
+            )
+            # Locked in id order like checkouts; NO KEY like set_stock_shards,
+            # so that a resize cannot change the shard count until commit
+            shard_counts = dict(
+                Product.objects.select_for_update(no_key=True).filter(id__in=list(totals))
+                .order_by('id').values_list('id', 'stock_shard_count')
+            )
+            quantities = {product_id: total for product_id, total in totals.items() if not shard_counts.get(product_id)}
+            sharded = {product_id: total for product_id, total in totals.items() if shard_counts.get(product_id)}
+            if quantities:
+                Product.objects.filter(id__in=list(quantities)).update(
+                    stock=F('stock') + Case(
+                        *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+                        output_field=IntegerField(),
+                    ),
+                    updated_at=now,
+                )
+                # No signals for update(): stock is shown in cached catalog pages
+                invalidate_stock()
+            if sharded:
+                # Flash-sale products: back into one of their shards
+                restore_sharded_stock(sharded, shard_counts)
         
-        # Update status
         self.status = OrderStatus.CANCELLED
-        self.cancelled_at = timezone.now()
-        self.save(update_fields=['status', 'cancelled_at', 'updated_at'])
+        self.cancelled_at = now
+        self.updated_at = now
+        return True
     
     def confirm(self):
         """Confirm order."""
@@ -0,0 +1,56 @@
+from django.db import models
+from django.conf import settings
+from django.core.validators import MinValueValidator
+from core.models import AuditedModel
+
+
+class StockReservation(AuditedModel):
+    """
+    Stock held for a cart until checkout or expiry.
+    
+    Rows sharing a `token` form one reservation (one row per product). The
+    held quantities are mirrored in `Product.reserved`.
+    """
+    
+    token = models.UUIDField(
+        db_index=True,
+        help_text="Reservation identifier, sent back at checkout"
+    )
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='stock_reservations',
+        help_text="Customer holding the stock"
+    )
+    
+    product = models.ForeignKey(
+        'products.Product',
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        help_text="Reserved product"
+    )
+    
+    quantity = models.PositiveIntegerField(
+        validators=[MinValueValidator(1)],
+        help_text="Quantity held"
+    )
+    
+    expires_at = models.DateTimeField(
+        help_text="Released by the sweeper after this date"
+    )
+    
+    class Meta:
+        verbose_name = 'Stock Reservation'
+        verbose_name_plural = 'Stock Reservations'
+        ordering = ['expires_at']
+        constraints = [
+            models.UniqueConstraint(fields=['token', 'product'], name='unique_reservation_product'),
+        ]
+        indexes = [
+            # release_expired_reservations
+            models.Index(fields=['expires_at'], name='reservation_expires_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} × {self.quantity} ({self.token})"
@@ -1,5 +1,15 @@
 from .order_item import OrderItemCreateSerializer, OrderItemSerializer
-from .order import OrderCreateSerializer, OrderSerializer, OrderListSerializer
+from .order import (
+    OrderCreateSerializer,
+    OrderSerializer,
+    OrderListSerializer,
+    OrderListFastSerializer,
+)
+from .reservation import (
+    StockReservationCreateSerializer,
+    StockReservationItemSerializer,
+    StockReservationSerializer,
+)
 
 __all__ = [
     'OrderItemCreateSerializer',
@@ -7,5 +17,9 @@ __all__ = [
     'OrderCreateSerializer',
     'OrderSerializer',
     'OrderListSerializer',
+    'OrderListFastSerializer',
+    'StockReservationCreateSerializer',
+    'StockReservationItemSerializer',
+    'StockReservationSerializer',
 ]
 
@@ -1,8 +1,19 @@
 from rest_framework import serializers
 from django.db import transaction
-from django.shortcuts import get_object_or_404
+from django.db.models import Count, F
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
 from ..models import Order, OrderItem
+from core.utils.fast_serializers import (
+    FastListSerializer,
+    datetime_formatter,
+    decimal_formatter,
+    format_uuid,
+)
+from core.utils.sparse_fields import SparseFieldsetSerializerMixin
 from products.models import Product
+from products.services import get_sharded_stock, invalidate_stock, take_sharded_stock
+from ..services import consume_reservation, merge_quantities, quantity_case
 from .order_item import OrderItemCreateSerializer, OrderItemSerializer
 
 
@@ -11,13 +22,19 @@ class OrderCreateSerializer(serializers.ModelSerializer):
     Serializer for creating orders with nested items.
     Validates stock and creates order items automatically.
     """
-    items = OrderItemCreateSerializer(many=True, help_text="Order items")
+    items = OrderItemCreateSerializer(many=True, required=False, help_text="Order items")
+    reservation = serializers.UUIDField(
+        required=False,
+        write_only=True,
+        help_text="Stock reservation token (instead of items)"
+    )
     
     class Meta:
         model = Order
         fields = [
             'id',
             'items',
+            'reservation',
             'shipping_address',
             'shipping_city',
             'shipping_postal_code',
@@ -31,51 +48,118 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Au moins un article est requis.")
         return items
     
+    def validate(self, attrs):
+        """Either items or a reservation."""
+        if 'items' in attrs and 'reservation' in attrs:
+            raise serializers.ValidationError("Indiquez des articles ou une réservation, pas les deux.")
+        if 'items' not in attrs and 'reservation' not in attrs:
+            raise serializers.ValidationError({'items': ["Au moins un article est requis."]})
+        return attrs
+    
     @transaction.atomic
     def create(self, validated_data):
-        """Create order with items and reduce stock."""
-        items_data = validated_data.pop('items')
+        """
+        Create order with items and reduce stock.
+        
+        Fixed number of queries whatever the cart size. With a reservation,
+        the held stock is converted as is; otherwise every line is checked
+        and reduced here.
+        """
+        user = self.context['request'].user
+        token = validated_data.pop('reservation', None)
+        items_data = validated_data.pop('items', [])
         
-        # Create order
+        if token:
+            # Lines were checked when the stock was held
+            quantities = consume_reservation(user, token)
+            products = Product.objects.in_bulk(list(quantities))
+        else:
+            # Same product on several lines: one line with the summed quantity
+            quantities = merge_quantities((item['product_id'], item['quantity']) for item in items_data)
+            products = self._reduce_stock(quantities)
+        
+        # Create order with its total computed in memory
+        items = [
+            OrderItem(
+                product=products[product_id],
+                product_name=products[product_id].name,
+                product_price=products[product_id].price,
+                quantity=quantity,
+                subtotal=products[product_id].price * quantity,
+            )
+            for product_id, quantity in quantities.items()
+        ]
         order = Order.objects.create(
-            user=self.context['request'].user,
+            user=user,
+            total_amount=sum(item.subtotal for item in items),
             **validated_data
         )
         
-        # Process each item
-        for item_data in items_data:
-            product_id = item_data['product']
-            quantity = item_data['quantity']
-            
-            # Get product
-            product = get_object_or_404(Product, id=product_id, is_active=True)
+        # Create order items with snapshot
+        for item in items:
+            item.order = order
+        OrderItem.objects.bulk_create(items)
+        
+        return order
+    
+    def _reduce_stock(self, quantities):
+        """
+        Check and reduce stock for `{product_id: quantity}`, returns products.
+        
+        Products are locked in one SELECT ... FOR UPDATE (ordered by id, so
+        concurrent checkouts cannot deadlock) and reduced in one UPDATE.
+        Sharded products (flash-sale mode) are not locked: their stock is
+        taken from the shards, see products/services/stock_shards.py.
+        """
+        products = {
+            product.id: product
+            for product in Product.objects.select_for_update().filter(
+                id__in=list(quantities), is_active=True, stock_shard_count=0
+            ).order_by('id')
+        }
+        sharded = {}
+        if len(products) < len(quantities):
+            sharded = Product.objects.filter(
+                id__in=[product_id for product_id in quantities if product_id not in products],
+                is_active=True,
+            ).in_bulk()
+            products.update(sharded)
+        
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if product is None:
+                raise NotFound(f"Produit introuvable : {product_id}")
             
-            # Validate stock
-            if product.stock < quantity:
+            # Validate stock (held by other carts' reservations excluded)
+            if product_id not in sharded and product.available < quantity:
                 raise serializers.ValidationError(
                     f"Stock insuffisant pour {product.name}. "
-                    f"Disponible : {product.stock}, Demandé : {quantity}"
+                    f"Disponible : {product.available}, Demandé : {quantity}"
                 )
-            
-            # Create order item with snapshot
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                product_name=product.name,
-                product_price=product.price,
-                quantity=quantity,
-            )
-            
-            # Reduce stock
-            product.reduce_stock(quantity)
         
-        # Calculate total
-        order.calculate_total()
+        # Shards are checked while taken, in id order like the locks above
+        for product_id in sorted(sharded):
+            product = sharded[product_id]
+            if not take_sharded_stock(product, quantities[product_id]):
+                available = get_sharded_stock([product_id]).get(product_id, 0)
+                raise serializers.ValidationError(
+                    f"Stock insuffisant pour {product.name}. "
+                    f"Disponible : {available}, Demandé : {quantities[product_id]}"
+                )
         
-        return order
+        plain = {product_id: quantity for product_id, quantity in quantities.items() if product_id not in sharded}
+        if plain:
+            Product.objects.filter(id__in=list(plain)).update(
+                stock=F('stock') - quantity_case(plain),
+                updated_at=timezone.now(),
+            )
+            # No signals for update(): stock is shown in cached catalog pages.
+            # Shards only change a snapshot refreshed by the rebalancing job.
+            invalidate_stock()
+        return products
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     Detailed order serializer with nested items.
     """
@@ -122,7 +206,7 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
 
 
-class OrderListSerializer(serializers.ModelSerializer):
+class OrderListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     Lightweight serializer for order list.
     """
@@ -144,3 +228,26 @@ class OrderListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
+
+
+class OrderListFastSerializer(FastListSerializer):
+    """
+    Fast path for `OrderListSerializer`, from `.values()` rows.
+    """
+    annotations = {'items_count': Count('items')}
+    
+    def get_fields(self):
+        total_amount = Order._meta.get_field('total_amount')
+        # Labels are translated once per request, not once per row
+        labels = {value: str(label) for value, label in Order._meta.get_field('status').flatchoices}
+        
+        return {
+            'id': ('id', format_uuid),
+            'user_email': ('user__email', None),
+            'status': ('status', None),
+            'status_display': ('status', lambda value: labels.get(value, value)),
+            'total_amount': ('total_amount', decimal_formatter(total_amount.max_digits, total_amount.decimal_places)),
+            'items_count': ('items_count', None),
+            'shipping_city': ('shipping_city', None),
+            'created_at': ('created_at', datetime_formatter()),
+        }
@@ -6,7 +6,8 @@ class OrderItemCreateSerializer(serializers.Serializer):
     """
     Serializer for creating order items (nested in order creation).
     """
-    product = serializers.UUIDField(help_text="Product UUID")
+    # product_id: the response renders the id without loading the product
+    product = serializers.UUIDField(source='product_id', help_text="Product UUID")
     quantity = serializers.IntegerField(min_value=1, help_text="Quantity")
 
 
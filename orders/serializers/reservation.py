@@ -0,0 +1,32 @@
+from rest_framework import serializers
+from .order_item import OrderItemCreateSerializer
+
+
+class StockReservationCreateSerializer(serializers.Serializer):
+    """
+    Serializer for holding stock before checkout.
+    """
+    items = OrderItemCreateSerializer(many=True, help_text="Items to hold")
+    
+    def validate_items(self, items):
+        """Validate that items list is not empty."""
+        if not items:
+            raise serializers.ValidationError("Au moins un article est requis.")
+        return items
+
+
+class StockReservationItemSerializer(serializers.Serializer):
+    """
+    One reserved product.
+    """
+    product = serializers.UUIDField(source='product_id')
+    quantity = serializers.IntegerField()
+
+
+class StockReservationSerializer(serializers.Serializer):
+    """
+    Reservation: token to send at checkout, expiry and held items.
+    """
+    token = serializers.UUIDField()
+    expires_at = serializers.DateTimeField()
+    items = StockReservationItemSerializer(many=True)
@@ -0,0 +1,17 @@
+from .reservations import (
+    consume_reservation,
+    merge_quantities,
+    quantity_case,
+    release_expired_reservations,
+    release_reservation,
+    reserve_stock,
+)
+
+__all__ = [
+    'consume_reservation',
+    'merge_quantities',
+    'quantity_case',
+    'release_expired_reservations',
+    'release_reservation',
+    'reserve_stock',
+]
@@ -0,0 +1,180 @@
+"""
+Stock reservations - Hold stock for a cart between checkout start and payment.
+
+Held quantities are mirrored in `Product.reserved` (a maintained counter, so
+availability is `stock - reserved` without scanning reservations). Every
+counter change is one conditional UPDATE across the products involved.
+Expired holds are released in batches by `release_expired_reservations`,
+run by the `release_expired_reservations` command. Sharded products
+(flash-sale mode) cannot be reserved.
+"""
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+from orders.models import StockReservation
+from products.models import Product
+from products.services import invalidate_stock
+
+
+def merge_quantities(items):
+    """`{product_id: quantity}` from `(product_id, quantity)` pairs, summed per product."""
+    quantities = {}
+    for product_id, quantity in items:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def quantity_case(quantities):
+    """`CASE id WHEN ... THEN quantity END`, for one UPDATE across products."""
+    return Case(
+        *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def _availability_error(quantities):
+    """The error explaining why `quantities` cannot be held."""
+    products = Product.objects.filter(id__in=list(quantities), is_active=True).in_bulk()
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if product is None:
+            return NotFound(f"Produit introuvable : {product_id}")
+        if product.is_sharded:
+            return ValidationError(f"Réservation impossible pendant la vente flash de {product.name}.")
+        if product.available < quantity:
+            return ValidationError(
+                f"Stock insuffisant pour {product.name}. "
+                f"Disponible : {product.available}, Demandé : {quantity}"
+            )
+    return ValidationError("Stock insuffisant.")
+
+
+def reserve_stock(user, items):
+    """
+    Hold stock for `items` (`(product_id, quantity)` pairs), all or nothing.
+
+    Returns `(token, expires_at, quantities)`. Raises NotFound for an unknown
+    or inactive product and ValidationError when the stock is not available.
+    """
+    quantities = merge_quantities(items)
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.STOCK_RESERVATION_TTL)
+    token = uuid.uuid4()
+
+    with transaction.atomic():
+        held = quantity_case(quantities)
+        updated = Product.objects.filter(
+            id__in=list(quantities),
+            is_active=True,
+            # Flash-sale stock lives in shards: not reservable
+            stock_shard_count=0,
+            stock__gte=F('reserved') + held,
+        ).update(reserved=F('reserved') + held, updated_at=now)
+
+        if updated == len(quantities):
+            StockReservation.objects.bulk_create([
+                StockReservation(
+                    token=token,
+                    user=user,
+                    product_id=product_id,
+                    quantity=quantity,
+                    expires_at=expires_at,
+                )
+                for product_id, quantity in quantities.items()
+            ])
+            # No signals for update(): availability is shown in cached catalog pages
+            invalidate_stock()
+            return token, expires_at, quantities
+
+        transaction.set_rollback(True)
+
+    raise _availability_error(quantities)
+
+
+def _release(rows, now):
+    """Give back the stock held by locked `(id, product_id, quantity)` rows."""
+    if not rows:
+        return
+    quantities = merge_quantities((product_id, quantity) for pk, product_id, quantity in rows)
+    Product.objects.filter(id__in=list(quantities)).update(
+        reserved=F('reserved') - quantity_case(quantities),
+        updated_at=now,
+    )
+    StockReservation.objects.filter(id__in=[pk for pk, product_id, quantity in rows]).delete()
+    invalidate_stock()
+
+
+def release_reservation(user, token):
+    """Cancel a reservation. Returns the number of products released."""
+    with transaction.atomic():
+        rows = list(
+            StockReservation.objects.select_for_update()
+            .filter(token=token, user=user)
+            .values_list('id', 'product_id', 'quantity')
+        )
+        _release(rows, timezone.now())
+    return len(rows)
+
+
+def release_expired_reservations(batch_size=500):
+    """
+    Release every expired hold, `batch_size` rows per transaction.
+
+    Rows locked by a checkout in progress are skipped (SKIP LOCKED), so the
+    sweeper never waits on checkouts nor releases a hold being consumed.
+    Returns the number of rows released.
+    """
+    released = 0
+    now = timezone.now()
+    while True:
+        with transaction.atomic():
+            rows = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lte=now)
+                .order_by('expires_at')
+                .values_list('id', 'product_id', 'quantity')[:batch_size]
+            )
+            _release(rows, now)
+        released += len(rows)
+        if len(rows) < batch_size:
+            return released
+
+
+def consume_reservation(user, token):
+    """
+    Turn a reservation into sold stock, in the caller's transaction.
+
+    Lines were validated when the stock was held: one UPDATE moves the held
+    quantities out of both `stock` and `reserved`. Returns
+    `{product_id: quantity}`.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            StockReservation.objects.select_for_update()
+            .filter(token=token, user=user)
+            .values_list('id', 'product_id', 'quantity', 'expires_at')
+        )
+        if not rows:
+            raise ValidationError({'reservation': ["Réservation introuvable ou expirée."]})
+        if any(expires_at <= now for pk, product_id, quantity, expires_at in rows):
+            raise ValidationError({'reservation': ["Réservation expirée."]})
+
+        quantities = merge_quantities((product_id, quantity) for pk, product_id, quantity, expires_at in rows)
+        held = quantity_case(quantities)
+        # stock >= held only fails if the stock was lowered by hand meanwhile
+        updated = Product.objects.filter(id__in=list(quantities), stock__gte=held).update(
+            stock=F('stock') - held,
+            reserved=F('reserved') - held,
+            updated_at=now,
+        )
+        if updated != len(quantities):
+            raise ValidationError({'reservation': ["Stock insuffisant pour honorer la réservation."]})
+
+        StockReservation.objects.filter(id__in=[row[0] for row in rows]).delete()
+        invalidate_stock()
+    return quantities
@@ -1,3 +1,792 @@
-from django.test import TestCase
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+from django.db import connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as django_timezone, translation
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from accounts.models import User
+from core.models import IdempotencyKey
+from orders.models import Order, OrderStatus, StockReservation
+from orders.serializers import OrderListFastSerializer, OrderListSerializer
+from orders.services import release_expired_reservations, reserve_stock
+from products.models import Category, Product
+from products.services import rebalance_stock_shards, set_stock_shards, take_sharded_stock
 
-# Create your tests here.
+
+class OrderListFastSerializerParityTests(SimpleTestCase):
+    """The fast path must render exactly what OrderListSerializer renders."""
+
+    def make_request(self, query=''):
+        return Request(APIRequestFactory().get(f'/api/orders/{query}'))
+
+    def make_order(self, items_count=2, **kwargs):
+        values = {
+            'id': uuid.uuid4(),
+            'status': OrderStatus.CONFIRMED,
+            'total_amount': Decimal('120.5'),
+            'shipping_city': 'Saint-Étienne',
+            'created_at': datetime(2024, 3, 31, 0, 30, 15, 123456, tzinfo=timezone.utc),
+        }
+        values.update(kwargs)
+        order = Order(**values)
+        order.user = User(email='client@example.com')
+        # items.count() reads the prefetch cache instead of the database
+        items = Order.objects.none()
+        items._result_cache = [None] * items_count
+        order._prefetched_objects_cache = {'items': items}
+        return order
+
+    def as_row(self, order):
+        return {
+            'id': order.id,
+            'user__email': order.user.email,
+            'status': order.status,
+            'total_amount': order.total_amount,
+            'items_count': order.items.count(),
+            'shipping_city': order.shipping_city,
+            'created_at': order.created_at,
+        }
+
+    def assertParity(self, orders, request):
+        context = {'request': request}
+        expected = OrderListSerializer(orders, many=True, context=context).data
+        fast = OrderListFastSerializer(context=context)
+        actual = fast.serialize([self.as_row(order) for order in orders])
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+    def test_default_fields(self):
+        orders = [self.make_order(status=status) for status in OrderStatus.values]
+        orders.append(self.make_order(items_count=0, total_amount=Decimal('0')))
+        self.assertParity(orders, self.make_request())
+
+    def test_dates(self):
+        orders = [
+            # Winter / summer time in the project time zone
+            self.make_order(created_at=datetime(2024, 1, 15, 12, 0, tzinfo=timezone.utc)),
+            self.make_order(created_at=datetime(2024, 7, 15, 23, 59, 59, tzinfo=timezone.utc)),
+        ]
+        self.assertParity(orders, self.make_request())
+        with override_settings(TIME_ZONE='UTC'):
+            self.assertParity(orders, self.make_request())
+
+    def test_status_labels_follow_active_language(self):
+        with translation.override('en'):
+            self.assertParity([self.make_order()], self.make_request())
+
+    def test_sparse_fieldsets(self):
+        orders = [self.make_order()]
+        self.assertParity(orders, self.make_request('?fields=id,status_display,created_at'))
+        self.assertParity(orders, self.make_request('?omit=items_count,user_email'))
+
+
+class OrderConditionalGetTests(TestCase):
+    """Order detail answers 304 while the order and its items are unchanged."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='client', email='client@example.com', password='x')
+        cls.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='x', is_staff=True,
+        )
+        cls.order = Order.objects.create(
+            user=cls.customer,
+            shipping_address='1 rue de la Paix',
+            shipping_city='Paris',
+            shipping_postal_code='75002',
+        )
+
+    def get(self, user, **headers):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(f'/api/orders/{self.order.pk}/', **headers)
+
+    def test_not_modified(self):
+        etag = self.get(self.customer)['ETag']
+
+        response = self.get(self.customer, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.content), (304, b''))
+
+        self.order.confirm()
+        response = self.get(self.customer, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['status']), (200, OrderStatus.CONFIRMED))
+
+    def test_other_customers_get_404(self):
+        other = User.objects.create_user(username='autre', email='autre@example.com', password='x')
+        etag = self.get(self.admin)['ETag']
+
+        self.assertEqual(self.get(other, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+        self.assertEqual(self.get(self.admin, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class OrderSparseFieldsetTests(TestCase):
+    """?fields= / ?omit= on the order detail skip the items and text columns."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='client', email='client@example.com', password='x')
+        cls.order = Order.objects.create(
+            user=cls.customer,
+            shipping_address='1 rue de la Paix',
+            shipping_city='Paris',
+            shipping_postal_code='75002',
+            notes='Sonner deux fois',
+        )
+
+    def get(self, query):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/api/orders/{self.order.pk}/{query}')
+        return response, ' '.join(query['sql'] for query in queries)
+
+    def test_fields(self):
+        response, sql = self.get('?fields=id,status,total_amount')
+
+        self.assertEqual(set(response.data), {'id', 'status', 'total_amount'})
+        self.assertNotIn('FROM "orders_orderitem"', sql)
+        self.assertNotIn('"orders_order"."notes"', sql)
+        self.assertNotIn('"orders_order"."shipping_address"', sql)
+
+    def test_omit(self):
+        response, sql = self.get('?omit=items,notes')
+
+        self.assertNotIn('items', response.data)
+        self.assertEqual(response.data['shipping_address'], '1 rue de la Paix')
+        self.assertNotIn('FROM "orders_orderitem"', sql)
+        self.assertNotIn('"orders_order"."notes"', sql)
+
+    def test_full_representation_by_default(self):
+        response, sql = self.get('')
+
+        self.assertEqual((response.data['notes'], response.data['items']), ('Sonner deux fois', []))
+        self.assertIn('FROM "orders_orderitem"', sql)
+
+    def test_unknown_field_is_rejected(self):
+        self.assertEqual(self.get('?omit=inconnu')[0].status_code, 400)
+
+
+class CheckoutTests(TestCase):
+    """Checkout locks, checks and reduces stock in a fixed number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='client', email='client@example.com', password='x')
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        cls.products = [
+            Product.objects.create(
+                name=f'Produit {index}', slug=f'produit-{index}', price=Decimal('10.50'), stock=10, category=category,
+            )
+            for index in range(5)
+        ]
+
+    def checkout(self, items):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        return client.post('/api/orders/', {
+            'items': [{'product': str(product.id), 'quantity': quantity} for product, quantity in items],
+            'shipping_address': '1 rue de la Paix',
+            'shipping_city': 'Paris',
+            'shipping_postal_code': '75002',
+            'shipping_country': 'France',
+        }, format='json')
+
+    def stocks(self):
+        return list(Product.objects.order_by('slug').values_list('stock', flat=True))
+
+    def test_duplicate_lines_are_merged(self):
+        chair = self.products[0]
+
+        response = self.checkout([(chair, 2), (self.products[1], 1), (chair, 3)])
+
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(user=self.customer)
+        self.assertEqual(
+            sorted(order.items.values_list('product__slug', 'quantity', 'subtotal')),
+            [('produit-0', 5, Decimal('52.50')), ('produit-1', 1, Decimal('10.50'))],
+        )
+        self.assertEqual(order.total_amount, Decimal('63.00'))
+        self.assertEqual(self.stocks(), [5, 9, 10, 10, 10])
+
+    def test_query_count_does_not_grow_with_the_cart(self):
+        with CaptureQueriesContext(connection) as one:
+            self.assertEqual(self.checkout([(self.products[0], 1)]).status_code, 201)
+        with CaptureQueriesContext(connection) as five:
+            self.assertEqual(self.checkout([(product, 1) for product in self.products]).status_code, 201)
+
+        self.assertEqual(len(one), len(five))
+
+    def test_insufficient_stock_changes_nothing(self):
+        response = self.checkout([(self.products[0], 2), (self.products[1], 11)])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Disponible : 10', str(response.data))
+        self.assertEqual(self.stocks(), [10] * 5)
+        self.assertFalse(Order.objects.exists())
+
+    def test_unknown_or_inactive_product_is_404(self):
+        Product.objects.filter(pk=self.products[1].pk).update(is_active=False)
+
+        self.assertEqual(self.checkout([(self.products[1], 1)]).status_code, 404)
+        self.assertEqual(self.checkout([(Product(id=uuid.uuid4()), 1)]).status_code, 404)
+        self.assertFalse(Order.objects.exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', "Row locks are PostgreSQL only")
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Simultaneous checkouts of the last units never oversell."""
+
+    def setUp(self):
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        self.product = Product.objects.create(name='Chaise', slug='chaise', price=Decimal('10'), stock=2, category=category)
+        self.customers = [
+            User.objects.create_user(username=f'client{index}', email=f'client{index}@example.com', password='x')
+            for index in range(4)
+        ]
+
+    def test_no_oversell(self):
+        barrier = threading.Barrier(len(self.customers))
+        statuses = []
+
+        def checkout(customer):
+            try:
+                client = APIClient()
+                client.force_authenticate(customer)
+                barrier.wait()
+                response = client.post('/api/orders/', {
+                    'items': [{'product': str(self.product.id), 'quantity': 1}],
+                    'shipping_address': '1 rue de la Paix',
+                    'shipping_city': 'Paris',
+                    'shipping_postal_code': '75002',
+                    'shipping_country': 'France',
+                }, format='json')
+                statuses.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=checkout, args=(customer,)) for customer in self.customers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [201, 201, 400, 400])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        self.assertEqual(Order.objects.count(), 2)
+
+
+class OrderCancelTests(TestCase):
+    """Cancelling restores stock in one statement, and only once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='client', email='client@example.com', password='x')
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        cls.chair = Product.objects.create(name='Chaise', slug='chaise', price=Decimal('10'), stock=10, category=category)
+        cls.table = Product.objects.create(name='Table', slug='table', price=Decimal('90'), stock=3, category=category)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+        response = self.client.post('/api/orders/', {
+            'items': [
+                {'product': str(self.chair.id), 'quantity': 2},
+                {'product': str(self.table.id), 'quantity': 1},
+                {'product': str(self.chair.id), 'quantity': 1},
+            ],
+            'shipping_address': '1 rue de la Paix',
+            'shipping_city': 'Paris',
+            'shipping_postal_code': '75002',
+            'shipping_country': 'France',
+        }, format='json')
+        self.order = Order.objects.get(pk=response.data['id'])
+
+    def stocks(self):
+        return list(Product.objects.order_by('slug').values_list('stock', flat=True))
+
+    def cancel(self):
+        return self.client.post(f'/api/orders/{self.order.pk}/cancel/')
+
+    def test_cancel_restores_stock_in_one_update(self):
+        self.assertEqual(self.stocks(), [7, 2])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.cancel()
+
+        self.assertEqual((response.status_code, response.data['status']), (200, OrderStatus.CANCELLED))
+        self.assertEqual(self.stocks(), [10, 3])
+        self.assertEqual(sum(sql['sql'].startswith('UPDATE "products_product"') for sql in queries), 1)
+
+    def test_second_cancel_is_rejected(self):
+        self.assertEqual(self.cancel().status_code, 200)
+
+        response = self.cancel()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cancelled', response.data['error'])
+        self.assertEqual(self.stocks(), [10, 3])
+
+    def test_stale_instance_does_not_restore_twice(self):
+        stale = Order.objects.get(pk=self.order.pk)
+
+        self.assertTrue(self.order.cancel())
+        self.assertFalse(stale.cancel())
+
+        self.assertEqual(stale.status, OrderStatus.CANCELLED)
+        self.assertEqual(self.stocks(), [10, 3])
+
+    def test_shipped_order_cannot_be_cancelled(self):
+        self.order.confirm()
+        self.order.ship()
+
+        self.assertEqual(self.cancel().status_code, 400)
+        self.assertEqual(self.stocks(), [7, 2])
+
+
+@skipUnless(connection.vendor == 'postgresql', "Row locks are PostgreSQL only")
+class ConcurrentCancelTests(TransactionTestCase):
+    """Of two simultaneous cancellations, one succeeds and one gets a 400."""
+
+    def setUp(self):
+        self.customer = User.objects.create_user(username='client', email='client@example.com', password='x')
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        self.product = Product.objects.create(name='Chaise', slug='chaise', price=Decimal('10'), stock=10, category=category)
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        response = client.post('/api/orders/', {
+            'items': [{'product': str(self.product.id), 'quantity': 4}],
+            'shipping_address': '1 rue de la Paix',
+            'shipping_city': 'Paris',
+            'shipping_postal_code': '75002',
+            'shipping_country': 'France',
+        }, format='json')
+        self.order_id = response.data['id']
+
+    def test_double_cancel(self):
+        barrier = threading.Barrier(2)
+        statuses = []
+
+        def cancel():
+            try:
+                client = APIClient()
+                client.force_authenticate(self.customer)
+                barrier.wait()
+                statuses.append(client.post(f'/api/orders/{self.order_id}/cancel/').status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=cancel) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [200, 400])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
+
+class IdempotencyKeyTests(TestCase):
+    """Retries with the same Idempotency-Key replay the first response."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='client', email='client@example.com', password='x')
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        cls.product = Product.objects.create(name='Chaise', slug='chaise', price=Decimal('10'), stock=10, category=category)
+
+    def post(self, path='/api/orders/', quantity=1, key='cle-1', user=None):
+        client = APIClient()
+        client.force_authenticate(user or self.customer)
+        data = {
+            'items': [{'product': str(self.product.id), 'quantity': quantity}],
+            'shipping_address': '1 rue de la Paix',
+            'shipping_city': 'Paris',
+            'shipping_postal_code': '75002',
+            'shipping_country': 'France',
+        } if path == '/api/orders/' else None
+        return client.post(path, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def stock(self):
+        self.product.refresh_from_db()
+        return self.product.stock
+
+    def test_replay_does_not_touch_products(self):
+        first = self.post()
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', first)
+
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.post()
+
+        self.assertEqual((retry.status_code, retry['Idempotent-Replayed']), (201, 'true'))
+        self.assertEqual(retry.data, first.data)
+        self.assertFalse(any('products_product' in query['sql'] for query in queries))
+        self.assertEqual((Order.objects.count(), self.stock()), (1, 9))
+
+    def test_key_reused_for_another_request(self):
+        self.post()
+
+        response = self.post(quantity=2)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual((Order.objects.count(), self.stock()), (1, 9))
+
+    def test_keys_are_per_user(self):
+        other = User.objects.create_user(username='autre', email='autre@example.com', password='x')
+        self.post()
+
+        response = self.post(user=other)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_client_errors_are_replayed_too(self):
+        self.assertEqual(self.post(quantity=11).status_code, 400)
+        Product.objects.filter(pk=self.product.pk).update(stock=20)
+
+        response = self.post(quantity=11)
+
+        self.assertEqual((response.status_code, response['Idempotent-Replayed']), (400, 'true'))
+        self.assertFalse(Order.objects.exists())
+
+    def test_expired_key_runs_again(self):
+        self.post()
+        IdempotencyKey.objects.update(expires_at=django_timezone.now() - timedelta(seconds=1))
+
+        response = self.post()
+
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual((Order.objects.count(), self.stock()), (2, 8))
+
+    def test_invalid_key(self):
+        self.assertEqual(self.post(key='').status_code, 400)
+        self.assertEqual(self.post(key='x' * 256).status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_cancel_retry_replays_the_success(self):
+        order_id = self.post().data['id']
+
+        first = self.post(f'/api/orders/{order_id}/cancel/', key='annulation')
+        retry = self.post(f'/api/orders/{order_id}/cancel/', key='annulation')
+
+        self.assertEqual((first.status_code, retry.status_code), (200, 200))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.stock(), 10)
+        self.assertEqual(self.post(f'/api/orders/{order_id}/cancel/', key='autre').status_code, 400)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Row locks are PostgreSQL only")
+class ConcurrentIdempotencyKeyTests(TransactionTestCase):
+    """A duplicate sent while the first request runs waits, then replays."""
+
+    def setUp(self):
+        self.customer = User.objects.create_user(username='client', email='client@example.com', password='x')
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        self.product = Product.objects.create(name='Chaise', slug='chaise', price=Decimal('10'), stock=10, category=category)
+
+    def test_concurrent_duplicates(self):
+        barrier = threading.Barrier(3)
+        responses = []
+
+        def checkout():
+            try:
+                client = APIClient()
+                client.force_authenticate(self.customer)
+                barrier.wait()
+                responses.append(client.post('/api/orders/', {
+                    'items': [{'product': str(self.product.id), 'quantity': 1}],
+                    'shipping_address': '1 rue de la Paix',
+                    'shipping_city': 'Paris',
+                    'shipping_postal_code': '75002',
+                    'shipping_country': 'France',
+                }, format='json', HTTP_IDEMPOTENCY_KEY='cle-1'))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=checkout) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([response.status_code for response in responses], [201] * 3)
+        self.assertEqual(sum('Idempotent-Replayed' in response for response in responses), 2)
+        self.assertEqual(len({response.data['id'] for response in responses}), 1)
+        self.product.refresh_from_db()
+        self.assertEqual((Order.objects.count(), self.product.stock), (1, 9))
+
+
+class ProductCounterSaveTests(TestCase):
+    """Full product saves never overwrite the reservation counter."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='client', email='client@example.com', password='x')
+        cls.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='x', is_staff=True,
+        )
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        cls.product = Product.objects.create(
+            name='Chaise', slug='chaise', price=Decimal('10.00'), stock=10, category=category,
+        )
+
+    def test_patch_keeps_active_reservation(self):
+        reserve_stock(self.customer, [(self.product.id, 3)])
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.patch('/api/products/chaise/', {'price': '12.00'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.price, self.product.reserved), (Decimal('12.00'), 3))
+
+    def test_stale_instance_keeps_reservation(self):
+        # Loaded before the reservation, saved after it
+        stale = Product.objects.get(pk=self.product.pk)
+        reserve_stock(self.customer, [(self.product.id, 3)])
+
+        stale.soft_delete()
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.is_active, self.product.reserved), (False, 3))
+
+
+class StockReservationTests(TestCase):
+    """Holds are all or nothing, converted at checkout, released on expiry."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='client', email='client@example.com', password='x')
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        cls.chair = Product.objects.create(
+            name='Chaise', slug='chaise', price=Decimal('10.00'), stock=5, category=category,
+        )
+        cls.table = Product.objects.create(
+            name='Table', slug='table', price=Decimal('90.00'), stock=1, category=category,
+        )
+
+    def counters(self, product):
+        product.refresh_from_db()
+        return product.stock, product.reserved
+
+    def checkout(self, token):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        return client.post('/api/orders/', {
+            'reservation': str(token),
+            'shipping_address': '1 rue de la Paix',
+            'shipping_city': 'Paris',
+            'shipping_postal_code': '75002',
+            'shipping_country': 'France',
+        }, format='json')
+
+    def test_reserve(self):
+        token, expires_at, quantities = reserve_stock(
+            self.customer, [(self.chair.id, 2), (self.table.id, 1), (self.chair.id, 1)]
+        )
+
+        self.assertEqual(quantities, {self.chair.id: 3, self.table.id: 1})
+        self.assertEqual(self.counters(self.chair), (5, 3))
+        self.assertEqual(self.counters(self.table), (1, 1))
+        self.assertEqual(StockReservation.objects.filter(token=token).count(), 2)
+
+    def test_partial_failure_holds_nothing(self):
+        with self.assertRaises(ValidationError):
+            reserve_stock(self.customer, [(self.chair.id, 2), (self.table.id, 2)])
+
+        self.assertEqual(self.counters(self.chair), (5, 0))
+        self.assertEqual(self.counters(self.table), (1, 0))
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_checkout_with_token(self):
+        token, expires_at, quantities = reserve_stock(self.customer, [(self.chair.id, 2)])
+
+        response = self.checkout(token)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counters(self.chair), (3, 0))
+        self.assertFalse(StockReservation.objects.exists())
+        order = Order.objects.get(user=self.customer)
+        self.assertEqual(order.total_amount, Decimal('20.00'))
+
+    def test_expired_token_is_rejected(self):
+        token, expires_at, quantities = reserve_stock(self.customer, [(self.chair.id, 2)])
+        StockReservation.objects.update(expires_at=django_timezone.now() - timedelta(seconds=1))
+
+        response = self.checkout(token)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('reservation', response.data)
+        self.assertEqual(self.counters(self.chair), (5, 2))
+        self.assertFalse(Order.objects.exists())
+
+    def test_release_expired(self):
+        expired, expires_at, quantities = reserve_stock(self.customer, [(self.chair.id, 2), (self.table.id, 1)])
+        StockReservation.objects.update(expires_at=django_timezone.now() - timedelta(seconds=1))
+        active, expires_at, quantities = reserve_stock(self.customer, [(self.chair.id, 1)])
+
+        self.assertEqual(release_expired_reservations(batch_size=1), 2)
+
+        self.assertEqual(self.counters(self.chair), (5, 1))
+        self.assertEqual(self.counters(self.table), (1, 0))
+        self.assertEqual(list(StockReservation.objects.values_list('token', flat=True)), [active])
+
+
+class ShardedCheckoutTests(TestCase):
+    """Flash-sale checkouts take from the shards and cancels give back."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='client', email='client@example.com', password='x')
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        product = Product.objects.create(
+            name='Chaise', slug='chaise', price=Decimal('10.00'), stock=10, category=category,
+        )
+        cls.product = set_stock_shards(product, 4)
+
+    def shards(self):
+        return list(self.product.stock_shards.order_by('index').values_list('stock', flat=True))
+
+    def checkout(self, quantity):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        return client.post('/api/orders/', {
+            'items': [{'product': str(self.product.id), 'quantity': quantity}],
+            'shipping_address': '1 rue de la Paix',
+            'shipping_city': 'Paris',
+            'shipping_postal_code': '75002',
+            'shipping_country': 'France',
+        }, format='json')
+
+    def test_one_shard_per_small_checkout(self):
+        self.assertEqual(self.shards(), [3, 3, 2, 2])
+
+        self.assertEqual(self.checkout(2).status_code, 201)
+
+        shards = self.shards()
+        self.assertEqual(sum(shards), 8)
+        self.assertEqual(sum(before != after for before, after in zip([3, 3, 2, 2], shards)), 1)
+        # Stock is a snapshot refreshed by the rebalancing job
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
+    def test_checkout_larger_than_any_shard_drains_several(self):
+        response = self.checkout(7)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.shards(), [0, 0, 1, 2])
+
+    def test_insufficient_total_fails_cleanly(self):
+        response = self.checkout(11)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Disponible : 10', str(response.data))
+        self.assertEqual(self.shards(), [3, 3, 2, 2])
+        self.assertFalse(Order.objects.exists())
+
+    def test_cancel_gives_back_to_a_shard(self):
+        self.checkout(7)
+        order = Order.objects.get(user=self.customer)
+
+        self.assertTrue(order.cancel())
+
+        changes = [after - before for before, after in zip([0, 0, 1, 2], self.shards()) if after != before]
+        self.assertEqual(changes, [7])
+
+
+@skipUnless(connection.vendor == 'postgresql', "Row locks are PostgreSQL only")
+class ShardLockTests(TransactionTestCase):
+    """Shard maintenance and flash-sale checkouts or cancels never deadlock or lose stock."""
+
+    def setUp(self):
+        self.customer = User.objects.create_user(username='client', email='client@example.com', password='x')
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        product = Product.objects.create(name='Chaise', slug='chaise', price=Decimal('10'), stock=10, category=category)
+        self.product = set_stock_shards(product, 2)
+
+    def in_thread(self, target):
+        errors = []
+
+        def run():
+            try:
+                target()
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread, errors
+
+    def checkout(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        return client.post('/api/orders/', {
+            'items': [{'product': str(self.product.id), 'quantity': 1}],
+            'shipping_address': '1 rue de la Paix',
+            'shipping_city': 'Paris',
+            'shipping_postal_code': '75002',
+            'shipping_country': 'France',
+        }, format='json')
+
+    def shards_total(self):
+        return sum(self.product.stock_shards.values_list('stock', flat=True))
+
+    def test_rebalance_during_checkout(self):
+        taken = threading.Event()
+        statuses = []
+
+        def slow_take(product, quantity):
+            # The shard is locked: let the rebalancing lock the product, then
+            # insert the order items (FOR KEY SHARE on the product)
+            result = take_sharded_stock(product, quantity)
+            taken.set()
+            time.sleep(0.5)
+            return result
+
+        def checkout():
+            with mock.patch('orders.serializers.order.take_sharded_stock', slow_take):
+                statuses.append(self.checkout().status_code)
+
+        checkout_thread, checkout_errors = self.in_thread(checkout)
+        taken.wait(5)
+        rebalance_thread, rebalance_errors = self.in_thread(rebalance_stock_shards)
+        checkout_thread.join()
+        rebalance_thread.join()
+
+        self.assertEqual((checkout_errors, rebalance_errors, statuses), ([], [], [201]))
+        self.product.refresh_from_db()
+        self.assertEqual((self.shards_total(), self.product.stock), (9, 9))
+
+    def test_cancel_during_unshard(self):
+        self.assertEqual(self.checkout().status_code, 201)
+        order = Order.objects.get(user=self.customer)
+        unsharding = threading.Event()
+
+        def unshard():
+            with transaction.atomic():
+                set_stock_shards(self.product, 0)
+                unsharding.set()
+                time.sleep(0.5)
+
+        unshard_thread, unshard_errors = self.in_thread(unshard)
+        unsharding.wait(5)
+        cancel_thread, cancel_errors = self.in_thread(order.cancel)
+        unshard_thread.join()
+        cancel_thread.join()
+
+        self.assertEqual((unshard_errors, cancel_errors), ([], []))
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.stock_shard_count), (10, 0))
@@ -6,11 +6,15 @@ from .views import (
     OrderConfirmView,
     OrderShipView,
     OrderDeliverView,
+    StockReservationCreateView,
+    StockReservationDetailView,
 )
 
 urlpatterns = [
     # Orders
     path('', OrderListCreateView.as_view(), name='order-list-create'),
+    path('reservations/', StockReservationCreateView.as_view(), name='reservation-create'),
+    path('reservations/<uuid:token>/', StockReservationDetailView.as_view(), name='reservation-detail'),
     path('<uuid:pk>/', OrderRetrieveView.as_view(), name='order-detail'),
     
     # Actions
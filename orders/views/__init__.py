@@ -5,6 +5,7 @@ from .order_actions import (
     OrderShipView,
     OrderDeliverView,
 )
+from .reservation import StockReservationCreateView, StockReservationDetailView
 
 __all__ = [
     'OrderListCreateView',
@@ -13,5 +14,7 @@ __all__ = [
     'OrderConfirmView',
     'OrderShipView',
     'OrderDeliverView',
+    'StockReservationCreateView',
+    'StockReservationDetailView',
 ]
 
@@ -1,36 +1,51 @@
+from django.db.models import Count, Max
 from rest_framework.generics import ListCreateAPIView, RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
+from core.utils.conditional import ConditionalGetMixin, latest
+from core.utils.fast_serializers import FastListMixin
+from core.utils.idempotency import idempotent
+from core.utils.sparse_fields import SparseFieldsetQueryMixin
 from ..models import Order
 from ..serializers import (
     OrderCreateSerializer,
     OrderSerializer,
     OrderListSerializer,
+    OrderListFastSerializer,
 )
 
 
-class OrderListCreateView(ListCreateAPIView):
+class OrderListCreateView(FastListMixin, ListCreateAPIView):
     """
-    GET: List orders (user sees their orders, admin sees all)
-    POST: Create order (authenticated users)
+    GET: List orders (user sees their orders, admin sees all),
+         ?fields= / ?omit= to choose the fields, rendered from .values() rows
+    POST: Create order (authenticated users), Idempotency-Key supported
     """
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['status']
     ordering_fields = ['created_at', 'total_amount']
     ordering = ['-created_at']
+    fast_serializer_class = OrderListFastSerializer
     
     def get_queryset(self):
         """Filter orders based on user role."""
         user = self.request.user
         
-        if user.is_staff or user.is_admin:
-            # Admin sees all orders
-            return Order.objects.select_related('user').prefetch_related('items').all()
+        # Address and notes are never listed
+        queryset = Order.objects.defer('shipping_address', 'notes')
         
-        # Regular users see only their orders
-        return Order.objects.filter(user=user).prefetch_related('items')
+        # Admin sees all orders, regular users only theirs
+        if not (user.is_staff or user.is_admin):
+            queryset = queryset.filter(user=user)
+        
+        return queryset
+    
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        """Retries with the same Idempotency-Key get the first response."""
+        return super().post(request, *args, **kwargs)
     
     def get_serializer_class(self):
         """Use different serializers for list vs create."""
@@ -39,21 +54,41 @@ class OrderListCreateView(ListCreateAPIView):
         return OrderListSerializer
 
 
-class OrderRetrieveView(RetrieveAPIView):
+class OrderRetrieveView(ConditionalGetMixin, SparseFieldsetQueryMixin, RetrieveAPIView):
     """
     GET: Retrieve order detail (owner or admin only)
+    ETag / Last-Modified, 304 if unchanged.
+    ?fields= / ?omit= to choose the fields.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = OrderSerializer
+    sparse_select = {'user_email': ['user']}
+    sparse_prefetch = {'items': ['items']}
+    sparse_defer = {
+        'shipping_address': ['shipping_address'],
+        'notes': ['notes'],
+    }
     
     def get_queryset(self):
         """Filter orders based on user role."""
         user = self.request.user
+        queryset = Order.objects.all()
         
-        if user.is_staff or user.is_admin:
-            # Admin sees all orders
-            return Order.objects.select_related('user').prefetch_related('items__product').all()
+        # Admin sees all orders, regular users only theirs
+        if not (user.is_staff or user.is_admin):
+            queryset = queryset.filter(user=user)
         
-        # Regular users see only their orders
-        return Order.objects.filter(user=user).prefetch_related('items__product')
-
+        return self.apply_sparse_fieldset(queryset)
+    
+    def get_validators(self):
+        """Latest update across the order and its items."""
+        row = self.get_queryset().filter(pk=self.kwargs['pk']).order_by().aggregate(
+            order_updated=Max('updated_at'),
+            items_updated=Max('items__updated_at'),
+            item_count=Count('items'),
+        )
+        if row['order_updated'] is None:
+            return None
+        
+        last_modified = latest(row['order_updated'], row['items_updated'])
+        return (self.kwargs['pk'], last_modified.isoformat(), row['item_count']), last_modified
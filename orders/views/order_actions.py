@@ -3,6 +3,7 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from core.utils.idempotency import idempotent
 from ..models import Order
 from ..serializers import OrderSerializer
 
@@ -18,11 +19,14 @@ class IsOwnerOrAdmin(IsAuthenticated):
 class OrderCancelView(GenericAPIView):
     """
     POST: Cancel order (owner or admin only)
-    Restores product stock.
+    Restores product stock. An already cancelled order is a 400, like any
+    status that cannot be cancelled: of two concurrent cancellations, only
+    one succeeds. Retry with the same Idempotency-Key to replay the answer.
     """
     permission_classes = [IsOwnerOrAdmin]
     serializer_class = OrderSerializer
     
+    @idempotent
     def post(self, request, pk):
         """Cancel order."""
         # Get order
@@ -31,9 +35,10 @@ class OrderCancelView(GenericAPIView):
         # Check permissions
         self.check_object_permissions(request, order)
         
-        # Try to cancel
+        # Try to cancel (False: cancelled meanwhile, by another request)
         try:
-            order.cancel()
+            if not order.cancel():
+                raise ValueError(f"Cannot cancel order with status {order.status}")
         except ValueError as e:
             return Response(
                 {'error': str(e)},
@@ -52,6 +57,7 @@ class OrderConfirmView(GenericAPIView):
     permission_classes = [IsAdminUser]
     serializer_class = OrderSerializer
     
+    @idempotent
     def post(self, request, pk):
         """Confirm order."""
         order = get_object_or_404(Order, pk=pk)
@@ -75,6 +81,7 @@ class OrderShipView(GenericAPIView):
     permission_classes = [IsAdminUser]
     serializer_class = OrderSerializer
     
+    @idempotent
     def post(self, request, pk):
         """Ship order."""
         order = get_object_or_404(Order, pk=pk)
@@ -98,6 +105,7 @@ class OrderDeliverView(GenericAPIView):
     permission_classes = [IsAdminUser]
     serializer_class = OrderSerializer
     
+    @idempotent
     def post(self, request, pk):
         """Deliver order."""
         order = get_object_or_404(Order, pk=pk)
@@ -0,0 +1,71 @@
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from django.http import Http404
+from core.utils.idempotency import idempotent
+from ..models import StockReservation
+from ..serializers import StockReservationCreateSerializer, StockReservationSerializer
+from ..services import release_reservation, reserve_stock
+
+
+class StockReservationCreateView(GenericAPIView):
+    """
+    POST: Hold stock for a cart (authenticated users), Idempotency-Key supported
+    Returns a token to send as `reservation` at checkout, valid until
+    `expires_at` (STOCK_RESERVATION_TTL).
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = StockReservationCreateSerializer
+    
+    @idempotent
+    def post(self, request):
+        """Reserve stock, all items or none."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        token, expires_at, quantities = reserve_stock(
+            request.user,
+            [(item['product_id'], item['quantity']) for item in serializer.validated_data['items']],
+        )
+        
+        data = StockReservationSerializer({
+            'token': token,
+            'expires_at': expires_at,
+            'items': [
+                {'product_id': product_id, 'quantity': quantity}
+                for product_id, quantity in quantities.items()
+            ],
+        }).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class StockReservationDetailView(GenericAPIView):
+    """
+    GET: Reservation detail (owner only)
+    DELETE: Release the reserved stock (cart emptied or abandoned)
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = StockReservationSerializer
+    
+    def get(self, request, token):
+        """Retrieve reservation."""
+        rows = list(
+            StockReservation.objects.filter(token=token, user=request.user)
+            .order_by('created_at').values('product_id', 'quantity', 'expires_at')
+        )
+        if not rows:
+            raise Http404
+        
+        serializer = self.get_serializer({
+            'token': token,
+            'expires_at': rows[0]['expires_at'],
+            'items': rows,
+        })
+        return Response(serializer.data)
+    
+    def delete(self, request, token):
+        """Release reservation."""
+        if not release_reservation(request.user, token):
+            raise Http404
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -5,10 +5,11 @@ from .models import Category, Product, ProductImage
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'parent', 'get_product_count', 'is_active', 'created_at']
+    list_select_related = ['parent']
     list_filter = ['is_active', 'parent', 'created_at']
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ['id', 'created_at', 'updated_at']
+    readonly_fields = ['id', 'path', 'depth', 'created_at', 'updated_at']
     
     def get_product_count(self, obj):
         return obj.products.count()
@@ -27,7 +28,7 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = ['is_active', 'category', 'created_at']
     search_fields = ['name', 'description', 'sku']
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ['id', 'created_at', 'updated_at']
+    readonly_fields = ['id', 'stock_shard_count', 'created_at', 'updated_at']
     inlines = [ProductImageInline]
     
     fieldsets = (
@@ -35,7 +36,7 @@ class ProductAdmin(admin.ModelAdmin):
             'fields': ('name', 'slug', 'category', 'description')
         }),
         ('Pricing & Stock', {
-            'fields': ('price', 'stock', 'sku')
+            'fields': ('price', 'stock', 'stock_shard_count', 'sku')
         }),
         ('Status', {
             'fields': ('is_active',)
@@ -45,6 +46,12 @@ class ProductAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def get_readonly_fields(self, request, obj=None):
+        # The stock of a sharded product is changed with the stock_shards command
+        if obj is not None and obj.is_sharded:
+            return [*self.readonly_fields, 'stock']
+        return self.readonly_fields
 
 
 @admin.register(ProductImage)
@@ -0,0 +1,79 @@
+"""
+Product list filters, shared by every endpoint that takes the list params
+(list, facets, export...).
+"""
+import uuid
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import models
+from rest_framework.exceptions import ValidationError
+from products.models import Category
+from products.services import in_stock_condition
+
+
+def get_search_term(params):
+    """Normalized `search` param ('' when absent)."""
+    return params.get('search', '').strip()
+
+
+def filter_products(queryset, params):
+    """
+    Apply the product list filters found in `params` (query params).
+    
+    Supported: category, category_slug, min_price, max_price, in_stock, search
+    """
+    # Filter by category, including all its subcategories
+    # (root path lookup, then category_id IN (subtree) on the path and
+    # (category, is_active) indexes)
+    category = params.get('category')
+    if category:
+        try:
+            category_id = uuid.UUID(category)
+        except ValueError:
+            raise ValidationError({'category': 'Must be a valid category UUID.'})
+        queryset = queryset.filter(
+            category__in=Category.objects.subtree_of(pk=category_id).values('pk')
+        )
+    
+    category_slug = params.get('category_slug')
+    if category_slug:
+        queryset = queryset.filter(
+            category__in=Category.objects.subtree_of(slug=category_slug).values('pk')
+        )
+    
+    # Filter by price range
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    
+    if min_price:
+        queryset = queryset.filter(price__gte=min_price)
+    if max_price:
+        queryset = queryset.filter(price__lte=max_price)
+    
+    # Filter by stock availability (stock not held by reservations)
+    in_stock = params.get('in_stock')
+    if in_stock and in_stock.lower() == 'true':
+        queryset = queryset.filter(in_stock_condition())
+    
+    # Search: full-text on the weighted search_vector (GIN index),
+    # plus an exact SKU match served by the unique index on sku
+    search = get_search_term(params)
+    if search:
+        query = SearchQuery(search, config='french', search_type='websearch')
+        queryset = queryset.filter(
+            models.Q(search_vector=query) | models.Q(sku=search)
+        )
+    
+    return queryset
+
+
+def rank_search_results(queryset, search):
+    """Order search results: exact SKU match first, then by ts_rank."""
+    query = SearchQuery(search, config='french', search_type='websearch')
+    return queryset.annotate(
+        sku_match=models.Case(
+            models.When(sku=search, then=models.Value(1)),
+            default=models.Value(0),
+            output_field=models.IntegerField(),
+        ),
+        rank=SearchRank(models.F('search_vector'), query),
+    ).order_by('-sku_match', '-rank', '-created_at')
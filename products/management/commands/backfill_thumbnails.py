@@ -0,0 +1,46 @@
+"""
+Management command to backfill the denormalized Product.thumbnail column.
+Usage: python manage.py backfill_thumbnails
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.models import Product
+from products.services import backfill_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Recompute Product.thumbnail from the first active ProductImage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of products updated per statement (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            self.stdout.write(self.style.ERROR('Batch size must be a positive number'))
+            return
+
+        self.stdout.write('Backfilling thumbnails...')
+
+        updated = 0
+        last_pk = None
+        while True:
+            # Walk the table by primary key, one UPDATE per batch
+            batch = Product.objects.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+
+            with transaction.atomic():
+                updated += backfill_thumbnails(Product.objects.filter(pk__in=pks))
+            last_pk = pks[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} product thumbnails'))
@@ -0,0 +1,56 @@
+"""
+Management command to move existing product images to content-addressed
+storage, so identical files are stored once.
+Usage: python manage.py dedup_images [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+
+from products.models import ProductImage
+from products.services import dedup_image_file
+
+
+class Command(BaseCommand):
+    help = 'Deduplicate stored product images by content (SHA-256)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be deduplicated',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        storage = ProductImage._meta.get_field('image').storage
+
+        names = (
+            ProductImage.objects.exclude(image='')
+            .order_by('image').values_list('image', flat=True).distinct()
+        )
+
+        self.stdout.write('Hashing product images...')
+
+        missing = moved = 0
+        total_size = 0
+        targets = {}
+        for name in names.iterator():
+            try:
+                size = storage.size(name)
+                new_name = dedup_image_file(name, dry_run=dry_run)
+            except FileNotFoundError:
+                missing += 1
+                continue
+
+            total_size += size
+            targets[new_name] = size
+            if new_name != name:
+                moved += 1
+
+        freed = total_size - sum(targets.values())
+        prefix = '[dry run] ' if dry_run else ''
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{prefix}{missing} referenced files are missing from storage'))
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{moved} files moved to content-addressed names, '
+            f'{len(targets)} distinct files, {freed / 1024 / 1024:.1f} MB freed'
+        ))
@@ -0,0 +1,74 @@
+"""
+Management command to import a supplier catalog (CSV or JSONL), upserted by SKU.
+Usage: python manage.py import_products catalog.csv [--batch-size 1000] [--report errors.jsonl]
+"""
+import json
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from products.services import IMPORT_FORMATS, detect_format, import_products
+
+
+class Command(BaseCommand):
+    help = 'Import products from a CSV or JSONL file, upserting by SKU'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='File to import ("-" for stdin)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=IMPORT_FORMATS,
+            help='Input format (default: guessed from the file extension)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows upserted per statement (default: 1000)',
+        )
+        parser.add_argument(
+            '--report',
+            help='Write the per-row error report to this file (JSONL)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or detect_format(path)
+        if not file_format:
+            raise CommandError('Cannot guess the format, use --format csv|jsonl')
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size must be a positive number')
+
+        self.stdout.write(f'Importing products from {path} ({file_format})...')
+        started = time.monotonic()
+
+        if path == '-':
+            report = import_products(sys.stdin, file_format, options['batch_size'])
+        else:
+            try:
+                with open(path, encoding='utf-8-sig', newline='') as stream:
+                    report = import_products(stream, file_format, options['batch_size'])
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        elapsed = time.monotonic() - started
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as output:
+                for error in report['errors']:
+                    output.write(json.dumps(error) + '\n')
+
+        for error in report['errors'][:20]:
+            self.stdout.write(self.style.WARNING(
+                f"Line {error['line']} ({error['sku'] or 'no sku'}): {json.dumps(error['errors'])}"
+            ))
+        if len(report['errors']) > 20:
+            self.stdout.write(self.style.WARNING(f"... {len(report['errors']) - 20} more errors"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['processed']} rows in {elapsed:.1f}s: "
+            f"{report['created']} created, {report['updated']} updated, {report['failed']} failed"
+        ))
@@ -0,0 +1,46 @@
+"""
+Management command to even out the stock shards of sharded products and
+refresh their stock snapshot. Run it every minute (cron) during a sale, or
+as a long-running worker with --loop.
+Usage: python manage.py rebalance_stock_shards [--product <slug>] [--loop] [--interval 10]
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from products.models import Product
+from products.services import rebalance_stock_shards
+
+
+class Command(BaseCommand):
+    help = 'Rebalance the stock shards of sharded products (flash-sale mode)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product',
+            help='Only rebalance this product (slug)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, rebalancing every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=10,
+            help='Seconds between two runs with --loop (default: 10)',
+        )
+
+    def handle(self, *args, **options):
+        product_ids = None
+        if options['product']:
+            product_ids = list(Product.objects.filter(slug=options['product']).values_list('id', flat=True))
+            if not product_ids:
+                raise CommandError(f"Product not found: {options['product']}")
+
+        while True:
+            rebalanced = rebalance_stock_shards(product_ids)
+            self.stdout.write(self.style.SUCCESS(f'{rebalanced} sharded products rebalanced'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
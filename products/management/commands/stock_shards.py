@@ -0,0 +1,62 @@
+"""
+Management command to turn flash-sale mode (sharded stock) on or off for a
+product, resize its shards or add stock to them.
+Usage: python manage.py stock_shards <slug> [--shards 8] [--add 500]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from products.models import Product
+from products.services import (
+    MAX_STOCK_SHARDS,
+    get_sharded_stock,
+    rebalance_stock_shards,
+    restore_sharded_stock,
+    set_stock_shards,
+)
+
+
+class Command(BaseCommand):
+    help = 'Shard the stock of a product (flash-sale mode), or show its shards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug', help='Product slug')
+        parser.add_argument(
+            '--shards',
+            type=int,
+            help=f'Number of stock shards, 0 to turn sharding off (max {MAX_STOCK_SHARDS})',
+        )
+        parser.add_argument(
+            '--add',
+            type=int,
+            help='Quantity added to the stock of a sharded product',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            product = Product.objects.get(slug=options['slug'])
+        except Product.DoesNotExist:
+            raise CommandError(f"Product not found: {options['slug']}")
+
+        if options['shards'] is not None:
+            try:
+                product = set_stock_shards(product, options['shards'])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        if options['add'] is not None:
+            if not product.is_sharded:
+                raise CommandError('--add only applies to sharded products: edit the stock instead')
+            if options['add'] < 1:
+                raise CommandError('--add must be a positive quantity')
+            restore_sharded_stock({product.id: options['add']}, {product.id: product.stock_shard_count})
+            # Spread the new units and refresh the stock snapshot
+            rebalance_stock_shards([product.id])
+
+        if not product.is_sharded:
+            self.stdout.write(self.style.SUCCESS(f'{product.slug}: not sharded, stock {product.stock}'))
+            return
+        shards = list(product.stock_shards.order_by('index').values_list('stock', flat=True))
+        total = get_sharded_stock([product.id]).get(product.id, 0)
+        self.stdout.write(self.style.SUCCESS(
+            f'{product.slug}: {len(shards)} shards, stock {total} ({", ".join(map(str, shards))})'
+        ))
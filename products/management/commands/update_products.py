@@ -0,0 +1,76 @@
+"""
+Management command to apply bulk price / stock updates (CSV or JSONL).
+Usage: python manage.py update_products stock.csv [--chunk-size 1000] [--report errors.jsonl]
+
+Columns: sku or id, price, stock (absolute) or delta (relative).
+"""
+import json
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from products.services import IMPORT_FORMATS, detect_format, read_rows, update_products
+
+
+class Command(BaseCommand):
+    help = 'Apply bulk price / stock updates from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='File to apply ("-" for stdin)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=IMPORT_FORMATS,
+            help='Input format (default: guessed from the file extension)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of rows per UPDATE statement (default: 1000)',
+        )
+        parser.add_argument(
+            '--report',
+            help='Write the per-row error report to this file (JSONL)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or detect_format(path)
+        if not file_format:
+            raise CommandError('Cannot guess the format, use --format csv|jsonl')
+        if options['chunk_size'] < 1:
+            raise CommandError('Chunk size must be a positive number')
+
+        self.stdout.write(f'Applying updates from {path} ({file_format})...')
+        started = time.monotonic()
+
+        if path == '-':
+            report = update_products(read_rows(sys.stdin, file_format), options['chunk_size'])
+        else:
+            try:
+                with open(path, encoding='utf-8-sig', newline='') as stream:
+                    report = update_products(read_rows(stream, file_format), options['chunk_size'])
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        elapsed = time.monotonic() - started
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as output:
+                for error in report['errors']:
+                    output.write(json.dumps(error) + '\n')
+
+        for error in report['errors'][:20]:
+            self.stdout.write(self.style.WARNING(
+                f"Line {error['line']} ({error['key'] or 'no key'}): {json.dumps(error['errors'])}"
+            ))
+        if len(report['errors']) > 20:
+            self.stdout.write(self.style.WARNING(f"... {len(report['errors']) - 20} more errors"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['processed']} rows in {elapsed:.1f}s: "
+            f"{report['updated']} products updated, {report['failed']} failed"
+        ))
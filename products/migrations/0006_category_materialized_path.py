@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:31
+
+from django.db import migrations, models
+
+
+def build_paths(apps, schema_editor):
+    """Compute path, depth and name_path for existing categories (top-down)."""
+    Category = apps.get_model('products', 'Category')
+    categories = list(Category.objects.all())
+    children = {}
+    for category in categories:
+        children.setdefault(category.parent_id, []).append(category)
+
+    stack = [(category, '', -1, '') for category in children.get(None, [])]
+    while stack:
+        category, parent_path, parent_depth, parent_name_path = stack.pop()
+        category.path = f"{parent_path}{category.pk.hex}/"
+        category.depth = parent_depth + 1
+        category.name_path = (
+            f"{parent_name_path} > {category.name}" if parent_name_path else category.name
+        )
+        stack.extend(
+            (child, category.path, category.depth, category.name_path)
+            for child in children.get(category.pk, [])
+        )
+
+    Category.objects.bulk_update(categories, ['path', 'depth', 'name_path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Depth in the hierarchy (0 = root)'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='name_path',
+            field=models.TextField(blank=True, editable=False, help_text='Full breadcrumb: Electronics > Laptops'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, editable=False, help_text='Materialized path of ancestor ids', max_length=512),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
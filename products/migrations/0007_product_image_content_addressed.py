@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:44
+
+import core.utils.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_category_materialized_path'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productimage',
+            name='image',
+            field=models.ImageField(help_text='Product image', storage=core.utils.storage.ContentAddressedStorage(), upload_to='products/'),
+        ),
+        migrations.AddIndex(
+            model_name='productimage',
+            index=models.Index(fields=['image'], name='products_pr_image_80bcdb_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_image_content_addressed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='reserved',
+            field=models.IntegerField(default=0, editable=False, help_text='Quantity held by active reservations'),
+        ),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.CheckConstraint(check=models.Q(('reserved__gte', 0)), name='product_reserved_non_negative'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:30
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_stock_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTombstone',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier (UUID)', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated')),
+                ('is_active', models.BooleanField(default=True, help_text='Soft delete flag - False means deleted')),
+                ('product_id', models.UUIDField(help_text='Id of the deleted product')),
+                ('sku', models.CharField(blank=True, help_text='SKU of the deleted product', max_length=50, null=True)),
+                ('slug', models.SlugField(help_text='Slug of the deleted product', max_length=220)),
+            ],
+            options={
+                'verbose_name': 'Product Tombstone',
+                'verbose_name_plural': 'Product Tombstones',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['updated_at', 'product_id'], name='product_tombstone_feed_idx')],
+            },
+        ),
+    ]
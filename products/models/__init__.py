@@ -1,6 +1,8 @@
 from .category import Category
 from .product import Product
 from .product_image import ProductImage
+from .product_tombstone import ProductTombstone
+from .stock_shard import StockShard
 
-__all__ = ['Category', 'Product', 'ProductImage']
+__all__ = ['Category', 'Product', 'ProductImage', 'ProductTombstone', 'StockShard']
 
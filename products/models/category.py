@@ -1,8 +1,31 @@
-from django.db import models
+import uuid
+from django.db import models, transaction
+from django.db.models.functions import Concat, Substr
+from django.contrib.postgres.indexes import GinIndex
+from django.utils import timezone
 from django.utils.text import slugify
 from core.models import AuditedModel
 
 
+class CategoryQuerySet(models.QuerySet):
+    
+    def subtree_of(self, **lookup):
+        """
+        Categories in the subtree of the category matching `lookup`
+        (itself included), through the materialized path.
+        
+        The root path is fetched first: a literal prefix lets PostgreSQL use
+        the `varchar_pattern_ops` index (a LIKE pattern built from a
+        subquery cannot).
+        
+        Example: Category.objects.subtree_of(slug='electronique')
+        """
+        root_path = self.model.objects.filter(**lookup).order_by().values_list('path', flat=True).first()
+        if root_path is None:
+            return self.none()
+        return self.filter(path__startswith=root_path)
+
+
 class Category(AuditedModel):
     """
     Product categories with hierarchical support.
@@ -52,6 +75,29 @@ class Category(AuditedModel):
         help_text="Category thumbnail"
     )
     
+    # Materialized path: "<root id>/<child id>/.../<own id>/" (hex UUIDs).
+    # Maintained on save, see `_update_path()`.
+    path = models.CharField(
+        max_length=512,
+        blank=True,
+        editable=False,
+        help_text="Materialized path of ancestor ids"
+    )
+    
+    depth = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Depth in the hierarchy (0 = root)"
+    )
+    
+    name_path = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="Full breadcrumb: Electronics > Laptops"
+    )
+    
+    objects = CategoryQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Category'
         verbose_name_plural = 'Categories'
@@ -59,27 +105,102 @@ class Category(AuditedModel):
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['parent']),
+            # Prefix (LIKE 'path%') lookups for subtree queries
+            models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
+            GinIndex(fields=['name'], name='category_name_trgm_idx', opclasses=['gin_trgm_ops']),
         ]
     
     def __str__(self):
-        if self.parent:
-            return f"{self.parent.name} > {self.name}"
-        return self.name
+        return self.get_full_path()
     
     def save(self, *args, **kwargs):
-        """Auto-generate slug from name"""
+        """Auto-generate slug from name and maintain the materialized path"""
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'path', 'depth', 'name_path'}
+        
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = Category.objects.filter(pk=self.pk).values(
+                    'path', 'depth', 'name_path', 'slug'
+                ).first()
+            
+            self._update_path()
+            super().save(*args, **kwargs)
+            
+            if previous and previous['slug'] != self.slug:
+                # Products carry the category slug in the changes feed
+                self.products.update(updated_at=timezone.now())
+            
+            if previous and previous['path'] and (
+                previous['path'] != self.path or previous['name_path'] != self.name_path
+            ):
+                self._move_descendants(previous)
     
-    def get_full_path(self):
-        """Get full category path: Electronics > Laptops > Gaming"""
-        path = [self.name]
-        parent = self.parent
+    def _update_path(self):
+        """Compute path, depth and breadcrumb from the parent row."""
+        segment = f"{self.pk.hex}/"
         
-        while parent:
-            path.insert(0, parent.name)
-            parent = parent.parent
+        if self.parent_id is None:
+            self.path = segment
+            self.depth = 0
+            self.name_path = self.name
+            return
         
-        return ' > '.join(path)
-
+        # Locked until commit: a concurrent move of the parent cannot leave
+        # this row with the old prefix (see `_move_descendants()`)
+        parent = Category.objects.select_for_update().values('path', 'depth', 'name_path').get(pk=self.parent_id)
+        if self.parent_id == self.pk or segment in parent['path']:
+            raise ValueError("A category cannot be moved under itself or one of its descendants")
+        
+        self.path = parent['path'] + segment
+        self.depth = parent['depth'] + 1
+        self.name_path = f"{parent['name_path']} > {self.name}"
+    
+    def _move_descendants(self, previous):
+        """
+        Rewrite the path prefix of the whole subtree in one UPDATE.
+        
+        The subtree is locked first: children being inserted lock their
+        parent, so this waits for them to commit, and the UPDATE (a new
+        statement, a new snapshot) then rewrites them too.
+        """
+        subtree = Category.objects.filter(path__startswith=previous['path']).exclude(pk=self.pk)
+        list(subtree.select_for_update().order_by('path').values_list('pk', flat=True))
+        subtree.update(
+            path=Concat(
+                models.Value(self.path),
+                Substr('path', len(previous['path']) + 1),
+                output_field=models.CharField(),
+            ),
+            name_path=Concat(
+                models.Value(self.name_path),
+                Substr('name_path', len(previous['name_path']) + 1),
+                output_field=models.TextField(),
+            ),
+            depth=models.F('depth') + (self.depth - previous['depth']),
+            updated_at=timezone.now(),
+        )
+    
+    def get_full_path(self):
+        """Get full category path: Electronics > Laptops > Gaming"""
+        return self.name_path or self.name
+    
+    def get_ancestor_ids(self):
+        """Ancestor ids from root to direct parent (no query)."""
+        return [uuid.UUID(segment) for segment in self.path.split('/')[:-2]]
+    
+    def get_ancestors(self):
+        """Ancestors from root to direct parent, in a single query."""
+        return Category.objects.filter(pk__in=self.get_ancestor_ids()).order_by('depth')
+    
+    def get_descendants(self, include_self=False):
+        """Whole subtree in a single indexed prefix query."""
+        descendants = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            descendants = descendants.exclude(pk=self.pk)
+        return descendants
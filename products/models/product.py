@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator
 from decimal import Decimal
@@ -40,6 +42,23 @@ class Product(AuditedModel):
         help_text="Available quantity"
     )
     
+    # Sum of the active stock reservations (carts at checkout), maintained
+    # by orders/services/reservations.py. Sellable stock is stock - reserved.
+    reserved = models.IntegerField(
+        default=0,
+        editable=False,
+        help_text="Quantity held by active reservations"
+    )
+    
+    # Flash-sale mode: with N > 0 shards, the sellable stock lives in N
+    # StockShard rows and `stock` is a snapshot of their total, see
+    # products/services/stock_shards.py. 0 = plain stock.
+    stock_shard_count = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of stock shards (0 = not sharded)"
+    )
+    
     # Category
     category = models.ForeignKey(
         'Category',
@@ -57,6 +76,23 @@ class Product(AuditedModel):
         help_text="Unique product identifier"
     )
     
+    # Denormalized path of the first active image (list views thumbnail).
+    # Maintained by the ProductImage signals, see products/signals.py.
+    thumbnail = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text="Path of the primary image"
+    )
+    
+    # Full-text search document (name > sku > description, 'french' config).
+    # Maintained by a database trigger, see migration 0003.
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text="Weighted full-text search vector"
+    )
+    
     class Meta:
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
@@ -64,23 +100,71 @@ class Product(AuditedModel):
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['category', 'is_active']),
-            models.Index(fields=['price']),
-            models.Index(fields=['stock']),
+            # Keyset pagination: (ordering field, id) for every sortable field
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['updated_at', 'id']),
+            models.Index(fields=['price', 'id']),
+            models.Index(fields=['name', 'id']),
+            models.Index(fields=['stock', 'id']),
+            GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+            GinIndex(fields=['name'], name='product_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
+        constraints = [
+            models.CheckConstraint(check=models.Q(reserved__gte=0), name='product_reserved_non_negative'),
         ]
     
+    # Maintained by conditional UPDATEs only, see save()
+    COUNTER_FIELDS = ('reserved', 'stock_shard_count')
+    
+    # Absolute stock writes (API, bulk updates, imports) keep what carts hold
+    RESERVED_STOCK_ERROR = "Stock cannot be lower than the quantity held by reservations ({reserved})."
+    
     def __str__(self):
         return self.name
     
     def save(self, *args, **kwargs):
-        """Auto-generate slug from name"""
+        """
+        Auto-generate slug from name.
+        
+        Full saves of an existing product never write the counters
+        maintained by conditional UPDATEs (COUNTER_FIELDS): the in-memory
+        value may be stale and would erase concurrent changes.
+        """
         if not self.slug:
             self.slug = slugify(self.name)
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+                and field.attname not in deferred
+            ]
         super().save(*args, **kwargs)
     
+    @property
+    def sellable_stock(self):
+        """`stock`, or the sum of the shards of a sharded product (read once)"""
+        if not self.is_sharded:
+            return self.stock
+        if not hasattr(self, '_sharded_stock'):
+            self._sharded_stock = self.stock_shards.aggregate(total=models.Sum('stock'))['total'] or 0
+        return self._sharded_stock
+    
+    @property
+    def available(self):
+        """Stock that can still be sold (not held by a reservation)"""
+        return max(self.sellable_stock - self.reserved, 0)
+    
+    @property
+    def is_sharded(self):
+        """Stock kept in shards (flash-sale mode)"""
+        return self.stock_shard_count > 0
+    
     @property
     def is_in_stock(self):
         """Check if product is available"""
-        return self.stock > 0 and self.is_active
+        return self.available > 0 and self.is_active
     
     def reduce_stock(self, quantity):
         """Reduce stock (use in orders)"""
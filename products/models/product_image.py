@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from core.models import AuditedModel
+from core.utils.storage import ContentAddressedStorage
 
 
 class ProductImage(AuditedModel):
@@ -14,8 +15,11 @@ class ProductImage(AuditedModel):
         help_text="Related product"
     )
     
+    # Stored once per content (products/<h[:2]>/<sha256>.<ext>): several rows
+    # may share a file, see products/services/image_files.py
     image = models.ImageField(
-        upload_to='products/%Y/%m/',
+        upload_to='products/',
+        storage=ContentAddressedStorage(),
         help_text="Product image"
     )
     
@@ -36,6 +40,7 @@ class ProductImage(AuditedModel):
         ordering = ['order', 'created_at']
         indexes = [
             models.Index(fields=['product', 'order']),
+            models.Index(fields=['image']),  # Reference counting
         ]
     
     def __str__(self):
@@ -45,5 +50,8 @@ class ProductImage(AuditedModel):
         """Auto-generate alt_text from product name"""
         if not self.alt_text:
             self.alt_text = f"{self.product.name} - Image"
-        super().save(*args, **kwargs)
+        # File and row in one transaction: the storage lock on the file name
+        # lasts until the row referencing it is committed
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
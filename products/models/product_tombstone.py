@@ -0,0 +1,40 @@
+from django.db import models
+from core.models import AuditedModel
+
+
+class ProductTombstone(AuditedModel):
+    """
+    A hard-deleted product (admin, shell), kept for the changes feed.
+    
+    Soft-deleted products are tombstones on their own row; a deleted row
+    leaves this one behind, written by the Product post_delete signal.
+    `updated_at` is the deletion time.
+    """
+    
+    product_id = models.UUIDField(
+        help_text="Id of the deleted product"
+    )
+    
+    sku = models.CharField(
+        max_length=50,
+        blank=True,
+        null=True,
+        help_text="SKU of the deleted product"
+    )
+    
+    slug = models.SlugField(
+        max_length=220,
+        help_text="Slug of the deleted product"
+    )
+    
+    class Meta:
+        verbose_name = 'Product Tombstone'
+        verbose_name_plural = 'Product Tombstones'
+        ordering = ['-created_at']
+        indexes = [
+            # Changes feed, walked like products in (updated_at, id) order
+            models.Index(fields=['updated_at', 'product_id'], name='product_tombstone_feed_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.slug} (deleted)"
@@ -0,0 +1,39 @@
+from django.db import models
+from core.models import AuditedModel
+
+
+class StockShard(AuditedModel):
+    """
+    One counter of a sharded product's stock (flash-sale mode).
+    
+    A product with `stock_shard_count > 0` keeps its sellable stock in
+    these rows, see products/services/stock_shards.py.
+    """
+    
+    product = models.ForeignKey(
+        'Product',
+        on_delete=models.CASCADE,
+        related_name='stock_shards',
+        help_text="Sharded product"
+    )
+    
+    index = models.PositiveSmallIntegerField(
+        help_text="Shard number (0 to stock_shard_count - 1)"
+    )
+    
+    stock = models.IntegerField(
+        default=0,
+        help_text="Quantity held by this shard"
+    )
+    
+    class Meta:
+        verbose_name = 'Stock Shard'
+        verbose_name_plural = 'Stock Shards'
+        ordering = ['product', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'index'], name='unique_stock_shard'),
+            models.CheckConstraint(check=models.Q(stock__gte=0), name='stock_shard_non_negative'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} #{self.index}: {self.stock}"
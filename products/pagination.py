@@ -0,0 +1,12 @@
+from core.utils.pagination import KeysetPagination
+
+
+class ProductCursorPagination(KeysetPagination):
+    """
+    Keyset pagination for the product catalog (`?cursor=`).
+
+    Each ordering field is backed by a `(field, id)` index on Product.
+    """
+
+    ordering_fields = ('created_at', 'updated_at', 'price', 'name', 'stock')
+    default_ordering = '-created_at'
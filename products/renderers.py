@@ -0,0 +1,40 @@
+"""
+Renderers for the streaming export formats.
+
+Successful exports are streamed by the view itself; these renderers let DRF
+negotiate `?format=ndjson|csv` and render error payloads in that format.
+"""
+import csv
+import io
+import json
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, ensure_ascii=False) + '\n').encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        output = io.StringIO()
+        writer = csv.writer(output)
+        if isinstance(data, dict):
+            writer.writerow(data.keys())
+            writer.writerow(
+                json.dumps(value) if isinstance(value, (dict, list)) else value
+                for value in data.values()
+            )
+        return output.getvalue().encode(self.charset)
@@ -2,6 +2,7 @@ from .category import CategorySerializer, CategoryListSerializer
 from .product import (
     ProductSerializer,
     ProductListSerializer,
+    ProductListFastSerializer,
     ProductCreateUpdateSerializer,
     ProductImageSerializer,
 )
@@ -11,6 +12,7 @@ __all__ = [
     'CategoryListSerializer',
     'ProductSerializer',
     'ProductListSerializer',
+    'ProductListFastSerializer',
     'ProductCreateUpdateSerializer',
     'ProductImageSerializer',
 ]
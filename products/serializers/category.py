@@ -1,4 +1,4 @@
-from rest_framework.serializers import ModelSerializer, SerializerMethodField
+from rest_framework.serializers import ModelSerializer, SerializerMethodField, ValidationError
 from products.models import Category
 
 
@@ -31,6 +31,12 @@ class CategorySerializer(ModelSerializer):
     
     def get_full_path(self, obj):
         return obj.get_full_path()
+    
+    def validate_parent(self, value):
+        """Prevent cycles: a category cannot be moved under its own subtree"""
+        if value and self.instance and f"{self.instance.pk.hex}/" in value.path:
+            raise ValidationError("A category cannot be moved under itself or one of its descendants")
+        return value
 
 
 class CategoryListSerializer(ModelSerializer):
@@ -1,5 +1,16 @@
-from rest_framework.serializers import ModelSerializer, SerializerMethodField, ValidationError
+from django.db import transaction
+from rest_framework.serializers import IntegerField, ModelSerializer, SerializerMethodField, ValidationError
+from core.utils.fast_serializers import FastListSerializer, decimal_formatter, format_uuid
+from core.utils.sparse_fields import SparseFieldsetSerializerMixin
 from products.models import Product, ProductImage
+from products.services.stock_shards import SHARDED_STOCK_ERROR
+from products.services.image_variants import (
+    THUMBNAIL_SIZE,
+    variant_srcset,
+    variant_srcset_builder,
+    variant_url,
+    variant_url_builder,
+)
 from .category import CategoryListSerializer
 
 
@@ -8,19 +19,28 @@ class ProductImageSerializer(ModelSerializer):
     Product image serializer.
     """
     
+    srcset = SerializerMethodField()
+    
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'alt_text', 'order']
+        fields = ['id', 'image', 'srcset', 'alt_text', 'order']
         read_only_fields = ['id']
+    
+    def get_srcset(self, obj):
+        """Resized variants, for <img srcset>"""
+        if not obj.image:
+            return None
+        return variant_srcset(obj.image.name, self.context.get('request'))
 
 
-class ProductSerializer(ModelSerializer):
+class ProductSerializer(SparseFieldsetSerializerMixin, ModelSerializer):
     """
     Detailed product serializer with nested category and images.
     """
     
     category_detail = CategoryListSerializer(source='category', read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
+    available = IntegerField(read_only=True)
     is_in_stock = SerializerMethodField()
     
     class Meta:
@@ -32,6 +52,7 @@ class ProductSerializer(ModelSerializer):
             'description',
             'price',
             'stock',
+            'available',
             'category',
             'category_detail',
             'sku',
@@ -41,7 +62,7 @@ class ProductSerializer(ModelSerializer):
             'created_at',
             'updated_at',
         ]
-        read_only_fields = ['id', 'slug', 'created_at', 'updated_at', 'is_in_stock']
+        read_only_fields = ['id', 'slug', 'created_at', 'updated_at', 'available', 'is_in_stock']
     
     def get_is_in_stock(self, obj):
         return obj.is_in_stock
@@ -59,13 +80,14 @@ class ProductSerializer(ModelSerializer):
         return value
 
 
-class ProductListSerializer(ModelSerializer):
+class ProductListSerializer(SparseFieldsetSerializerMixin, ModelSerializer):
     """
     Lightweight product serializer for list views.
     """
     
     category_name = SerializerMethodField()
     thumbnail = SerializerMethodField()
+    thumbnail_srcset = SerializerMethodField()
     
     class Meta:
         model = Product
@@ -77,6 +99,7 @@ class ProductListSerializer(ModelSerializer):
             'stock',
             'category_name',
             'thumbnail',
+            'thumbnail_srcset',
             'is_active',
         ]
     
@@ -84,15 +107,47 @@ class ProductListSerializer(ModelSerializer):
         return obj.category.name
     
     def get_thumbnail(self, obj):
-        """Get first image"""
-        first_image = obj.images.filter(is_active=True).first()
-        if first_image:
+        """Resized first image (denormalized on Product, no query)"""
+        if obj.thumbnail:
+            request = self.context.get('request')
+            if request:
+                return variant_url(obj.thumbnail, *THUMBNAIL_SIZE, request=request)
+        return None
+    
+    def get_thumbnail_srcset(self, obj):
+        if obj.thumbnail:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(first_image.image.url)
+                return variant_srcset(obj.thumbnail, request)
         return None
 
 
+class ProductListFastSerializer(FastListSerializer):
+    """
+    Fast path for `ProductListSerializer`, from `.values()` rows.
+    """
+    
+    def get_fields(self):
+        price = Product._meta.get_field('price')
+        request = self.context.get('request')
+        thumbnail = srcset = None
+        if request:
+            thumbnail = variant_url_builder(*THUMBNAIL_SIZE, request=request)
+            srcset = variant_srcset_builder(request)
+        
+        return {
+            'id': ('id', format_uuid),
+            'name': ('name', None),
+            'slug': ('slug', None),
+            'price': ('price', decimal_formatter(price.max_digits, price.decimal_places)),
+            'stock': ('stock', None),
+            'category_name': ('category__name', None),
+            'thumbnail': ('thumbnail', lambda path: thumbnail(path) if path and thumbnail else None),
+            'thumbnail_srcset': ('thumbnail', lambda path: srcset(path) if path and srcset else None),
+            'is_active': ('is_active', None),
+        }
+
+
 class ProductCreateUpdateSerializer(ModelSerializer):
     """
     Serializer for creating/updating products.
@@ -109,4 +164,24 @@ class ProductCreateUpdateSerializer(ModelSerializer):
             'sku',
             'is_active',
         ]
+    
+    def validate_stock(self, value):
+        """Sharded stock (flash sale) lives in the shards, not in `stock`"""
+        if self.instance is not None and self.instance.is_sharded and value != self.instance.stock:
+            raise ValidationError(SHARDED_STOCK_ERROR)
+        return value
+    
+    def update(self, instance, validated_data):
+        """
+        The new stock may not drop below the reserved quantity, checked on
+        the locked row: a reservation cannot slip in before the write.
+        """
+        if 'stock' not in validated_data:
+            return super().update(instance, validated_data)
+        
+        with transaction.atomic():
+            reserved = Product.objects.select_for_update().values_list('reserved', flat=True).get(pk=instance.pk)
+            if validated_data['stock'] < reserved:
+                raise ValidationError({'stock': [Product.RESERVED_STOCK_ERROR.format(reserved=reserved)]})
+            return super().update(instance, validated_data)
 
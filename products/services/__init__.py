@@ -0,0 +1,54 @@
+from .bulk_update import update_products
+from .catalog import CATALOG_VERSION, STOCK_VERSION, invalidate_catalog, invalidate_stock
+from .changes import get_changes, parse_changes_cursor
+from .category_tree import CATEGORY_TREE_VERSION, build_category_tree, get_category_tree
+from .facets import DEFAULT_PRICE_BOUNDS, get_product_facets
+from .image_files import dedup_image_file, release_image_file, release_image_file_on_commit
+from .product_import import IMPORT_FORMATS, detect_format, import_products, read_rows
+from .stock_shards import (
+    MAX_STOCK_SHARDS,
+    SHARDED_STOCK_ERROR,
+    get_sharded_stock,
+    in_stock_condition,
+    prefetch_sharded_stock,
+    rebalance_stock_shards,
+    restore_sharded_stock,
+    set_stock_shards,
+    take_sharded_stock,
+)
+from .suggest import get_suggestions
+from .thumbnails import refresh_thumbnail, backfill_thumbnails
+
+__all__ = [
+    'update_products',
+    'CATALOG_VERSION',
+    'STOCK_VERSION',
+    'invalidate_catalog',
+    'invalidate_stock',
+    'get_changes',
+    'parse_changes_cursor',
+    'CATEGORY_TREE_VERSION',
+    'build_category_tree',
+    'get_category_tree',
+    'DEFAULT_PRICE_BOUNDS',
+    'get_product_facets',
+    'dedup_image_file',
+    'release_image_file',
+    'release_image_file_on_commit',
+    'IMPORT_FORMATS',
+    'detect_format',
+    'import_products',
+    'read_rows',
+    'MAX_STOCK_SHARDS',
+    'SHARDED_STOCK_ERROR',
+    'get_sharded_stock',
+    'in_stock_condition',
+    'prefetch_sharded_stock',
+    'rebalance_stock_shards',
+    'restore_sharded_stock',
+    'set_stock_shards',
+    'take_sharded_stock',
+    'get_suggestions',
+    'refresh_thumbnail',
+    'backfill_thumbnails',
+]
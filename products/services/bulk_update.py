@@ -0,0 +1,244 @@
+"""
+Bulk price / stock updates - One set-based UPDATE per chunk.
+
+Rows are `(sku | id, price?, stock?, delta?)`: `stock` sets an absolute
+value, `delta` adds to the current one. Deltas are computed by the database
+(`stock = stock + delta`) on the locked row, like an `F()` expression, so a
+concurrent checkout is never overwritten. A stock or delta that would leave
+less stock than reserved by carts leaves the row untouched, and so does a
+stock change on a sharded product (flash sale), whose stock lives in its
+shards.
+"""
+import uuid
+from decimal import Decimal, InvalidOperation
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from products.models import Product
+from .catalog import invalidate_catalog
+from .stock_shards import SHARDED_STOCK_ERROR
+
+MAX_PRICE = Decimal('100000000')  # max_digits=10, decimal_places=2
+
+
+def _text(row, field):
+    value = row.get(field)
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _integer(row, field, errors):
+    value = _text(row, field)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        errors[field] = ["A valid integer is required."]
+        return None
+
+
+def clean_update_row(row):
+    """Validate one row. Returns `(values, errors)`."""
+    if row is None:
+        return None, {'row': ["Invalid row"]}
+
+    values = {}
+    errors = {}
+
+    sku = _text(row, 'sku')
+    pk = _text(row, 'id')
+    if sku and pk:
+        errors['row'] = ["Provide either sku or id, not both."]
+    elif sku:
+        values['key'] = ('sku', sku)
+    elif pk:
+        try:
+            values['key'] = ('id', uuid.UUID(pk))
+        except ValueError:
+            errors['id'] = ["Must be a valid UUID."]
+    else:
+        errors['row'] = ["Either sku or id is required."]
+
+    values['price'] = None
+    price = _text(row, 'price')
+    if price:
+        try:
+            values['price'] = Decimal(price)
+            if not values['price'].is_finite():
+                raise InvalidOperation
+        except InvalidOperation:
+            errors['price'] = ["A valid number is required."]
+        else:
+            if values['price'] <= 0:
+                errors['price'] = ["Price must be positive"]
+            elif values['price'].as_tuple().exponent < -2:
+                errors['price'] = ["Ensure that there are no more than 2 decimal places."]
+            elif values['price'] >= MAX_PRICE:
+                errors['price'] = ["Ensure that there are no more than 10 digits in total."]
+
+    values['stock'] = _integer(row, 'stock', errors)
+    if values['stock'] is not None and values['stock'] < 0:
+        errors['stock'] = ["Stock cannot be negative"]
+
+    values['delta'] = _integer(row, 'delta', errors)
+    if values['stock'] is not None and values['delta'] is not None:
+        errors['delta'] = ["Provide either stock or delta, not both."]
+
+    if not errors and values['price'] is None and values['stock'] is None and values['delta'] is None:
+        errors['row'] = ["Nothing to update: provide price, stock or delta."]
+
+    return values, errors
+
+
+def _update_sql(key_column, count):
+    """`UPDATE ... FROM (VALUES ...)` for `count` rows keyed on `key_column`."""
+    quote = connection.ops.quote_name
+    table = quote(Product._meta.db_table)
+    key_type = Product._meta.get_field(key_column).db_type(connection)
+    price_type = Product._meta.get_field('price').db_type(connection)
+    stock_type = Product._meta.get_field('stock').db_type(connection)
+
+    row = (
+        f"(CAST(%s AS {key_type}), CAST(%s AS {price_type}), "
+        f"CAST(%s AS {stock_type}), CAST(%s AS {stock_type}))"
+    )
+    return f"""
+        WITH v (ref, price, stock, delta) AS (VALUES {', '.join([row] * count)})
+        UPDATE {table} AS p SET
+            price = COALESCE(v.price, p.price),
+            stock = CASE
+                WHEN v.stock IS NOT NULL THEN v.stock
+                WHEN v.delta IS NOT NULL THEN p.stock + v.delta
+                ELSE p.stock
+            END,
+            updated_at = %s
+        FROM v
+        WHERE p.{quote(key_column)} = v.ref
+          AND (v.stock IS NULL OR v.stock >= p.reserved)
+          AND (v.delta IS NULL OR p.stock + v.delta >= p.reserved)
+          AND (p.stock_shard_count = 0 OR (v.stock IS NULL AND v.delta IS NULL))
+        RETURNING {quote(key_column)}
+    """
+
+
+def _lock_targets(rows):
+    """
+    Lock the products of `rows` ordered by id, like checkouts do.
+
+    The UPDATE locks rows in whatever order the join produces them: against
+    a checkout holding some of the same products, that could deadlock.
+    """
+    keys = {'sku': [], 'id': []}
+    for line, values in rows:
+        column, key = values['key']
+        keys[column].append(key)
+    list(
+        Product.objects.select_for_update()
+        .filter(Q(sku__in=keys['sku']) | Q(id__in=keys['id']))
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def update_chunk(rows):
+    """
+    Apply a chunk of cleaned `(line, values)` rows (keys must be unique).
+
+    Returns `(updated, errors)`, errors being `(line, key, errors)`.
+    """
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    updated = 0
+    errors = []
+
+    with transaction.atomic():
+        _lock_targets(rows)
+        for key_column in ('sku', 'id'):
+            field = Product._meta.get_field(key_column)
+            pending = {}
+            params = []
+            for line, values in rows:
+                column, key = values['key']
+                if column != key_column:
+                    continue
+                ref = field.get_db_prep_value(key, connection)
+                pending[ref] = (line, key)
+                params.extend([ref, values['price'], values['stock'], values['delta']])
+            if not pending:
+                continue
+
+            with connection.cursor() as cursor:
+                cursor.execute(_update_sql(key_column, len(pending)), params + [now])
+                returned = {ref for ref, in cursor.fetchall()}
+            updated += len(returned)
+
+            missing = {ref: pending[ref] for ref in pending if ref not in returned}
+            if missing:
+                existing = {
+                    key: (shards, reserved)
+                    for key, shards, reserved in Product.objects.filter(
+                        **{f'{key_column}__in': [key for line, key in missing.values()]}
+                    ).values_list(key_column, 'stock_shard_count', 'reserved')
+                }
+                stocks = {values['key']: values['stock'] for line, values in rows}
+                for line, key in missing.values():
+                    if key not in existing:
+                        errors.append((line, key, {key_column: ["Product not found"]}))
+                    elif existing[key][0]:
+                        errors.append((line, key, {'stock': [SHARDED_STOCK_ERROR]}))
+                    elif stocks[(key_column, key)] is not None:
+                        error = Product.RESERVED_STOCK_ERROR.format(reserved=existing[key][1])
+                        errors.append((line, key, {'stock': [error]}))
+                    else:
+                        errors.append((line, key, {'delta': ["Insufficient stock for this delta"]}))
+
+        if updated:
+            # No signals for raw SQL: invalidate once for the whole chunk
+            invalidate_catalog()
+
+    return updated, errors
+
+
+def update_products(rows, chunk_size=1000):
+    """
+    Apply bulk price / stock updates from `(line, row)` pairs.
+
+    Rows are validated then applied in chunks of `chunk_size`, one UPDATE
+    per key type (sku, id) per chunk. Returns affected counts and a per-row
+    error report.
+    """
+    report = {'processed': 0, 'updated': 0, 'failed': 0, 'errors': []}
+
+    def flush(chunk):
+        updated, errors = update_chunk(chunk)
+        report['updated'] += updated
+        for line, key, row_errors in errors:
+            report['failed'] += 1
+            report['errors'].append({'line': line, 'key': str(key), 'errors': row_errors})
+
+    chunk = []
+    keys = set()
+    for line, row in rows:
+        report['processed'] += 1
+        values, errors = clean_update_row(row)
+        if errors:
+            report['failed'] += 1
+            key = (values or {}).get('key')
+            report['errors'].append({'line': line, 'key': str(key[1]) if key else None, 'errors': errors})
+            continue
+
+        # A product may only appear once per UPDATE: a repeated key starts
+        # a new chunk, so rows still apply in input order
+        if values['key'] in keys or len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+            keys = set()
+        chunk.append((line, values))
+        keys.add(values['key'])
+
+    if chunk:
+        flush(chunk)
+
+    report['errors'].sort(key=lambda error: error['line'])
+    return report
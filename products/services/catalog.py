@@ -0,0 +1,23 @@
+"""
+Catalog versions - Counters for everything cached from the catalog.
+
+`CATALOG_VERSION` covers what the catalog shows (names, prices, categories,
+images). `STOCK_VERSION` only covers stock counters, which every checkout
+changes: pages listing stock depend on both, while per-product entries are
+keyed on the product's `updated_at` (bumped by stock writes) and only depend
+on the catalog version, so a checkout leaves the other products cached.
+"""
+from core.utils.versioning import bump_version_on_commit
+
+CATALOG_VERSION = 'catalog'
+STOCK_VERSION = 'stock'
+
+
+def invalidate_catalog():
+    """Invalidate every catalog cache entry once the transaction commits."""
+    bump_version_on_commit(CATALOG_VERSION)
+
+
+def invalidate_stock():
+    """Invalidate the pages listing stock once the transaction commits."""
+    bump_version_on_commit(STOCK_VERSION)
@@ -0,0 +1,75 @@
+"""
+Category tree service - Nested menu with product counts, cached in-process.
+"""
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from core.utils.versioning import get_version
+from products.models import Category, Product
+
+CATEGORY_TREE_VERSION = 'category_tree'
+
+# (version, rendered JSON) - replaced as a whole, never mutated
+_snapshot = (None, b'')
+
+
+def build_category_tree():
+    """
+    Build the nested tree of active categories in two queries.
+    
+    Returns:
+        list: Root nodes with `product_count` (own active products),
+              `total_product_count` (whole subtree) and nested `children`
+    """
+    categories = Category.objects.filter(is_active=True).order_by('depth', 'name').values(
+        'id', 'name', 'slug', 'parent_id'
+    )
+    counts = dict(
+        Product.objects.filter(is_active=True).order_by().values_list('category_id').annotate(
+            count=Count('id')
+        )
+    )
+    
+    roots = []
+    nodes = {}
+    for category in categories:
+        node = {
+            'id': str(category['id']),
+            'name': category['name'],
+            'slug': category['slug'],
+            'product_count': counts.get(category['id'], 0),
+            'total_product_count': 0,
+            'children': [],
+        }
+        if category['parent_id'] is None:
+            roots.append(node)
+        elif category['parent_id'] in nodes:
+            nodes[category['parent_id']]['children'].append(node)
+        else:
+            # Parent is inactive: hide the whole branch
+            continue
+        nodes[category['id']] = node
+    
+    # Children come after their parent (ordered by depth): roll up bottom-up
+    for node in reversed(list(nodes.values())):
+        node['total_product_count'] = node['product_count'] + sum(
+            child['total_product_count'] for child in node['children']
+        )
+    
+    return roots
+
+
+def get_category_tree():
+    """
+    Rendered JSON of the category tree.
+    
+    Rebuilt only when the `category_tree` version was bumped (Category or
+    Product change), otherwise served from the process snapshot.
+    """
+    global _snapshot
+    
+    version = get_version(CATEGORY_TREE_VERSION)
+    snapshot_version, payload = _snapshot
+    if snapshot_version != version:
+        payload = JSONRenderer().render(build_category_tree())
+        _snapshot = (version, payload)
+    return payload
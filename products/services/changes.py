@@ -0,0 +1,91 @@
+"""
+Catalog changes feed - What changed since a cursor, for mirrors and indexers.
+
+Every product (active or not) is walked in `(updated_at, id)` order on the
+`(updated_at, id)` index: active products come back as upserts, soft-deleted
+ones as tombstones. Hard-deleted products are read from `ProductTombstone`
+in the same order and merged in. The cursor is the position of the last row
+returned, so a consumer syncs in O(changes).
+"""
+from datetime import timedelta
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from core.utils.pagination import cursor_value, decode_cursor, encode_cursor, keyset_filter
+from products.models import Product, ProductTombstone
+from .export import EXPORT_FIELDS, value_formatter
+
+# Rows younger than this are not returned yet: updated_at is set before the
+# transaction commits, so a slow transaction could otherwise land behind a
+# cursor that has already moved past it
+SETTLE_DELAY = timedelta(seconds=5)
+
+
+def parse_changes_cursor(token):
+    """Decode a changes cursor into `(updated_at, id)`. Raises ValueError."""
+    payload = decode_cursor(token)
+    try:
+        updated_at = parse_datetime(payload['u'])
+        pk = Product._meta.pk.to_python(payload['i'])
+    except (TypeError, KeyError, ValueError, DjangoValidationError):
+        raise ValueError("Invalid cursor")
+    if updated_at is None:
+        raise ValueError("Invalid cursor")
+    return updated_at, pk
+
+
+def get_changes(position=None, limit=500):
+    """
+    Changes after `position` (`(updated_at, id)`, None for a full sync).
+
+    Returns `{'changes': [...], 'next': cursor, 'has_more': bool}`; `next`
+    is the cursor to send back, unchanged when there is nothing new.
+    """
+    names = [name for name, lookup in EXPORT_FIELDS]
+    lookups = [lookup for name, lookup in EXPORT_FIELDS]
+    settled = timezone.now() - SETTLE_DELAY
+
+    products = Product.objects.filter(updated_at__lte=settled)
+    tombstones = ProductTombstone.objects.filter(updated_at__lte=settled)
+    if position is not None:
+        products = keyset_filter(products, 'updated_at', position[0], position[1], descending=False)
+        tombstones = keyset_filter(
+            tombstones, 'updated_at', position[0], position[1], descending=False, tiebreaker='product_id'
+        )
+
+    format_value = value_formatter()
+    rows = []
+    for row in products.order_by('updated_at', 'id').values_list(*lookups)[:limit + 1]:
+        product = dict(zip(names, row))
+        rows.append((product['updated_at'], product['id'], product))
+    for tombstone in (
+        tombstones.order_by('updated_at', 'product_id')
+        .values('product_id', 'sku', 'slug', 'updated_at')[:limit + 1]
+    ):
+        product = {'id': tombstone.pop('product_id'), 'is_active': False, **tombstone}
+        rows.append((product['updated_at'], product['id'], product))
+    # Both lists are in (updated_at, id) order: the first `limit` of the merge
+    rows.sort(key=lambda row: row[:2])
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = []
+    for updated_at, pk, values in rows:
+        product = {key: format_value(value) for key, value in values.items()}
+        if product['is_active']:
+            changes.append({'op': 'upsert', 'product': product})
+        else:
+            changes.append({
+                'op': 'delete',
+                'product': {key: product[key] for key in ('id', 'sku', 'slug', 'updated_at')},
+            })
+
+    if rows:
+        position = rows[-1][:2]
+
+    next_cursor = None
+    if position is not None:
+        next_cursor = encode_cursor({'u': cursor_value(position[0]), 'i': cursor_value(position[1])})
+
+    return {'changes': changes, 'next': next_cursor, 'has_more': has_more}
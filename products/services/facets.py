@@ -0,0 +1,82 @@
+"""
+Facets service - Sidebar counts for a filtered product set, in one query.
+"""
+from decimal import Decimal
+from django.db.models import Count, Q
+from .stock_shards import in_stock_condition
+
+DEFAULT_PRICE_BOUNDS = (
+    Decimal('0'),
+    Decimal('25'),
+    Decimal('50'),
+    Decimal('100'),
+    Decimal('250'),
+    Decimal('500'),
+    Decimal('1000'),
+)
+
+
+def get_product_facets(queryset, price_bounds=DEFAULT_PRICE_BOUNDS):
+    """
+    Compute category, price and stock facets for a filtered product queryset.
+    
+    A single statement: products are grouped by category and every other
+    facet is a conditional COUNT per group, summed up afterwards.
+    
+    Args:
+        queryset: Filtered Product queryset
+        price_bounds: Increasing bucket boundaries; the last bucket is open,
+            and a leading [0, first bound) bucket is added when the first
+            bound is above 0, so the histogram always adds up to `total`
+    
+    Returns:
+        dict: total, categories, price (histogram) and stock facets
+    """
+    if price_bounds[0] > 0:
+        price_bounds = (Decimal('0'), *price_bounds)
+    buckets = list(zip(price_bounds, list(price_bounds[1:]) + [None]))
+    
+    aggregates = {
+        'count': Count('id'),
+        # Sharded products (flash sale) are counted on their shards
+        'in_stock': Count('id', filter=in_stock_condition()),
+    }
+    for index, (low, high) in enumerate(buckets):
+        condition = Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        aggregates[f'price_{index}'] = Count('id', filter=condition)
+    
+    rows = list(
+        queryset.order_by().values(
+            'category_id', 'category__name', 'category__slug'
+        ).annotate(**aggregates)
+    )
+    
+    total = sum(row['count'] for row in rows)
+    in_stock = sum(row['in_stock'] for row in rows)
+    
+    return {
+        'total': total,
+        'categories': [
+            {
+                'id': str(row['category_id']),
+                'name': row['category__name'],
+                'slug': row['category__slug'],
+                'count': row['count'],
+            }
+            for row in sorted(rows, key=lambda row: (-row['count'], row['category__name']))
+        ],
+        'price': [
+            {
+                'min': str(low),
+                'max': str(high) if high is not None else None,
+                'count': sum(row[f'price_{index}'] for row in rows),
+            }
+            for index, (low, high) in enumerate(buckets)
+        ],
+        'stock': {
+            'in_stock': in_stock,
+            'out_of_stock': total - in_stock,
+        },
+    }
@@ -0,0 +1,70 @@
+"""
+Image files - Reference counting and deduplication of stored images.
+
+Product images are content-addressed (see core.utils.storage): one file may
+back many ProductImage rows, so a file is only deleted once no row points
+at it. The count is an indexed lookup on ProductImage.image, made under
+the same lock on the name as uploads reusing the file.
+"""
+import os
+from django.db import transaction
+from django.db.models.functions import Now
+from core.utils.storage import content_name, file_digest, lock_stored_name
+from products.models import Product, ProductImage
+from .catalog import invalidate_catalog
+
+
+def _image_field():
+    return ProductImage._meta.get_field('image')
+
+
+def is_referenced(name):
+    return ProductImage.objects.filter(image=name).exists()
+
+
+def release_image_file(name):
+    """Delete a stored image once no ProductImage references it anymore."""
+    if not name:
+        return
+    with transaction.atomic():
+        # Waits for an upload of the same content until its row commits
+        lock_stored_name(name)
+        if not is_referenced(name):
+            _image_field().storage.delete(name)
+
+
+def release_image_file_on_commit(name):
+    """Release after commit: a rolled back delete must keep the file."""
+    if name:
+        transaction.on_commit(lambda: release_image_file(name))
+
+
+def dedup_image_file(name, dry_run=False):
+    """
+    Move one stored image to its content-addressed name and return it.
+
+    Rows and thumbnails pointing at `name` are repointed, then the old file
+    is deleted (the content file is written only if it did not exist yet).
+    With `dry_run`, only computes the name. Raises FileNotFoundError if the
+    file is missing.
+    """
+    field = _image_field()
+    storage = field.storage
+    directory = field.upload_to.rstrip('/')
+    extension = os.path.splitext(name)[1]
+
+    # The content file is referenced before the lock taken by save() ends
+    with transaction.atomic():
+        with storage.open(name, 'rb') as source:
+            if dry_run:
+                return content_name(directory, file_digest(source), extension)
+            new_name = storage.save(f"{directory}/{os.path.basename(name)}", source)
+
+        if new_name == name:
+            return name
+
+        ProductImage.objects.filter(image=name).update(image=new_name, updated_at=Now())
+        Product.objects.filter(thumbnail=name).update(thumbnail=new_name, updated_at=Now())
+        invalidate_catalog()
+    storage.delete(name)
+    return new_name
@@ -0,0 +1,201 @@
+"""
+Image variants - Resized WebP / JPEG copies of media images.
+
+Variants are rendered by a process pool (Pillow work is CPU-bound and would
+stall the request worker) and cached on disk under
+`IMAGE_VARIANT_CACHE_DIR`. Every hit refreshes the file's mtime; once the
+cache grows past `IMAGE_VARIANT_CACHE_MAX_SIZE`, the least recently used
+files are removed.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import quote
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.http import RFC3986_SUBDELIMS
+from core.utils.imaging import FORMATS, resize_image
+
+# Size used for list thumbnails
+THUMBNAIL_SIZE = (320, 320)
+
+RESIZE_TIMEOUT = 30
+
+# Eviction brings the cache back under this fraction of the limit,
+# so that not every new variant triggers a directory scan
+EVICTION_TARGET = 0.9
+
+_executor = None
+_executor_lock = threading.Lock()
+
+_cache_size = None
+_cache_lock = threading.Lock()
+
+
+def is_allowed_size(width, height):
+    """Only whitelisted sizes are rendered (bounded cache, no abuse)."""
+    return (width, height) in {tuple(size) for size in settings.IMAGE_VARIANT_SIZES}
+
+
+def negotiate_format(accept):
+    """WebP for clients that accept it, JPEG otherwise."""
+    return 'webp' if 'image/webp' in (accept or '') else 'jpeg'
+
+
+def variant_url(path, width, height, request=None):
+    url = reverse('image-variant', kwargs={'width': width, 'height': height, 'path': path})
+    return request.build_absolute_uri(url) if request else url
+
+
+def variant_srcset(path, request=None):
+    """`srcset` attribute value listing every variant width."""
+    return ', '.join(
+        f"{variant_url(path, width, height, request)} {width}w"
+        for width, height in settings.IMAGE_VARIANT_SIZES
+    )
+
+
+def variant_url_builder(width, height, request=None):
+    """
+    `variant_url` for many paths: the route is reversed once, each path is
+    then only quoted the way `reverse()` quotes it.
+    """
+    placeholder = reverse('image-variant', kwargs={'width': width, 'height': height, 'path': 'x'})
+    if request:
+        placeholder = request.build_absolute_uri(placeholder)
+    prefix = placeholder[:-1]
+
+    def build(path):
+        if '/.' in path or path.startswith('.'):
+            # Dot segments are escaped by reverse(): keep the slow path
+            return variant_url(path, width, height, request)
+        return prefix + quote(path, safe=RFC3986_SUBDELIMS + '/~:@')
+
+    return build
+
+
+def variant_srcset_builder(request=None):
+    """`variant_srcset` for many paths, see `variant_url_builder`."""
+    builders = [
+        (variant_url_builder(width, height, request), f" {width}w")
+        for width, height in settings.IMAGE_VARIANT_SIZES
+    ]
+
+    def build(path):
+        return ', '.join(url(path) + suffix for url, suffix in builders)
+
+    return build
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_VARIANT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def _render(data, width, height, image_format):
+    global _executor
+    try:
+        future = _get_executor().submit(resize_image, data, width, height, image_format)
+        return future.result(timeout=RESIZE_TIMEOUT)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed by the OOM killer): start a new pool next time
+        with _executor_lock:
+            _executor = None
+        raise
+
+
+def _cache_path(path, width, height, image_format):
+    # Keyed on the name alone: stored media files are never overwritten (product
+    # images are content-addressed), so a hit costs no storage round trip
+    digest = hashlib.sha256(f"{path}|{width}x{height}|{image_format}".encode('utf-8')).hexdigest()
+    return os.path.join(settings.IMAGE_VARIANT_CACHE_DIR, digest[:2], f"{digest}.{image_format}")
+
+
+def _scan_cache():
+    """`(mtime, size, path)` of every cached variant."""
+    entries = []
+    for directory, subdirectories, files in os.walk(settings.IMAGE_VARIANT_CACHE_DIR):
+        for name in files:
+            if name.endswith('.tmp'):
+                continue  # Being written by another request
+            file_path = os.path.join(directory, name)
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file_path))
+    return entries
+
+
+def _record_cache_usage(size):
+    """Account for a new variant, evicting the least recently used if needed."""
+    global _cache_size
+    with _cache_lock:
+        if _cache_size is None:
+            _cache_size = sum(size for mtime, size, file_path in _scan_cache())
+        _cache_size += size
+        if _cache_size <= settings.IMAGE_VARIANT_CACHE_MAX_SIZE:
+            return
+
+        # Rescan: other processes write to the same directory
+        entries = sorted(_scan_cache())
+        total = sum(size for mtime, size, file_path in entries)
+        target = settings.IMAGE_VARIANT_CACHE_MAX_SIZE * EVICTION_TARGET
+        for mtime, size, file_path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        _cache_size = total
+
+
+def get_variant(path, width, height, image_format):
+    """
+    Open the cached variant of the media file `path`, rendered if needed.
+
+    The file is returned open: eviction by another process cannot remove it
+    from under the response. Raises FileNotFoundError for a missing source,
+    OSError (PIL errors included) for a file that is not a readable image,
+    TimeoutError when rendering takes longer than `RESIZE_TIMEOUT` and
+    BrokenProcessPool when a worker died.
+    """
+    cache_path = _cache_path(path, width, height, image_format)
+    try:
+        variant = open(cache_path, 'rb')
+    except FileNotFoundError:
+        pass
+    else:
+        os.utime(variant.fileno())  # LRU: mark as recently used
+        return variant
+
+    with default_storage.open(path, 'rb') as source:
+        data = source.read()
+    content = _render(data, width, height, image_format)
+
+    # Write then rename: concurrent readers never see a partial file
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temporary = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, 'wb') as output:
+        output.write(content)
+    os.replace(temporary, cache_path)
+
+    variant = open(cache_path, 'rb')
+    _record_cache_usage(len(content))
+    return variant
+
+
+def get_content_type(image_format):
+    return FORMATS[image_format][1]
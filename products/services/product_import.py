@@ -0,0 +1,338 @@
+"""
+Product import - Stream CSV / JSONL rows and upsert them by SKU in batches.
+
+Each batch costs a constant number of queries whatever its size: one to
+resolve categories, one for existing SKUs, one for slug collisions and one
+`INSERT ... ON CONFLICT (sku) DO UPDATE` per set of optional columns given
+(one for a regular file).
+"""
+import csv
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+from core.utils.versioning import bump_version_on_commit
+from products.models import Category, Product
+from .catalog import invalidate_catalog
+from .category_tree import CATEGORY_TREE_VERSION
+from .stock_shards import SHARDED_STOCK_ERROR
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+# Columns overwritten when the SKU already exists (slug and id are kept)
+UPDATE_FIELDS = ['name', 'description', 'price', 'stock', 'category', 'is_active', 'updated_at']
+
+# Only overwritten when the row gives a value: a missing column or a blank
+# cell keeps the current value (new products get the model default)
+OPTIONAL_FIELDS = ('description', 'stock', 'is_active')
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'off'}
+
+MAX_PRICE = Decimal('100000000')  # max_digits=10, decimal_places=2
+
+
+def detect_format(filename):
+    """Guess the import format from a file name, None if unknown."""
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return None
+
+
+def read_rows(stream, file_format):
+    """
+    Yield `(line, row)` from a text stream, one row at a time.
+
+    `row` is a dict, or None when the line cannot be parsed.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == 'jsonl':
+        for line, text in enumerate(stream, start=1):
+            text = text.strip()
+            if not text:
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError:
+                row = None
+            yield line, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+
+def _text(row, field):
+    value = row.get(field)
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def clean_row(row):
+    """Validate one row. Returns `(values, errors)`."""
+    if row is None:
+        return None, {'row': ["Invalid row"]}
+
+    values = {}
+    errors = {}
+
+    values['sku'] = _text(row, 'sku')
+    if not values['sku']:
+        errors['sku'] = ["This field is required."]
+    elif len(values['sku']) > 50:
+        errors['sku'] = ["Ensure this field has no more than 50 characters."]
+
+    values['name'] = _text(row, 'name')
+    if not values['name']:
+        errors['name'] = ["This field is required."]
+    elif len(values['name']) > 200:
+        errors['name'] = ["Ensure this field has no more than 200 characters."]
+
+    # Optional columns given by this row
+    values['provided'] = provided = set()
+
+    values['description'] = _text(row, 'description')
+    if values['description']:
+        provided.add('description')
+
+    try:
+        price = Decimal(_text(row, 'price'))
+        if not price.is_finite():
+            raise InvalidOperation
+    except InvalidOperation:
+        errors['price'] = ["A valid number is required."]
+    else:
+        if price <= 0:
+            errors['price'] = ["Price must be positive"]
+        elif price.as_tuple().exponent < -2:
+            errors['price'] = ["Ensure that there are no more than 2 decimal places."]
+        elif price >= MAX_PRICE:
+            errors['price'] = ["Ensure that there are no more than 10 digits in total."]
+        values['price'] = price
+
+    values['stock'] = 0
+    stock = _text(row, 'stock')
+    if stock:
+        provided.add('stock')
+        try:
+            values['stock'] = int(stock)
+        except ValueError:
+            errors['stock'] = ["A valid integer is required."]
+        else:
+            if values['stock'] < 0:
+                errors['stock'] = ["Stock cannot be negative"]
+
+    values['category'] = _text(row, 'category')
+    if not values['category']:
+        errors['category'] = ["This field is required."]
+
+    is_active = _text(row, 'is_active').lower()
+    if is_active:
+        provided.add('is_active')
+    if not is_active or is_active in TRUE_VALUES:
+        values['is_active'] = True
+    elif is_active in FALSE_VALUES:
+        values['is_active'] = False
+    else:
+        errors['is_active'] = ["Must be a valid boolean."]
+
+    return values, errors
+
+
+def _resolve_categories(refs):
+    """Map category references (UUID or slug) to ids, in one query."""
+    keys = {}
+    for ref in refs:
+        try:
+            keys[ref] = uuid.UUID(ref)
+        except ValueError:
+            keys[ref] = ref
+    ids = {key for key in keys.values() if isinstance(key, uuid.UUID)}
+    slugs = set(keys.values()) - ids
+
+    found = {}
+    for pk, slug in Category.objects.filter(Q(pk__in=ids) | Q(slug__in=slugs)).values_list('pk', 'slug'):
+        found[pk] = pk
+        found[slug] = pk
+    return {ref: found.get(key) for ref, key in keys.items()}
+
+
+def _assign_slugs(rows):
+    """
+    Pick a unique slug for each new product, in one query.
+
+    `slugify(name)` is used when free, `slugify(name + sku)` otherwise.
+    """
+    candidates = {}
+    for line, values in rows:
+        base = slugify(values['name'])[:220]
+        fallback = slugify(f"{values['name']} {values['sku']}")[:220]
+        candidates[line] = (base, fallback)
+
+    taken = set(Product.objects.filter(
+        slug__in={slug for pair in candidates.values() for slug in pair}
+    ).values_list('slug', flat=True))
+
+    slugs = {}
+    for line, pair in candidates.items():
+        for slug in pair:
+            if slug and slug not in taken:
+                slugs[line] = slug
+                taken.add(slug)
+                break
+    return slugs
+
+
+def import_batch(rows):
+    """
+    Upsert a batch of cleaned `(line, values)` rows by SKU.
+
+    Existing products stay locked from their checks to the upsert: no
+    reservation can slip in between. Returns `(created, updated, errors)`,
+    errors being `(line, sku, errors)`.
+    """
+    with transaction.atomic():
+        return _import_batch(rows)
+
+
+def _import_batch(rows):
+    errors = []
+
+    # The same SKU twice in one statement is rejected by PostgreSQL: keep the last
+    by_sku = {}
+    for line, values in rows:
+        previous = by_sku.get(values['sku'])
+        if previous:
+            errors.append((previous[0], values['sku'], {'sku': [f"Duplicate SKU, superseded by line {line}"]}))
+        by_sku[values['sku']] = (line, values)
+    rows = list(by_sku.values())
+
+    categories = _resolve_categories({values['category'] for line, values in rows})
+    existing = {}
+    # Flash-sale products: their stock lives in shards, see stock_shards.py
+    sharded = set()
+    reserved = {}
+    # Locked in id order, like checkouts
+    known = Product.objects.select_for_update().filter(sku__in=list(by_sku)).order_by('id').values_list(
+        'sku', 'slug', 'stock_shard_count', 'reserved'
+    )
+    for sku, slug, shards, held in known:
+        existing[sku] = slug
+        reserved[sku] = held
+        if shards:
+            sharded.add(sku)
+    slugs = _assign_slugs([(line, values) for line, values in rows if values['sku'] not in existing])
+
+    # One upsert per set of optional columns given (usually a single one)
+    groups = {}
+    lines = []
+    created = updated = 0
+    for line, values in rows:
+        category_id = categories.get(values['category'])
+        if category_id is None:
+            errors.append((line, values['sku'], {'category': ["Category not found"]}))
+            continue
+
+        if values['sku'] in sharded and 'stock' in values['provided']:
+            errors.append((line, values['sku'], {'stock': [SHARDED_STOCK_ERROR]}))
+            continue
+
+        # Stock held by carts' reservations stays
+        held = reserved.get(values['sku'], 0)
+        if 'stock' in values['provided'] and values['stock'] < held:
+            errors.append((line, values['sku'], {'stock': [Product.RESERVED_STOCK_ERROR.format(reserved=held)]}))
+            continue
+
+        slug = existing.get(values['sku']) or slugs.get(line)
+        if not slug:
+            errors.append((line, values['sku'], {'name': ["Could not generate a unique slug"]}))
+            continue
+
+        products = groups.setdefault(frozenset(values['provided']), [])
+        products.append(Product(
+            sku=values['sku'],
+            name=values['name'],
+            slug=slug,
+            description=values['description'],
+            price=values['price'],
+            stock=values['stock'],
+            category_id=category_id,
+            is_active=values['is_active'],
+        ))
+        lines.append((line, values['sku']))
+        if values['sku'] in existing:
+            updated += 1
+        else:
+            created += 1
+
+    if not lines:
+        return 0, 0, errors
+
+    try:
+        with transaction.atomic():
+            for provided, products in groups.items():
+                Product.objects.bulk_create(
+                    products,
+                    update_conflicts=True,
+                    unique_fields=['sku'],
+                    update_fields=[
+                        field for field in UPDATE_FIELDS
+                        if field not in OPTIONAL_FIELDS or field in provided
+                    ],
+                )
+            # bulk_create sends no signals: invalidate once for the whole batch
+            invalidate_catalog()
+            bump_version_on_commit(CATEGORY_TREE_VERSION)
+    except DatabaseError as exc:
+        # e.g. a slug taken concurrently: the whole batch is rolled back
+        errors.extend((line, sku, {'row': [str(exc).strip()]}) for line, sku in lines)
+        return 0, 0, errors
+
+    return created, updated, errors
+
+
+def import_products(stream, file_format, batch_size=1000):
+    """
+    Import products from a CSV / JSONL text stream.
+
+    Columns: sku, name, description, price, stock, category (UUID or slug),
+    is_active. Rows are upserted by SKU; description, stock and is_active
+    are only overwritten when given. Memory use is bounded by `batch_size`.
+    Returns a report with per-row errors.
+    """
+    report = {'processed': 0, 'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+
+    def flush(batch):
+        created, updated, errors = import_batch(batch)
+        report['created'] += created
+        report['updated'] += updated
+        for line, sku, row_errors in errors:
+            report['failed'] += 1
+            report['errors'].append({'line': line, 'sku': sku or None, 'errors': row_errors})
+
+    batch = []
+    for line, row in read_rows(stream, file_format):
+        report['processed'] += 1
+        values, errors = clean_row(row)
+        if errors:
+            report['failed'] += 1
+            report['errors'].append({'line': line, 'sku': (values or {}).get('sku') or None, 'errors': errors})
+            continue
+
+        batch.append((line, values))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+
+    if batch:
+        flush(batch)
+
+    report['errors'].sort(key=lambda error: error['line'])
+    return report
@@ -0,0 +1,227 @@
+"""
+Stock shards - Flash-sale mode for hot products.
+
+Every checkout of a product updates its row: under heavy traffic on a few
+products, checkouts queue on that one row lock. A sharded product splits
+its sellable stock into N `StockShard` rows: a checkout decrements one
+shard picked at random with a conditional UPDATE (`stock >= quantity`), so
+concurrent checkouts mostly lock different rows. Sellable stock is the sum
+of the shards.
+
+`Product.stock` is then a snapshot of that sum (listings), refreshed by
+`rebalance_stock_shards`, which also evens out the shards. Checkouts never
+write it: the snapshot, and the cached responses keyed on the product's
+`updated_at` or on the stock version, lag by at most the rebalancing
+interval. `Product.available`, the `in_stock` filter and the facets read
+the shards themselves (`in_stock_condition`).
+
+Lock order: the product row is locked `FOR NO KEY UPDATE`, then its shards.
+A checkout locks a shard first, then inserts its order items, whose foreign
+key takes `FOR KEY SHARE` on the product: that lock is compatible with `NO
+KEY UPDATE` (not with `FOR UPDATE`), so the two never wait on each other.
+"""
+import random
+from django.db import transaction
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Q, Sum, Value, When
+from django.utils import timezone
+from products.models import Product, StockShard
+from .catalog import invalidate_stock
+
+MAX_STOCK_SHARDS = 64
+
+# Stock writers (API, bulk update, import) reject sharded products with it
+SHARDED_STOCK_ERROR = "Stock is sharded (flash sale): change it with the stock_shards command."
+
+
+def _split(total, count):
+    """`total` spread over `count` shards, the first ones taking the remainder."""
+    size, remainder = divmod(total, count)
+    return [size + (1 if index < remainder else 0) for index in range(count)]
+
+
+def _shard_case(amounts, field='index'):
+    """`CASE <field> WHEN ... THEN amount END`, for one UPDATE across shards."""
+    return Case(
+        *[When(**{field: key}, then=Value(amount)) for key, amount in amounts.items()],
+        output_field=IntegerField(),
+    )
+
+
+def get_sharded_stock(product_ids):
+    """Sellable stock of sharded products: `{product_id: sum of the shards}`."""
+    return dict(
+        StockShard.objects.filter(product_id__in=list(product_ids))
+        .order_by()
+        .values('product_id')
+        .annotate(total=Sum('stock'))
+        .values_list('product_id', 'total')
+    )
+
+
+def prefetch_sharded_stock(products):
+    """Read the shards of every sharded product in `products` in one query."""
+    totals = get_sharded_stock(product.pk for product in products if product.is_sharded)
+    for product in products:
+        if product.is_sharded:
+            product._sharded_stock = totals.get(product.pk, 0)
+
+
+def in_stock_condition():
+    """
+    Q for products with sellable stock, on their shards when sharded.
+
+    Plain products: `stock > reserved`. Sharded products are not reservable:
+    any shard with stock left.
+    """
+    return Q(stock_shard_count=0, stock__gt=F('reserved')) | Q(
+        Exists(StockShard.objects.filter(product=OuterRef('pk'), stock__gt=0)),
+        stock_shard_count__gt=0,
+    )
+
+
+def set_stock_shards(product, count):
+    """
+    Shard the stock of `product` over `count` rows (0 turns sharding off).
+
+    The current sellable stock (`stock`, or the sum of the current shards)
+    is spread evenly over the new shards, or written back to `stock` when
+    sharding is turned off. Products with active reservations cannot be
+    sharded: reservations hold `Product.stock`, which shards replace.
+    Returns the refreshed product.
+    """
+    if not 0 <= count <= MAX_STOCK_SHARDS:
+        raise ValueError(f"Shard count must be between 0 and {MAX_STOCK_SHARDS}")
+
+    with transaction.atomic():
+        product = Product.objects.select_for_update(no_key=True).get(pk=product.pk)
+        if count and product.reserved:
+            raise ValueError("Cannot shard a product with active reservations")
+
+        total = product.stock
+        if product.stock_shard_count:
+            shards = list(StockShard.objects.select_for_update().filter(product=product).order_by('index'))
+            total = sum(shard.stock for shard in shards)
+            StockShard.objects.filter(product=product).delete()
+
+        StockShard.objects.bulk_create([
+            StockShard(product=product, index=index, stock=stock)
+            for index, stock in enumerate(_split(total, count) if count else [])
+        ])
+        Product.objects.filter(pk=product.pk).update(
+            stock=total,
+            stock_shard_count=count,
+            updated_at=timezone.now(),
+        )
+        invalidate_stock()
+
+    product.refresh_from_db()
+    return product
+
+
+def take_sharded_stock(product, quantity):
+    """
+    Decrement `quantity` from the shards of `product`, in the caller's transaction.
+
+    1. A random shard, with a conditional UPDATE (`stock >= quantity`).
+    2. Otherwise another shard still holding `quantity`, in random order.
+    3. Otherwise (last units of the sale) the shards are locked and emptied
+       one after the other.
+
+    Returns False when the shards hold less than `quantity` in total.
+    """
+    shards = StockShard.objects.filter(product_id=product.id)
+
+    def take(index, amount):
+        return shards.filter(index=index, stock__gte=amount).update(stock=F('stock') - amount)
+
+    if product.stock_shard_count and take(random.randrange(product.stock_shard_count), quantity):
+        return True
+
+    candidates = list(shards.filter(stock__gte=quantity).values_list('index', flat=True))
+    random.shuffle(candidates)
+    for index in candidates:
+        if take(index, quantity):
+            return True
+
+    # Locked in index order, like every multi-shard lock, so no deadlock
+    locked = list(shards.select_for_update().order_by('index').values_list('index', 'stock'))
+    if sum(stock for index, stock in locked) < quantity:
+        return False
+
+    amounts = {}
+    remaining = quantity
+    for index, stock in locked:
+        if remaining == 0:
+            break
+        amounts[index] = min(stock, remaining)
+        remaining -= amounts[index]
+    shards.filter(index__in=list(amounts)).update(stock=F('stock') - _shard_case(amounts))
+    return True
+
+
+def restore_sharded_stock(quantities, shard_counts):
+    """
+    Give back `{product_id: quantity}` to sharded products (cancellations).
+
+    Each quantity goes to one random shard of its product (`shard_counts`
+    maps product ids to their shard count), in one UPDATE. The counts must
+    be read on the locked products (`select_for_update(no_key=True)`, like
+    `Order.cancel`): a resize or unshard could otherwise remove the shard
+    picked. Raises RuntimeError if a shard is missing all the same.
+    """
+    targets = {
+        product_id: random.randrange(shard_counts[product_id])
+        for product_id in quantities if shard_counts.get(product_id)
+    }
+    if not targets:
+        return
+    condition = Q()
+    for product_id, index in targets.items():
+        condition |= Q(product_id=product_id, index=index)
+    restored = StockShard.objects.filter(condition).update(
+        stock=F('stock') + _shard_case(
+            {product_id: quantities[product_id] for product_id in targets}, field='product_id'
+        ),
+    )
+    if restored != len(targets):
+        # Rolls the cancellation back rather than losing the quantity
+        raise RuntimeError("Shard count changed while restoring stock: lock the products first")
+
+
+def rebalance_stock_shards(product_ids=None):
+    """
+    Even out the shards of every sharded product and refresh `Product.stock`.
+
+    One short transaction per product: shards that ran dry are refilled
+    from the others, so checkouts keep finding stock on their first try.
+    Returns the number of products rebalanced.
+    """
+    products = Product.objects.filter(stock_shard_count__gt=0)
+    if product_ids is not None:
+        products = products.filter(id__in=list(product_ids))
+
+    rebalanced = 0
+    for product_id in products.values_list('id', flat=True).order_by('id'):
+        with transaction.atomic():
+            # Product first, then shards: the lock order of set_stock_shards
+            product = Product.objects.select_for_update(no_key=True).filter(
+                pk=product_id, stock_shard_count__gt=0
+            ).first()
+            if product is None:
+                continue
+            locked = dict(
+                StockShard.objects.select_for_update().filter(product=product)
+                .order_by('index').values_list('index', 'stock')
+            )
+            total = sum(locked.values())
+            target = dict(zip(sorted(locked), _split(total, len(locked)))) if locked else {}
+            changed = {index: stock for index, stock in target.items() if locked[index] != stock}
+            if changed:
+                StockShard.objects.filter(product=product, index__in=list(changed)).update(
+                    stock=_shard_case(changed)
+                )
+            if product.stock != total:
+                Product.objects.filter(pk=product.pk).update(stock=total, updated_at=timezone.now())
+                invalidate_stock()
+        rebalanced += 1
+    return rebalanced
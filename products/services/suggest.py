@@ -0,0 +1,37 @@
+"""
+Autocomplete service - Typo-tolerant name suggestions backed by pg_trgm.
+"""
+from django.contrib.postgres.search import TrigramWordSimilarity
+from products.models import Category, Product
+
+
+def _suggest(queryset, query, limit):
+    """
+    Top `limit` rows whose name contains a word similar to `query`.
+
+    The `%>` operator is served by the `gin_trgm_ops` index on `name`.
+    """
+    return list(
+        queryset.filter(
+            name__trigram_word_similar=query
+        ).annotate(
+            similarity=TrigramWordSimilarity(query, 'name')
+        ).order_by('-similarity', 'name').values('name', 'slug')[:limit]
+    )
+
+
+def get_suggestions(query, limit=8):
+    """
+    Suggest product and category names for a search box.
+    
+    Args:
+        query: Normalized search text (at least a few characters)
+        limit: Maximum number of products returned (categories: half of it)
+    
+    Returns:
+        dict: {'products': [{name, slug}], 'categories': [{name, slug}]}
+    """
+    return {
+        'products': _suggest(Product.objects.filter(is_active=True), query, limit),
+        'categories': _suggest(Category.objects.filter(is_active=True), query, max(1, limit // 2)),
+    }
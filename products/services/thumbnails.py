@@ -0,0 +1,52 @@
+"""
+Thumbnail service - Keep Product.thumbnail in sync with its images.
+"""
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from products.models import Product, ProductImage
+
+
+def primary_image_subquery():
+    """Path of the first active image of the outer product ('' if none)."""
+    return Coalesce(
+        Subquery(
+            ProductImage.objects.filter(
+                product=OuterRef('pk'),
+                is_active=True,
+            ).order_by('order', 'created_at').values('image')[:1]
+        ),
+        Value(''),
+    )
+
+
+def refresh_thumbnail(product_id):
+    """
+    Recompute the thumbnail of one product.
+    
+    Only writes (and bumps updated_at) when the primary image changed.
+    
+    Returns:
+        bool: True if the product row was updated
+    """
+    image = ProductImage.objects.filter(
+        product_id=product_id,
+        is_active=True,
+    ).order_by('order', 'created_at').values_list('image', flat=True).first() or ''
+    
+    return Product.objects.filter(pk=product_id).exclude(thumbnail=image).update(
+        thumbnail=image,
+        updated_at=timezone.now(),
+    ) > 0
+
+
+def backfill_thumbnails(queryset):
+    """
+    Recompute thumbnails for every product of `queryset` in one UPDATE.
+    
+    Returns:
+        int: Number of products whose thumbnail changed
+    """
+    return queryset.exclude(thumbnail=primary_image_subquery()).update(
+        thumbnail=primary_image_subquery(),
+    )
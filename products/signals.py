@@ -0,0 +1,80 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from core.utils.versioning import bump_version_on_commit
+from .models import Category, Product, ProductImage, ProductTombstone
+from .services.catalog import invalidate_catalog, invalidate_stock
+from .services.category_tree import CATEGORY_TREE_VERSION
+from .services.image_files import release_image_file_on_commit
+from .services.thumbnails import refresh_thumbnail
+
+# Product fields that change what the category tree displays
+CATEGORY_TREE_PRODUCT_FIELDS = {'is_active', 'category'}
+
+# Product fields whose saves (increase_stock...) only change stock counters
+STOCK_PRODUCT_FIELDS = {'stock', 'reserved', 'updated_at'}
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def update_product_thumbnail(sender, instance, **kwargs):
+    """Image saved, reordered, soft-deleted or deleted: refresh the thumbnail."""
+    refresh_thumbnail(instance.product_id)
+
+
+@receiver(pre_save, sender=ProductImage)
+def remember_replaced_image_file(sender, instance, **kwargs):
+    """New file uploaded on an existing image: remember the one it replaces."""
+    instance._replaced_image = None
+    if not instance._state.adding and instance.image and not instance.image._committed:
+        instance._replaced_image = sender.objects.filter(pk=instance.pk).values_list('image', flat=True).first()
+
+
+@receiver(post_save, sender=ProductImage)
+def release_replaced_image_file(sender, instance, **kwargs):
+    """Replaced file: delete it once no other image row shares it."""
+    replaced = getattr(instance, '_replaced_image', None)
+    if replaced and replaced != instance.image.name:
+        release_image_file_on_commit(replaced)
+
+
+@receiver(post_delete, sender=ProductImage)
+def release_product_image_file(sender, instance, **kwargs):
+    """Delete the stored file once no other image row shares it."""
+    release_image_file_on_commit(instance.image.name)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, instance, **kwargs):
+    """Any category change invalidates the category tree snapshot."""
+    bump_version_on_commit(CATEGORY_TREE_VERSION)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_category_tree_counts(sender, instance, update_fields=None, **kwargs):
+    """Product changes invalidate the tree counts (stock-only saves do not)."""
+    if update_fields is not None and not CATEGORY_TREE_PRODUCT_FIELDS & set(update_fields):
+        return
+    bump_version_on_commit(CATEGORY_TREE_VERSION)
+
+
+@receiver(post_delete, sender=Product)
+def record_product_tombstone(sender, instance, **kwargs):
+    """Hard deletes (admin, shell) stay visible to the changes feed."""
+    ProductTombstone.objects.create(product_id=instance.pk, sku=instance.sku, slug=instance.slug)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    """Any catalog write invalidates cached responses (stock-only saves, the stock pages)."""
+    update_fields = kwargs.get('update_fields')
+    if sender is Product and update_fields and set(update_fields) <= STOCK_PRODUCT_FIELDS:
+        invalidate_stock()
+    else:
+        invalidate_catalog()
@@ -1,3 +1,1187 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from accounts.models import User
+from core.utils.response_cache import get_response_cache_stats
+from products.models import Category, Product, ProductImage, ProductTombstone
+from products.serializers import ProductListFastSerializer, ProductListSerializer
+from products.services import (
+    SHARDED_STOCK_ERROR,
+    backfill_thumbnails,
+    build_category_tree,
+    import_products,
+    rebalance_stock_shards,
+    set_stock_shards,
+    take_sharded_stock,
+    update_products,
+)
+from products.services.export import accepts_gzip
 
-# Create your tests here.
+
+class ProductListFastSerializerParityTests(SimpleTestCase):
+    """The fast path must render exactly what ProductListSerializer renders."""
+
+    def make_request(self, query=''):
+        return Request(APIRequestFactory().get(f'/api/products/{query}'))
+
+    def make_product(self, **kwargs):
+        values = {
+            'id': uuid.uuid4(),
+            'name': 'Chaise été',
+            'slug': 'chaise-ete',
+            'price': Decimal('49.90'),
+            'stock': 3,
+            'thumbnail': 'products/ab/abcdef.jpg',
+            'is_active': True,
+        }
+        values.update(kwargs)
+        product = Product(**values)
+        product.category = Category(name='Mobilier & déco', slug='mobilier')
+        return product
+
+    def as_row(self, product):
+        return {
+            'id': product.id,
+            'name': product.name,
+            'slug': product.slug,
+            'price': product.price,
+            'stock': product.stock,
+            'category__name': product.category.name,
+            'thumbnail': product.thumbnail,
+            'is_active': product.is_active,
+        }
+
+    def assertParity(self, products, request):
+        context = {'request': request}
+        expected = ProductListSerializer(products, many=True, context=context).data
+        fast = ProductListFastSerializer(context=context)
+        actual = fast.serialize([self.as_row(product) for product in products])
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+    def test_default_fields(self):
+        self.assertParity([self.make_product(), self.make_product(stock=0, is_active=False)], self.make_request())
+
+    def test_prices(self):
+        products = [
+            self.make_product(price=Decimal('10')),
+            self.make_product(price=Decimal('0.5')),
+            self.make_product(price=Decimal('99999999.99')),
+        ]
+        self.assertParity(products, self.make_request())
+
+    def test_thumbnails(self):
+        products = [
+            self.make_product(thumbnail=''),
+            self.make_product(thumbnail='products/a b/é#?%.jpg'),
+            self.make_product(thumbnail='products/./../x.png'),
+        ]
+        self.assertParity(products, self.make_request())
+
+    def test_without_request(self):
+        self.assertParity([self.make_product()], None)
+
+    def test_sparse_fieldsets(self):
+        products = [self.make_product()]
+        self.assertParity(products, self.make_request('?fields=id,price,thumbnail'))
+        self.assertParity(products, self.make_request('?omit=thumbnail_srcset,category_name'))
+
+    def test_unknown_field(self):
+        request = self.make_request('?fields=id,nope')
+        with self.assertRaises(ValidationError) as slow:
+            ProductListSerializer(context={'request': request})
+        with self.assertRaises(ValidationError) as fast:
+            ProductListFastSerializer(context={'request': request})
+        self.assertEqual(fast.exception.detail, slow.exception.detail)
+
+
+class ProductCursorPaginationTests(TestCase):
+    """Keyset pages cover every product once, ties broken by id."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        cls.products = [
+            Product.objects.create(name=f'Chaise {index}', price=Decimal(price), category=category)
+            for index, price in enumerate(['10', '20', '20', '20', '30'])
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url, link='next'):
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data[link]
+            pages += 1
+        return ids, pages
+
+    def test_forward_pages(self):
+        ids, pages = self.walk('/api/products/?cursor=&ordering=price&page_size=2')
+
+        expected = sorted(self.products, key=lambda product: (product.price, product.id))
+        self.assertEqual(ids, [str(product.id) for product in expected])
+        self.assertEqual(pages, 3)
+
+    def test_previous_pages(self):
+        first = self.client.get('/api/products/?cursor=&ordering=-price&page_size=2').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+
+        self.assertIsNone(first['previous'])
+        self.assertEqual(back['results'], first['results'])
+
+    def test_invalid_cursors(self):
+        response = self.client.get('/api/products/?cursor=&ordering=price&page_size=2')
+        cursor = response.data['next'].split('cursor=')[1].split('&')[0]
+
+        self.assertEqual(self.client.get('/api/products/?cursor=garbage').status_code, 404)
+        # Bound to the ordering it was issued for
+        self.assertEqual(self.client.get(f'/api/products/?cursor={cursor}&ordering=name').status_code, 404)
+
+
+class ProductSearchTests(TestCase):
+    """Full-text search: stemmed, weighted, exact SKU first."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        cls.in_name = Product.objects.create(
+            name='Chaise pliante', sku='CH-1', description='Bois', price=Decimal('10'), category=category,
+        )
+        cls.in_description = Product.objects.create(
+            name='Tabouret', sku='TB-1', description='Assise de chaise en bois', price=Decimal('10'), category=category,
+        )
+        cls.by_sku = Product.objects.create(
+            name='Table', sku='TABLE-CH', description='Chêne', price=Decimal('90'), category=category,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, term):
+        response = self.client.get('/api/products/', {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [item['slug'] for item in response.data['results']]
+
+    def test_stemmed_and_ranked(self):
+        # Plural matches, name matches rank above description matches
+        self.assertEqual(self.search('chaises'), [self.in_name.slug, self.in_description.slug])
+
+    def test_search_vector_follows_updates(self):
+        Product.objects.filter(pk=self.by_sku.pk).update(description='Plateau de chaise')
+        self.assertIn(self.by_sku.slug, self.search('chaise'))
+
+    def test_websearch_syntax(self):
+        self.assertEqual(self.search('chaise -tabouret'), [self.in_name.slug])
+        self.assertEqual(self.search('"chaise pliante"'), [self.in_name.slug])
+
+    def test_exact_sku(self):
+        self.assertEqual(self.search('TABLE-CH'), [self.by_sku.slug])
+
+
+class ProductSuggestTests(TestCase):
+    """Autocomplete tolerates typos and never lists inactive rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Chaises', slug='chaises')
+        Product.objects.create(name='Chaise pliante', price=Decimal('10'), category=category)
+        Product.objects.create(name='Chaise haute', price=Decimal('20'), category=category)
+        Product.objects.create(name='Chaise cassée', price=Decimal('5'), category=category, is_active=False)
+        Product.objects.create(name='Table basse', price=Decimal('90'), category=category)
+
+    def setUp(self):
+        cache.clear()
+
+    def suggest(self, query, **params):
+        response = self.client.get('/api/products/suggest/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_typo(self):
+        data = self.suggest('chaisse')
+
+        self.assertEqual(
+            sorted(item['name'] for item in data['products']),
+            ['Chaise haute', 'Chaise pliante'],
+        )
+        self.assertEqual(data['categories'], [{'name': 'Chaises', 'slug': 'chaises'}])
+
+    def test_limit_and_short_queries(self):
+        self.assertEqual(len(self.suggest('chaise', limit=1)['products']), 1)
+        self.assertEqual(self.suggest('c'), {'products': [], 'categories': []})
+
+
+class ProductThumbnailTests(TestCase):
+    """Product.thumbnail follows the first active image."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        self.product = Product.objects.create(name='Chaise', price=Decimal('10'), category=category)
+
+    def add_image(self, content, order):
+        upload = SimpleUploadedFile(f'{content}.jpg', content.encode(), content_type='image/jpeg')
+        return ProductImage.objects.create(product=self.product, image=upload, order=order)
+
+    def thumbnail(self):
+        self.product.refresh_from_db()
+        return self.product.thumbnail
+
+    def test_follows_images(self):
+        back = self.add_image('back', order=2)
+        self.assertEqual(self.thumbnail(), back.image.name)
+
+        front = self.add_image('front', order=1)
+        self.assertEqual(self.thumbnail(), front.image.name)
+
+        front.is_active = False
+        front.save()
+        self.assertEqual(self.thumbnail(), back.image.name)
+
+        back.delete()
+        self.assertEqual(self.thumbnail(), '')
+
+    def test_backfill(self):
+        image = self.add_image('front', order=1)
+        Product.objects.filter(pk=self.product.pk).update(thumbnail='')
+
+        self.assertEqual(backfill_thumbnails(Product.objects.all()), 1)
+        self.assertEqual(self.thumbnail(), image.image.name)
+        self.assertEqual(backfill_thumbnails(Product.objects.all()), 0)
+
+
+class CategoryPathTests(TestCase):
+    """Moves and renames rewrite the whole subtree."""
+
+    def test_move_subtree(self):
+        home = Category.objects.create(name='Maison', slug='maison')
+        furniture = Category.objects.create(name='Mobilier', slug='mobilier', parent=home)
+        chairs = Category.objects.create(name='Chaises', slug='chaises', parent=furniture)
+        garden = Category.objects.create(name='Jardin', slug='jardin')
+
+        furniture.parent = garden
+        furniture.save()
+
+        chairs.refresh_from_db()
+        self.assertEqual(chairs.path, f'{garden.pk.hex}/{furniture.pk.hex}/{chairs.pk.hex}/')
+        self.assertEqual((chairs.depth, chairs.name_path), (2, 'Jardin > Mobilier > Chaises'))
+        self.assertEqual(set(Category.objects.subtree_of(slug='jardin')), {garden, furniture, chairs})
+        self.assertEqual(set(Category.objects.subtree_of(slug='maison')), {home})
+
+    def test_move_under_descendant(self):
+        home = Category.objects.create(name='Maison', slug='maison')
+        furniture = Category.objects.create(name='Mobilier', slug='mobilier', parent=home)
+
+        home.parent = furniture
+        with self.assertRaises(ValueError):
+            home.save()
+
+
+class ProductCategoryFilterTests(TestCase):
+    """Category filters include the whole subtree."""
+
+    @classmethod
+    def setUpTestData(cls):
+        home = Category.objects.create(name='Maison', slug='maison')
+        cls.furniture = Category.objects.create(name='Mobilier', slug='mobilier', parent=home)
+        chairs = Category.objects.create(name='Chaises', slug='chaises', parent=cls.furniture)
+        garden = Category.objects.create(name='Jardin', slug='jardin')
+        Product.objects.create(name='Buffet', slug='buffet', price=Decimal('10'), category=cls.furniture)
+        Product.objects.create(name='Chaise', slug='chaise', price=Decimal('10'), category=chairs)
+        Product.objects.create(name='Lampe', slug='lampe', price=Decimal('10'), category=home)
+        Product.objects.create(name='Pelle', slug='pelle', price=Decimal('10'), category=garden)
+
+    def setUp(self):
+        cache.clear()
+
+    def slugs(self, **params):
+        response = self.client.get('/api/products/', params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['slug'] for item in response.data['results'])
+
+    def test_subtree(self):
+        self.assertEqual(self.slugs(category_slug='mobilier'), ['buffet', 'chaise'])
+        self.assertEqual(self.slugs(category=str(self.furniture.pk)), ['buffet', 'chaise'])
+        self.assertEqual(self.slugs(category_slug='maison'), ['buffet', 'chaise', 'lampe'])
+
+    def test_unknown_or_invalid_category(self):
+        self.assertEqual(self.slugs(category_slug='inconnue'), [])
+        self.assertEqual(self.client.get('/api/products/', {'category': 'nope'}).status_code, 400)
+
+
+class CategoryTreeTests(TestCase):
+    """The tree is built in two queries and rebuilt only after a change."""
+
+    @classmethod
+    def setUpTestData(cls):
+        home = Category.objects.create(name='Maison', slug='maison')
+        furniture = Category.objects.create(name='Mobilier', slug='mobilier', parent=home)
+        hidden = Category.objects.create(name='Archives', slug='archives', parent=home, is_active=False)
+        Category.objects.create(name='Vieux', slug='vieux', parent=hidden)
+        Product.objects.create(name='Lampe', price=Decimal('10'), category=home)
+        Product.objects.create(name='Buffet', price=Decimal('10'), category=furniture)
+        Product.objects.create(name='Armoire', price=Decimal('10'), category=furniture)
+        Product.objects.create(name='Commode', price=Decimal('10'), category=furniture, is_active=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_roll_up(self):
+        with self.assertNumQueries(2):
+            tree = build_category_tree()
+
+        self.assertEqual(len(tree), 1)
+        home = tree[0]
+        self.assertEqual((home['slug'], home['product_count'], home['total_product_count']), ('maison', 1, 3))
+        # Inactive categories hide their whole branch
+        self.assertEqual([child['slug'] for child in home['children']], ['mobilier'])
+        self.assertEqual(home['children'][0]['product_count'], 2)
+
+    def test_snapshot(self):
+        first = self.client.get('/api/categories/tree/').json()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/categories/tree/').json(), first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name='Chaise', price=Decimal('10'), category=Category.objects.get(slug='maison'))
+
+        self.assertEqual(self.client.get('/api/categories/tree/').json()[0]['total_product_count'], 4)
+
+
+class ResponseCacheTests(TestCase):
+    """Anonymous catalog reads are cached until the catalog changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Mobilier', slug='mobilier')
+        cls.product = Product.objects.create(name='Chaise', slug='chaise', price=Decimal('10'), category=cls.category)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hit_after_miss(self):
+        self.assertEqual(self.client.get('/api/products/?ordering=price&page=1')['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/?page=1&ordering=price')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.json()['results'][0]['slug'], 'chaise')
+
+    def test_authenticated_requests_bypass_the_cache(self):
+        self.client.get('/api/products/')
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='client', email='client@example.com', password='x'))
+        self.assertNotIn('X-Cache', client.get('/api/products/'))
+
+    def test_catalog_changes_invalidate(self):
+        self.client.get('/api/products/chaise/')
+        self.client.get('/api/categories/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Chaise longue'
+            self.product.save()
+
+        response = self.client.get('/api/products/chaise/')
+        self.assertEqual((response['X-Cache'], response.json()['name']), ('MISS', 'Chaise longue'))
+        self.assertEqual(self.client.get('/api/categories/')['X-Cache'], 'MISS')
+
+    def test_stock_writes_only_invalidate_what_shows_them(self):
+        table = Product.objects.create(name='Table', slug='table', price=Decimal('90'), category=self.category)
+        for url in ('/api/products/chaise/', '/api/products/', '/api/categories/'):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            table.increase_stock(3)
+
+        self.assertEqual(self.client.get('/api/products/chaise/')['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get('/api/categories/')['X-Cache'], 'HIT')
+        response = self.client.get('/api/products/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual({item['slug']: item['stock'] for item in response.json()['results']}['table'], 3)
+
+    def test_stats(self):
+        before = get_response_cache_stats()['category-list']
+        self.client.get('/api/categories/')
+        self.client.get('/api/categories/')
+        self.client.get('/api/categories/')
+
+        after = get_response_cache_stats()['category-list']
+        self.assertEqual((after['hits'] - before['hits'], after['misses'] - before['misses']), (2, 1))
+
+
+class ProductConditionalGetTests(TestCase):
+    """Product detail answers 304 from one query while nothing changed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Mobilier', slug='mobilier')
+        cls.product = Product.objects.create(name='Chaise', slug='chaise', price=Decimal('10'), category=cls.category)
+        cls.admin = User.objects.create_user(username='admin', email='admin@example.com', password='x', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, **headers):
+        return self.client.get('/api/products/chaise/', **headers)
+
+    def test_not_modified(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        response = self.get(HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_update_the_etag(self):
+        etag = self.get()['ETag']
+
+        Category.objects.filter(pk=self.category.pk).update(updated_at=timezone.now() + timedelta(seconds=1))
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.get()['ETag']
+        Product.objects.filter(pk=self.product.pk).update(price=Decimal('12'), updated_at=timezone.now() + timedelta(seconds=2))
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['price']), (200, '12.00'))
+
+    def test_representation_is_part_of_the_etag(self):
+        self.assertNotEqual(self.get()['ETag'], self.client.get('/api/products/chaise/?fields=id')['ETag'])
+
+    def test_unknown_product(self):
+        response = self.client.get('/api/products/inconnu/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+
+class ProductSparseFieldsetTests(TestCase):
+    """?fields= / ?omit= prune the output and the query behind it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        Product.objects.create(
+            name='Chaise', slug='chaise', price=Decimal('10'), category=category,
+            description='Une longue description',
+        )
+        cls.admin = User.objects.create_user(username='admin', email='admin@example.com', password='x', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/products/chaise/{query}')
+        return response, [query['sql'] for query in queries]
+
+    def prefetches_images(self, queries):
+        return any('FROM "products_productimage"' in sql for sql in queries)
+
+    def test_fields(self):
+        response, queries = self.get('?fields=id,name,price')
+
+        self.assertEqual(set(response.data), {'id', 'name', 'price'})
+        self.assertFalse(self.prefetches_images(queries))
+        self.assertFalse(any('"products_product"."description"' in sql for sql in queries))
+
+    def test_omit(self):
+        response, queries = self.get('?omit=description,images')
+
+        self.assertNotIn('description', response.data)
+        self.assertNotIn('images', response.data)
+        self.assertIn('category_detail', response.data)
+        self.assertFalse(self.prefetches_images(queries))
+        self.assertFalse(any('"products_product"."description"' in sql for sql in queries))
+
+    def test_full_representation_by_default(self):
+        response, queries = self.get('')
+
+        self.assertEqual(response.data['description'], 'Une longue description')
+        self.assertEqual(response.data['images'], [])
+        self.assertTrue(self.prefetches_images(queries))
+
+    def test_unknown_field_is_rejected(self):
+        response, queries = self.get('?fields=id,inconnu')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('inconnu', str(response.data['fields']))
+
+
+class ProductFacetsTests(TestCase):
+    """Facet counts add up to the filtered total."""
+
+    @classmethod
+    def setUpTestData(cls):
+        furniture = Category.objects.create(name='Mobilier', slug='mobilier')
+        garden = Category.objects.create(name='Jardin', slug='jardin')
+        Product.objects.create(name='Tabouret', price=Decimal('20'), stock=3, category=furniture)
+        Product.objects.create(name='Chaise', price=Decimal('60'), stock=0, category=furniture)
+        Product.objects.create(name='Buffet', price=Decimal('400'), stock=1, category=furniture)
+        Product.objects.create(name='Pelle', price=Decimal('15'), stock=2, category=garden)
+        Product.objects.create(name='Râteau', price=Decimal('15'), category=garden, is_active=False)
+
+    def facets(self, **params):
+        response = self.client.get('/api/products/facets/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counts(self):
+        with self.assertNumQueries(1):
+            data = self.facets()
+
+        self.assertEqual(data['total'], 4)
+        self.assertEqual([(row['slug'], row['count']) for row in data['categories']], [('mobilier', 3), ('jardin', 1)])
+        self.assertEqual(data['stock'], {'in_stock': 3, 'out_of_stock': 1})
+        self.assertEqual(sum(bucket['count'] for bucket in data['price']), 4)
+
+    def test_custom_buckets_cover_low_prices(self):
+        data = self.facets(price_buckets='50,100')
+
+        self.assertEqual(
+            [(bucket['min'], bucket['max'], bucket['count']) for bucket in data['price']],
+            [('0', '50', 2), ('50', '100', 1), ('100', None, 1)],
+        )
+
+    def test_filters_apply(self):
+        data = self.facets(category_slug='mobilier', in_stock='true')
+        self.assertEqual((data['total'], data['stock']['out_of_stock']), (2, 0))
+
+    def test_invalid_buckets(self):
+        for value in ['a,b', '100,50', '-1,5']:
+            response = self.client.get('/api/products/facets/', {'price_buckets': value})
+            self.assertEqual(response.status_code, 400)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Row locks are tested on PostgreSQL only")
+class CategoryConcurrentMoveTests(TransactionTestCase):
+    """A child created while its parent moves gets the new path."""
+
+    def setUp(self):
+        self.home = Category.objects.create(name='Maison', slug='maison')
+        self.furniture = Category.objects.create(name='Mobilier', slug='mobilier', parent=self.home)
+        self.chairs = Category.objects.create(name='Chaises', slug='chaises', parent=self.furniture)
+        self.garden = Category.objects.create(name='Jardin', slug='jardin')
+
+    def in_thread(self, target):
+        def run():
+            try:
+                target()
+            finally:
+                connections.close_all()
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def move_furniture(self):
+        self.furniture.parent = self.garden
+        self.furniture.save()
+
+    def create_child(self):
+        Category.objects.create(name='Tabourets', slug='tabourets', parent=self.chairs)
+
+    def assertChildMoved(self):
+        child = Category.objects.get(slug='tabourets')
+        self.assertEqual(child.name_path, 'Jardin > Mobilier > Chaises > Tabourets')
+        self.assertIn(child, Category.objects.subtree_of(slug='jardin'))
+
+    def test_child_created_during_move(self):
+        with transaction.atomic():
+            self.move_furniture()
+            thread = self.in_thread(self.create_child)
+            time.sleep(0.2)
+        thread.join()
+
+        self.assertChildMoved()
+
+    def test_move_during_child_creation(self):
+        created = threading.Event()
+
+        def create_child_slowly():
+            with transaction.atomic():
+                self.create_child()
+                created.set()
+                time.sleep(0.2)
+
+        thread = self.in_thread(create_child_slowly)
+        created.wait()
+        self.move_furniture()
+        thread.join()
+
+        self.assertChildMoved()
+
+
+class ProductChangesFeedTests(TestCase):
+    """The feed returns upserts and tombstones after the cursor, in order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Mobilier', slug='mobilier')
+
+    def create(self, slug, minutes_ago):
+        product = Product.objects.create(sku=slug.upper(), name=slug, slug=slug, price=Decimal('10'), category=self.category)
+        self.age(Product.objects.filter(pk=product.pk), minutes_ago)
+        return product
+
+    def age(self, queryset, minutes_ago):
+        queryset.update(updated_at=timezone.now() - timedelta(minutes=minutes_ago))
+
+    def changes(self, since=None, limit=500):
+        params = {'limit': limit}
+        if since:
+            params['since'] = since
+        response = self.client.get('/api/products/changes/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def ops(self, data):
+        return [(change['op'], change['product']['slug']) for change in data['changes']]
+
+    def test_cursor(self):
+        self.create('chaise', 30)
+        self.create('table', 20)
+        self.create('buffet', 10)
+
+        first = self.changes(limit=2)
+        self.assertEqual((self.ops(first), first['has_more']), ([('upsert', 'chaise'), ('upsert', 'table')], True))
+        second = self.changes(first['next'], limit=2)
+        self.assertEqual((self.ops(second), second['has_more']), ([('upsert', 'buffet')], False))
+        # Nothing new: same cursor back
+        self.assertEqual(self.changes(second['next'])['next'], second['next'])
+
+    def test_recent_changes_wait(self):
+        Product.objects.create(name='Lampe', slug='lampe', price=Decimal('10'), category=self.category)
+        self.assertEqual(self.changes()['changes'], [])
+
+    def test_deletes(self):
+        chair = self.create('chaise', 30)
+        table = self.create('table', 20)
+        self.create('buffet', 10)
+        cursor = self.changes()['next']
+
+        chair.soft_delete()
+        self.age(Product.objects.filter(pk=chair.pk), 5)
+        table_id = table.pk
+        table.delete()
+        self.age(ProductTombstone.objects.all(), 3)
+
+        data = self.changes(cursor)
+        self.assertEqual(self.ops(data), [('delete', 'chaise'), ('delete', 'table')])
+        tombstone = data['changes'][1]['product']
+        self.assertEqual((tombstone['id'], tombstone['sku']), (str(table_id), 'TABLE'))
+        self.assertEqual(self.changes(data['next'])['changes'], [])
+
+    def test_category_slug_change(self):
+        self.create('chaise', 30)
+        cursor = self.changes()['next']
+
+        self.category.slug = 'meubles'
+        self.category.save()
+        self.age(Product.objects.all(), 1)
+
+        data = self.changes(cursor)
+        self.assertEqual(self.ops(data), [('upsert', 'chaise')])
+        self.assertEqual(data['changes'][0]['product']['category_slug'], 'meubles')
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/products/changes/', {'since': 'nope'}).status_code, 400)
+
+
+class ProductBatchTests(TestCase):
+    """Batch lookups keep the request order and cache each product on its own."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        cls.chair = Product.objects.create(name='Chaise', slug='chaise', price=Decimal('10'), stock=5, category=category)
+        cls.table = Product.objects.create(name='Table', slug='table', price=Decimal('90'), stock=2, category=category)
+        cls.old = Product.objects.create(
+            name='Tabouret', slug='tabouret', price=Decimal('5'), category=category, is_active=False,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **params):
+        return self.client.get('/api/products/batch/', params)
+
+    def test_order_missing_and_inactive(self):
+        unknown = str(uuid.uuid4())
+        ids = [str(self.table.id), str(self.chair.id).upper(), unknown, 'pas-un-id', str(self.old.id), str(self.table.id)]
+
+        response = self.get(ids=','.join(ids))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['slug'] for item in response.data['results']], ['table', 'chaise'])
+        self.assertEqual(response.data['missing'], [unknown, 'pas-un-id'])
+        self.assertEqual(response.data['inactive'], [str(self.old.id)])
+
+    def test_slugs(self):
+        response = self.get(slugs='table,inconnu,chaise,tabouret')
+
+        self.assertEqual([item['slug'] for item in response.data['results']], ['table', 'chaise'])
+        self.assertEqual((response.data['missing'], response.data['inactive']), (['inconnu'], ['tabouret']))
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.get().status_code, 400)
+        self.assertEqual(self.get(ids=str(self.chair.id), slugs='chaise').status_code, 400)
+        self.assertEqual(self.get(slugs=',').status_code, 400)
+        self.assertEqual(self.get(slugs=','.join(f'produit-{index}' for index in range(51))).status_code, 400)
+
+    def test_products_are_cached_one_by_one(self):
+        self.get(slugs='chaise,table')
+
+        with self.assertNumQueries(1):
+            response = self.get(slugs='table,chaise')
+        self.assertEqual([item['slug'] for item in response.data['results']], ['table', 'chaise'])
+
+        # A stock write on the table leaves the chair cached
+        with self.captureOnCommitCallbacks(execute=True):
+            self.table.increase_stock(3)
+        with self.assertNumQueries(3):
+            response = self.get(slugs='chaise,table')
+        self.assertEqual([item['stock'] for item in response.data['results']], [5, 5])
+
+
+class ProductImportTests(TestCase):
+    """Upserts only overwrite the optional columns a file gives."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Mobilier', slug='mobilier')
+
+    def run_import(self, text, file_format='csv'):
+        report = import_products(io.StringIO(text), file_format)
+        self.assertEqual(report['errors'], [])
+        return report
+
+    def test_price_only_import_keeps_stock_and_status(self):
+        Product.objects.create(
+            sku='CH-1', name='Chaise', description='Chêne', price=Decimal('49.90'),
+            stock=12, is_active=False, category=self.category,
+        )
+        report = self.run_import('sku,name,price,category\nCH-1,Chaise,39.90,mobilier\n')
+
+        self.assertEqual(report['updated'], 1)
+        product = Product.objects.get(sku='CH-1')
+        self.assertEqual(product.price, Decimal('39.90'))
+        self.assertEqual(product.stock, 12)
+        self.assertFalse(product.is_active)
+        self.assertEqual(product.description, 'Chêne')
+
+    def test_given_columns_are_overwritten(self):
+        Product.objects.create(
+            sku='CH-1', name='Chaise', price=Decimal('49.90'), stock=12, category=self.category,
+        )
+        self.run_import(
+            '{"sku": "CH-1", "name": "Chaise", "price": "49.90", "category": "mobilier", "stock": 3, "is_active": "false"}\n'
+            '{"sku": "CH-2", "name": "Table", "price": "99", "category": "mobilier"}\n',
+            file_format='jsonl',
+        )
+
+        existing = Product.objects.get(sku='CH-1')
+        self.assertEqual((existing.stock, existing.is_active), (3, False))
+        # New products get the defaults
+        created = Product.objects.get(sku='CH-2')
+        self.assertEqual((created.stock, created.is_active), (0, True))
+
+
+class ProductExportNegotiationTests(TestCase):
+    """The export falls back to NDJSON, honours gzip weights, renders like the API."""
+
+    def test_json_client_gets_ndjson(self):
+        response = self.client.get('/api/products/export/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+
+    def test_explicit_format(self):
+        response = self.client.get('/api/products/export/?format=csv', HTTP_ACCEPT='application/json')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertEqual(self.client.get('/api/products/export/?format=xml').status_code, 404)
+
+    def test_same_representation_as_the_api(self):
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        Product.objects.create(name='Chaise', slug='chaise', price=Decimal('10'), category=category)
+        cache.clear()
+
+        exported = json.loads(b''.join(self.client.get('/api/products/export/').streaming_content))
+        detail = self.client.get('/api/products/chaise/').json()
+
+        for field in ('id', 'price', 'created_at', 'updated_at'):
+            self.assertEqual(exported[field], detail[field])
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip('gzip, deflate, br'))
+        self.assertTrue(accepts_gzip('deflate;q=1.0, GZIP;q=0.5'))
+        self.assertFalse(accepts_gzip('gzip;q=0'))
+        self.assertFalse(accepts_gzip('gzip; q=0.0, identity'))
+        self.assertFalse(accepts_gzip('deflate, br'))
+        self.assertFalse(accepts_gzip(''))
+
+
+class ImageVariantTests(SimpleTestCase):
+    """Variants are rendered once, and bad sources never give a 500."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = override_settings(MEDIA_ROOT=media, IMAGE_VARIANT_CACHE_DIR=os.path.join(media, 'variants'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        output = io.BytesIO()
+        Image.new('RGB', (800, 600), (200, 30, 30)).save(output, 'JPEG')
+        self.jpeg = output.getvalue()
+
+    def store(self, name, content):
+        return default_storage.save(name, ContentFile(content))
+
+    def get(self, name):
+        return self.client.get(f'/media/resize/320x320/{name}', HTTP_ACCEPT='image/webp')
+
+    def test_render_then_hit_without_storage_access(self):
+        name = self.store('products/chaise.jpg', self.jpeg)
+
+        response = self.get(name)
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'image/webp'))
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as variant:
+            self.assertEqual(variant.size, (320, 240))
+
+        with mock.patch('products.services.image_variants.default_storage') as storage:
+            response = self.get(name)
+            b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(storage.mock_calls, [])
+
+    def test_missing_or_broken_source_is_404(self):
+        truncated = self.store('products/tronquee.jpg', self.jpeg[:len(self.jpeg) // 2])
+        text = self.store('products/texte.jpg', b'not an image')
+
+        self.assertEqual(self.get('products/absente.jpg').status_code, 404)
+        self.assertEqual(self.get(truncated).status_code, 404)
+        self.assertEqual(self.get(text).status_code, 404)
+
+    def test_render_timeout_is_503(self):
+        name = self.store('products/chaise.jpg', self.jpeg)
+
+        with mock.patch('products.services.image_variants.RESIZE_TIMEOUT', 0):
+            response = self.get(name)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Advisory locks are PostgreSQL only")
+class ImageFileReleaseTests(TransactionTestCase):
+    """A file shared by an upload in progress is not deleted under it."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        self.product = Product.objects.create(name='Chaise', price=Decimal('10'), category=category)
+
+    def upload(self):
+        return SimpleUploadedFile('chaise.jpg', b'same bytes', content_type='image/jpeg')
+
+    def test_release_waits_for_the_upload_to_commit(self):
+        old = ProductImage.objects.create(product=self.product, image=self.upload())
+        storage = old.image.storage
+
+        def delete_old_row():
+            try:
+                # Releases the file on commit: no committed row references it
+                ProductImage.objects.filter(pk=old.pk).delete()
+            finally:
+                connections.close_all()
+
+        with transaction.atomic():
+            new = ProductImage.objects.create(product=self.product, image=self.upload())
+            self.assertEqual(new.image.name, old.image.name)
+            thread = threading.Thread(target=delete_old_row)
+            thread.start()
+            time.sleep(0.2)
+        thread.join()
+
+        self.assertTrue(storage.exists(new.image.name))
+
+
+class BulkUpdateTests(TestCase):
+    """Set-based updates report every row they could not apply."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        cls.chair = Product.objects.create(sku='CH-1', name='Chaise', price=Decimal('10.00'), stock=5, category=category)
+        cls.table = Product.objects.create(sku='TB-1', name='Table', price=Decimal('90.00'), stock=2, category=category)
+
+    def counters(self, product):
+        product.refresh_from_db()
+        return product.price, product.stock
+
+    def test_updates(self):
+        report = update_products(enumerate([
+            {'sku': 'CH-1', 'price': '12.50', 'delta': -2},
+            {'id': str(self.table.pk), 'stock': 7},
+            {'sku': 'CH-1', 'delta': 4},
+        ], start=1))
+
+        self.assertEqual((report['updated'], report['failed']), (3, 0))
+        # Repeated keys apply in input order
+        self.assertEqual(self.counters(self.chair), (Decimal('12.50'), 7))
+        self.assertEqual(self.counters(self.table), (Decimal('90.00'), 7))
+
+    def test_errors(self):
+        report = update_products(enumerate([
+            {'sku': 'CH-1', 'delta': -6},
+            {'sku': 'INCONNU', 'price': '5'},
+            {'sku': 'TB-1', 'price': '-1'},
+            {'sku': 'TB-1', 'stock': 1, 'delta': 1},
+            {'sku': 'TB-1'},
+        ], start=1))
+
+        self.assertEqual((report['updated'], report['failed']), (0, 5))
+        self.assertEqual(
+            [(error['line'], sorted(error['errors'])) for error in report['errors']],
+            [(1, ['delta']), (2, ['sku']), (3, ['price']), (4, ['delta']), (5, ['row'])],
+        )
+        self.assertEqual(self.counters(self.chair), (Decimal('10.00'), 5))
+
+
+@skipUnless(connection.vendor == 'postgresql', "Row locks are tested on PostgreSQL only")
+class BulkUpdateLockOrderTests(TransactionTestCase):
+    """Bulk updates lock products in id order, like checkouts."""
+
+    def setUp(self):
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        # Highest id stored first: a sequential scan meets it first
+        self.high, self.low = [
+            Product.objects.create(
+                id=uuid.UUID(int=value), sku=f'P-{value}', name=f'Produit {value}',
+                price=Decimal('10'), stock=5, category=category,
+            )
+            for value in (2, 1)
+        ]
+
+    def test_no_deadlock_with_a_checkout(self):
+        errors = []
+
+        def bulk_update():
+            try:
+                update_products(enumerate([
+                    {'sku': self.high.sku, 'delta': 1},
+                    {'sku': self.low.sku, 'delta': 1},
+                ], start=1))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        # A checkout locks its products by id: the lowest first
+        with transaction.atomic():
+            Product.objects.select_for_update().filter(pk=self.low.pk).get()
+            thread = threading.Thread(target=bulk_update)
+            thread.start()
+            time.sleep(0.2)
+            Product.objects.select_for_update().filter(pk=self.high.pk).get()
+        thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(Product.objects.values_list('stock', flat=True)), [6, 6])
+
+
+class ShardedStockWriterTests(TestCase):
+    """Stock writers reject sharded products, whose stock is in the shards."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Mobilier', slug='mobilier')
+        product = Product.objects.create(
+            sku='CH-1', name='Chaise', slug='chaise', price=Decimal('10.00'), stock=8, category=cls.category,
+        )
+        set_stock_shards(product, 4)
+
+    def assertShardsUnchanged(self):
+        product = Product.objects.get(sku='CH-1')
+        self.assertEqual(product.stock, 8)
+        self.assertEqual(sum(product.stock_shards.values_list('stock', flat=True)), 8)
+
+    def test_api_patch(self):
+        admin = User.objects.create_user(username='admin', email='admin@example.com', password='x', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.patch('/api/products/chaise/', {'stock': 50}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['stock'], [SHARDED_STOCK_ERROR])
+
+        response = client.patch('/api/products/chaise/', {'price': '12.00', 'stock': 8}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertShardsUnchanged()
+
+    def test_bulk_update(self):
+        report = update_products(enumerate([
+            {'sku': 'CH-1', 'stock': 50},
+            {'sku': 'CH-1', 'delta': 5},
+            {'sku': 'CH-1', 'price': '12.00'},
+        ], start=1))
+
+        self.assertEqual(report['updated'], 1)
+        self.assertEqual([error['errors'] for error in report['errors']], [{'stock': [SHARDED_STOCK_ERROR]}] * 2)
+        self.assertEqual(Product.objects.get(sku='CH-1').price, Decimal('12.00'))
+        self.assertShardsUnchanged()
+
+    def test_import(self):
+        report = import_products(io.StringIO(
+            'sku,name,price,category,stock\n'
+            'CH-1,Chaise,12.00,mobilier,50\n'
+        ), 'csv')
+        self.assertEqual(report['errors'], [{'line': 2, 'sku': 'CH-1', 'errors': {'stock': [SHARDED_STOCK_ERROR]}}])
+
+        report = import_products(io.StringIO('sku,name,price,category\nCH-1,Chaise,12.00,mobilier\n'), 'csv')
+        self.assertEqual((report['updated'], report['errors']), (1, []))
+        self.assertShardsUnchanged()
+
+
+class ReservedStockWriterTests(TestCase):
+    """Absolute stock writes never drop below what reservations hold."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Mobilier', slug='mobilier')
+        product = Product.objects.create(
+            sku='CH-1', name='Chaise', slug='chaise', price=Decimal('10.00'), stock=8, category=cls.category,
+        )
+        # Held by carts, see orders.services.reserve_stock
+        Product.objects.filter(pk=product.pk).update(reserved=3)
+        cls.error = Product.RESERVED_STOCK_ERROR.format(reserved=3)
+
+    def counters(self):
+        return Product.objects.values_list('stock', 'reserved').get(sku='CH-1')
+
+    def test_api_patch(self):
+        admin = User.objects.create_user(username='admin', email='admin@example.com', password='x', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.patch('/api/products/chaise/', {'stock': 2}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['stock'], [self.error])
+        self.assertEqual(self.counters(), (8, 3))
+
+        response = client.patch('/api/products/chaise/', {'stock': 3}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counters(), (3, 3))
+
+    def test_bulk_update(self):
+        report = update_products(enumerate([
+            {'sku': 'CH-1', 'stock': 2},
+            {'sku': 'CH-1', 'delta': -6},
+            {'sku': 'CH-1', 'delta': -5},
+        ], start=1))
+
+        self.assertEqual(report['updated'], 1)
+        self.assertEqual(
+            [error['errors'] for error in report['errors']],
+            [{'stock': [self.error]}, {'delta': ["Insufficient stock for this delta"]}],
+        )
+        self.assertEqual(self.counters(), (3, 3))
+
+    def test_import(self):
+        report = import_products(io.StringIO(
+            'sku,name,price,category,stock\n'
+            'CH-1,Chaise,12.00,mobilier,2\n'
+        ), 'csv')
+        self.assertEqual(report['errors'], [{'line': 2, 'sku': 'CH-1', 'errors': {'stock': [self.error]}}])
+        self.assertEqual(self.counters(), (8, 3))
+
+        report = import_products(io.StringIO(
+            'sku,name,price,category,stock\n'
+            'CH-1,Chaise,12.00,mobilier,5\n'
+        ), 'csv')
+        self.assertEqual((report['updated'], report['errors']), (1, []))
+        self.assertEqual(self.counters(), (5, 3))
+
+
+class ShardedAvailabilityTests(TestCase):
+    """Availability of a sharded product is read from its shards, not the snapshot."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Mobilier', slug='mobilier')
+        product = Product.objects.create(name='Chaise', slug='chaise', price=Decimal('10'), stock=6, category=category)
+        cls.product = set_stock_shards(product, 3)
+        Product.objects.create(name='Table', slug='table', price=Decimal('90'), stock=1, category=category)
+
+    def setUp(self):
+        cache.clear()
+
+    def sell(self, quantity):
+        with transaction.atomic():
+            self.assertTrue(take_sharded_stock(self.product, quantity))
+
+    def test_detail_and_batch(self):
+        self.sell(2)
+
+        data = self.client.get('/api/products/chaise/').json()
+        self.assertEqual((data['stock'], data['available'], data['is_in_stock']), (6, 4, True))
+
+        self.sell(4)
+        data = self.client.get('/api/products/batch/', {'slugs': 'chaise,table'}).json()
+        self.assertEqual(
+            [(item['slug'], item['available'], item['is_in_stock']) for item in data['results']],
+            [('chaise', 0, False), ('table', 1, True)],
+        )
+
+    def test_in_stock_filter_and_facets(self):
+        self.sell(6)
+        # The snapshot still says 6 until the next rebalancing
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 6)
+
+        response = self.client.get('/api/products/', {'in_stock': 'true'})
+        self.assertEqual([item['slug'] for item in response.json()['results']], ['table'])
+        data = self.client.get('/api/products/facets/').json()
+        self.assertEqual(data['stock'], {'in_stock': 1, 'out_of_stock': 1})
+
+        rebalance_stock_shards()
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 0)
@@ -1,18 +1,32 @@
 from django.urls import path
 from .views import (
+    ProductBatchView,
+    ProductBulkView,
     CategoryListCreateView,
     CategoryRetrieveUpdateDestroyView,
+    CategoryTreeView,
+    ProductChangesView,
+    ProductExportView,
+    ProductFacetsView,
     ProductListCreateView,
     ProductRetrieveUpdateDestroyView,
+    ProductSuggestView,
 )
 
 urlpatterns = [
     # Categories
     path('categories/', CategoryListCreateView.as_view(), name='category-list'),
+    path('categories/tree/', CategoryTreeView.as_view(), name='category-tree'),
     path('categories/<slug:slug>/', CategoryRetrieveUpdateDestroyView.as_view(), name='category-detail'),
     
     # Products
     path('products/', ProductListCreateView.as_view(), name='product-list'),
+    path('products/batch/', ProductBatchView.as_view(), name='product-batch'),
+    path('products/bulk/', ProductBulkView.as_view(), name='product-bulk'),
+    path('products/changes/', ProductChangesView.as_view(), name='product-changes'),
+    path('products/export/', ProductExportView.as_view(), name='product-export'),
+    path('products/facets/', ProductFacetsView.as_view(), name='product-facets'),
+    path('products/suggest/', ProductSuggestView.as_view(), name='product-suggest'),
     path('products/<slug:slug>/', ProductRetrieveUpdateDestroyView.as_view(), name='product-detail'),
 ]
 
@@ -1,10 +1,25 @@
-from .category import CategoryListCreateView, CategoryRetrieveUpdateDestroyView
+from .batch import ProductBatchView
+from .bulk import ProductBulkView
+from .category import CategoryListCreateView, CategoryRetrieveUpdateDestroyView, CategoryTreeView
+from .changes import ProductChangesView
+from .export import ProductExportView
+from .facets import ProductFacetsView
+from .media import ImageVariantView
 from .product import ProductListCreateView, ProductRetrieveUpdateDestroyView
+from .suggest import ProductSuggestView
 
 __all__ = [
+    'ImageVariantView',
+    'ProductBatchView',
+    'ProductBulkView',
     'CategoryListCreateView',
     'CategoryRetrieveUpdateDestroyView',
+    'CategoryTreeView',
+    'ProductChangesView',
+    'ProductExportView',
+    'ProductFacetsView',
     'ProductListCreateView',
     'ProductRetrieveUpdateDestroyView',
+    'ProductSuggestView',
 ]
 
@@ -0,0 +1,136 @@
+import hashlib
+import uuid
+from django.core.cache import cache
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from core.utils.sparse_fields import FIELDS_PARAM, OMIT_PARAM, SparseFieldsetQueryMixin
+from core.utils.versioning import get_version
+from products.models import Product
+from products.serializers import ProductSerializer
+from products.services import CATALOG_VERSION, prefetch_sharded_stock
+
+
+class ProductBatchView(SparseFieldsetQueryMixin, GenericAPIView):
+    """
+    GET: Several products in one call (cart, wishlist)
+    
+    Query params:
+        - ids: Comma-separated product UUIDs
+        - slugs: Comma-separated product slugs (instead of ids)
+        - fields / omit: Sparse fieldsets, as on the product detail
+    
+    Results follow the request order; unknown references are listed in
+    `missing`, inactive products in `inactive`. Each product is cached on
+    its own, keyed on its `updated_at`: carts sharing products mostly hit
+    the cache, and a checkout only invalidates the products it touched.
+    """
+    permission_classes = [AllowAny]
+    serializer_class = ProductSerializer
+    
+    queryset = Product.objects.filter(is_active=True).defer('search_vector')
+    sparse_select = {'category_detail': ['category']}
+    sparse_prefetch = {'images': ['images']}
+    sparse_defer = {'description': ['description']}
+    
+    max_batch_size = 50
+    cache_timeout = 300
+    
+    def get(self, request):
+        lookup, refs = self._parse_refs(request)
+        # Unknown ?fields= are rejected even when every product is cached
+        self.get_serializer()
+        
+        # One light query tells what exists, what is active and which
+        # version of each product the cache must hold
+        prefix = self._cache_prefix(request)
+        keys = {}
+        inactive = set()
+        rows = Product.objects.filter(**{f'{lookup}__in': self._db_values(lookup, refs)}).values_list(
+            lookup, 'pk', 'updated_at', 'is_active'
+        )
+        for value, pk, updated_at, is_active in rows:
+            if is_active:
+                keys[str(value)] = self._cache_key(prefix, pk, updated_at)
+            else:
+                inactive.add(str(value))
+        
+        cached = cache.get_many(list(keys.values()))
+        found = {ref: cached[key] for ref, key in keys.items() if key in cached}
+        
+        pending = [ref for ref in keys if ref not in found]
+        if pending:
+            products = list(
+                self.get_queryset().filter(**{f'{lookup}__in': self._db_values(lookup, pending)})
+            )
+            # Flash-sale products: availability read from their shards
+            prefetch_sharded_stock(products)
+            serializer = self.get_serializer(products, many=True)
+            fresh = {}
+            for product, item in zip(products, serializer.data):
+                ref = str(getattr(product, lookup))
+                found[ref] = item
+                # A row updated since the first query is served but not
+                # cached: its key names the previous version
+                if keys.get(ref) == self._cache_key(prefix, product.pk, product.updated_at):
+                    fresh[keys[ref]] = item
+            cache.set_many(fresh, timeout=self.cache_timeout)
+        
+        return Response({
+            'results': [found[ref] for ref in refs if ref in found],
+            'missing': [ref for ref in refs if ref not in found and ref not in inactive],
+            'inactive': [ref for ref in refs if ref in inactive],
+        })
+    
+    def _parse_refs(self, request):
+        """`(lookup, refs)` from ?ids= or ?slugs=, deduplicated, in order."""
+        ids = request.query_params.get('ids')
+        slugs = request.query_params.get('slugs')
+        if (ids is None) == (slugs is None):
+            raise ValidationError({'detail': "Provide either ids or slugs."})
+        
+        lookup, param = ('id', 'ids') if ids is not None else ('slug', 'slugs')
+        refs = [ref.strip() for ref in (ids if ids is not None else slugs).split(',') if ref.strip()]
+        if lookup == 'id':
+            # Canonical form, so that results match whatever the input case
+            refs = [self._normalize_id(ref) for ref in refs]
+        refs = list(dict.fromkeys(refs))
+        
+        if not refs:
+            raise ValidationError({param: ["This field may not be blank."]})
+        if len(refs) > self.max_batch_size:
+            raise ValidationError({param: [f"At most {self.max_batch_size} products per batch."]})
+        return lookup, refs
+    
+    def _normalize_id(self, ref):
+        try:
+            return str(uuid.UUID(ref))
+        except ValueError:
+            return ref
+    
+    def _db_values(self, lookup, refs):
+        """Invalid UUIDs cannot match: they are reported as missing."""
+        if lookup != 'id':
+            return refs
+        values = []
+        for ref in refs:
+            try:
+                values.append(uuid.UUID(ref))
+            except ValueError:
+                pass
+        return values
+    
+    def _cache_key(self, prefix, pk, updated_at):
+        return f"{prefix}:{pk}:{updated_at.timestamp()}"
+    
+    def _cache_prefix(self, request):
+        """Image URLs are absolute: entries depend on the host and the fields."""
+        raw = '|'.join([
+            request.build_absolute_uri('/'),
+            request.query_params.get(FIELDS_PARAM, ''),
+            request.query_params.get(OMIT_PARAM, ''),
+        ])
+        digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+        version = get_version(CATALOG_VERSION)
+        return f"products:batch:{version}:{digest}"
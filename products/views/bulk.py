@@ -0,0 +1,70 @@
+import io
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.exceptions import ValidationError
+from products.services import IMPORT_FORMATS, detect_format, import_products, update_products
+
+
+class ProductBulkView(APIView):
+    """
+    POST: Import a CSV / JSONL catalog, upserted by SKU (admin only)
+    
+    Multipart fields:
+        - file: The catalog file (.csv, .jsonl or .ndjson)
+        - format: csv|jsonl (default: guessed from the file name)
+    
+    PATCH: Bulk price / stock update (admin only)
+    
+    JSON body: list of {"sku" | "id", "price"?, "stock"?, "delta"?}
+        - stock: absolute value
+        - delta: added to the current stock (rejected if it would go below 0)
+    
+    Both return counts and a per-row error report.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser, JSONParser]
+    
+    batch_size = 1000
+    max_reported_errors = 1000
+    max_update_rows = 10000
+    
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': ["No file was submitted."]})
+        
+        file_format = request.data.get('format') or detect_format(upload.name)
+        if file_format not in IMPORT_FORMATS:
+            raise ValidationError({'format': [f"Must be one of: {', '.join(IMPORT_FORMATS)}."]})
+        
+        # Decode the upload lazily, rows are read one at a time
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            report = import_products(stream, file_format, self.batch_size)
+        except UnicodeDecodeError:
+            raise ValidationError({'file': ["File must be UTF-8 encoded."]})
+        finally:
+            stream.detach()
+        
+        return Response(self._truncate_errors(report))
+    
+    def patch(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError({'detail': "Expected a list of rows."})
+        if len(rows) > self.max_update_rows:
+            raise ValidationError({'detail': f"At most {self.max_update_rows} rows per request."})
+        
+        report = update_products(
+            ((index, row if isinstance(row, dict) else None) for index, row in enumerate(rows, start=1)),
+            self.batch_size,
+        )
+        return Response(self._truncate_errors(report))
+    
+    def _truncate_errors(self, report):
+        errors = report['errors']
+        report['errors'] = errors[:self.max_reported_errors]
+        report['errors_truncated'] = len(errors) > self.max_reported_errors
+        return report
@@ -1,15 +1,23 @@
+from django.http import HttpResponse
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.views import APIView
+from core.utils.response_cache import CachedResponseMixin
 from products.models import Category
 from products.serializers import CategorySerializer
+from products.services import CATALOG_VERSION, get_category_tree
 
 
-class CategoryListCreateView(ListCreateAPIView):
+class CategoryListCreateView(CachedResponseMixin, ListCreateAPIView):
     """
-    GET: List all active categories
+    GET: List all active categories (anonymous responses cached)
     POST: Create a new category (admin only)
     """
     
+    cache_route = 'category-list'
+    cache_version_name = CATALOG_VERSION
+    cache_timeout = 600
+    
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     
@@ -41,3 +49,16 @@ class CategoryRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+
+
+class CategoryTreeView(APIView):
+    """
+    GET: Full nested tree of active categories with product counts
+    
+    Built in two aggregate queries and kept as an in-process snapshot,
+    invalidated when a Category or Product changes.
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        return HttpResponse(get_category_tree(), content_type='application/json')
@@ -0,0 +1,40 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ValidationError
+from products.services import get_changes, parse_changes_cursor
+
+
+class ProductChangesView(APIView):
+    """
+    GET: Catalog changes since a cursor (upserts and soft-delete tombstones)
+    
+    Ordered by (updated_at, id). Start without `since` for a full sync, then
+    send back the `next` cursor of each response; keep paging while
+    `has_more` is true.
+    
+    Query params:
+        - since: Cursor returned by the previous call
+        - limit: Number of changes (default 500, max 1000)
+    """
+    permission_classes = [AllowAny]
+    
+    default_limit = 500
+    max_limit = 1000
+    
+    def get(self, request):
+        position = None
+        since = request.query_params.get('since')
+        if since:
+            try:
+                position = parse_changes_cursor(since)
+            except ValueError:
+                raise ValidationError({'since': 'Invalid cursor.'})
+        
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+        
+        return Response(get_changes(position, limit))
@@ -0,0 +1,74 @@
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+from rest_framework.views import APIView
+from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import NotAcceptable, ValidationError
+from rest_framework.settings import api_settings
+from products.filters import filter_products
+from products.models import Product
+from products.renderers import CSVRenderer, NDJSONRenderer
+from products.services.export import accepts_gzip, gzip_stream, iter_export_rows, stream_csv, stream_ndjson
+
+
+class ProductExportView(APIView):
+    """
+    GET: Stream the whole catalog as NDJSON (default) or CSV
+    
+    Takes the same filters as GET /api/products/, without pagination.
+    Rows are ordered by (updated_at, id) and read from a server-side cursor,
+    so memory stays constant whatever the catalog size.
+    
+    Query params:
+        - format: ndjson|csv
+        - updated_since: ISO 8601 datetime, only products updated after it
+    
+    Gzipped on the fly when the client sends Accept-Encoding: gzip.
+    Clients accepting neither format (e.g. Accept: application/json) get
+    the requested format, NDJSON by default.
+    """
+    permission_classes = [AllowAny]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    
+    chunk_size = 2000
+    
+    def perform_content_negotiation(self, request, force=False):
+        # No 406 for an unmatched Accept: the ?format= asked for, else
+        # NDJSON. An unknown ?format= is still a 404.
+        try:
+            return super().perform_content_negotiation(request, force)
+        except NotAcceptable:
+            requested = request.query_params.get(api_settings.URL_FORMAT_OVERRIDE)
+            renderers = self.get_renderers()
+            renderer = next((r for r in renderers if r.format == requested), renderers[0])
+            return renderer, renderer.media_type
+    
+    def get(self, request):
+        queryset = filter_products(Product.objects.filter(is_active=True), request.query_params)
+        
+        updated_since = request.query_params.get('updated_since')
+        if updated_since:
+            since = parse_datetime(updated_since)
+            if since is None:
+                raise ValidationError({'updated_since': 'Must be an ISO 8601 datetime.'})
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            queryset = queryset.filter(updated_at__gt=since)
+        
+        rows = iter_export_rows(queryset, self.chunk_size)
+        renderer = request.accepted_renderer
+        if renderer.format == 'csv':
+            content = stream_csv(rows)
+        else:
+            content = stream_ndjson(rows)
+        
+        gzipped = accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if gzipped:
+            content = gzip_stream(content)
+        
+        response = StreamingHttpResponse(content, content_type=f'{renderer.media_type}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="products.{renderer.format}"'
+        response['Vary'] = 'Accept-Encoding'
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        return response
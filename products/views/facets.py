@@ -0,0 +1,48 @@
+from decimal import Decimal, InvalidOperation
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ValidationError
+from products.filters import filter_products
+from products.models import Product
+from products.services import DEFAULT_PRICE_BOUNDS, get_product_facets
+
+
+class ProductFacetsView(APIView):
+    """
+    GET: Facet counts for the filter sidebar
+    
+    Takes the same filters as GET /api/products/ and returns counts per
+    category, per price bucket and in/out of stock, in a single query.
+    
+    Query params:
+        - price_buckets: Comma-separated increasing bounds (e.g. 0,50,100,500)
+    """
+    permission_classes = [AllowAny]
+    
+    max_price_buckets = 20
+    
+    def get(self, request):
+        queryset = filter_products(Product.objects.filter(is_active=True), request.query_params)
+        price_bounds = self._parse_price_buckets(request)
+        return Response(get_product_facets(queryset, price_bounds))
+    
+    def _parse_price_buckets(self, request):
+        """Parse price_buckets from query params (default bounds if absent)."""
+        raw = request.query_params.get('price_buckets')
+        if not raw:
+            return DEFAULT_PRICE_BOUNDS
+        
+        try:
+            bounds = [Decimal(value) for value in raw.split(',')]
+        except InvalidOperation:
+            raise ValidationError({'price_buckets': 'Must be comma-separated numbers.'})
+        
+        if not 0 < len(bounds) <= self.max_price_buckets:
+            raise ValidationError({'price_buckets': f'Between 1 and {self.max_price_buckets} bounds.'})
+        if any(not bound.is_finite() or bound < 0 for bound in bounds):
+            raise ValidationError({'price_buckets': 'Bounds must be positive numbers.'})
+        if any(low >= high for low, high in zip(bounds, bounds[1:])):
+            raise ValidationError({'price_buckets': 'Bounds must be strictly increasing.'})
+        
+        return tuple(bounds)
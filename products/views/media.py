@@ -0,0 +1,48 @@
+from concurrent.futures.process import BrokenProcessPool
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views import View
+from PIL import Image
+from products.services.image_variants import (
+    get_content_type,
+    get_variant,
+    is_allowed_size,
+    negotiate_format,
+)
+
+
+class ImageVariantView(View):
+    """
+    GET: Media image resized to fit within <w>x<h> (whitelisted sizes only)
+    
+    WebP when the client accepts it, JPEG otherwise. Variants are cached on
+    disk and served with a one-year Cache-Control: stored media files are
+    never overwritten, so a URL always designates the same image.
+    
+    A source that is missing or not a readable image (truncated upload
+    included) is a 404; a render that times out or loses its worker is a
+    503, retried by the client.
+    """
+    
+    http_method_names = ['get', 'head']
+    
+    def get(self, request, width, height, path):
+        if not is_allowed_size(width, height):
+            raise Http404("Unsupported size")
+        
+        image_format = negotiate_format(request.META.get('HTTP_ACCEPT'))
+        try:
+            variant = get_variant(path, width, height, image_format)
+        except (TimeoutError, BrokenProcessPool):
+            # TimeoutError first: it is a subclass of OSError
+            response = HttpResponse("Image rendering unavailable", status=503, content_type='text/plain')
+            response['Retry-After'] = '5'
+            return response
+        except (OSError, SuspiciousFileOperation, Image.DecompressionBombError):
+            raise Http404("Image not found")
+        
+        response = FileResponse(variant, content_type=get_content_type(image_format))
+        patch_cache_control(response, public=True, max_age=365 * 24 * 3600, immutable=True)
+        patch_vary_headers(response, ['Accept'])
+        return response
@@ -1,21 +1,47 @@
-from django.db import models
+import hashlib
+from django.db.models import Count, Max
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import AllowAny, IsAdminUser
+from core.utils.conditional import ConditionalGetMixin, latest
+from core.utils.fast_serializers import FastListMixin
+from core.utils.response_cache import CachedResponseMixin
+from core.utils.sparse_fields import SparseFieldsetQueryMixin
+from products.filters import filter_products, get_search_term, rank_search_results
 from products.models import Product
+from products.services import CATALOG_VERSION, STOCK_VERSION
+from products.pagination import ProductCursorPagination
 from products.serializers import (
     ProductSerializer,
     ProductListSerializer,
+    ProductListFastSerializer,
     ProductCreateUpdateSerializer,
 )
 
 
-class ProductListCreateView(ListCreateAPIView):
+class ProductListCreateView(CachedResponseMixin, FastListMixin, ListCreateAPIView):
     """
-    GET: List products with filters
+    GET: List products with filters (anonymous responses cached,
+         ?fields= / ?omit= to choose the fields, rendered from .values() rows)
     POST: Create a new product (admin only)
     """
     
-    queryset = Product.objects.filter(is_active=True).select_related('category').prefetch_related('images')
+    cache_route = 'product-list'
+    cache_version_name = (CATALOG_VERSION, STOCK_VERSION)
+    cache_timeout = 120
+    
+    # Large columns the list never renders are not loaded
+    queryset = Product.objects.filter(is_active=True).defer('description', 'search_vector')
+    fast_serializer_class = ProductListFastSerializer
+    
+    @property
+    def paginator(self):
+        """Switch to keyset pagination when the client sends ?cursor=."""
+        if not hasattr(self, '_paginator'):
+            if 'cursor' in self.request.query_params:
+                self._paginator = ProductCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
     
     def get_serializer_class(self):
         """Use different serializers for different actions."""
@@ -31,53 +57,38 @@ class ProductListCreateView(ListCreateAPIView):
     
     def get_queryset(self):
         """Apply custom filters."""
-        queryset = super().get_queryset()
-        
-        # Filter by category
-        category = self.request.query_params.get('category')
-        if category:
-            queryset = queryset.filter(category=category)
-        
-        # Filter by price range
-        min_price = self.request.query_params.get('min_price')
-        max_price = self.request.query_params.get('max_price')
-        
-        if min_price:
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(price__lte=max_price)
-        
-        # Filter by stock availability
-        in_stock = self.request.query_params.get('in_stock')
-        if in_stock and in_stock.lower() == 'true':
-            queryset = queryset.filter(stock__gt=0)
-        
-        # Search
-        search = self.request.query_params.get('search')
-        if search:
-            queryset = queryset.filter(
-                models.Q(name__icontains=search) |
-                models.Q(description__icontains=search) |
-                models.Q(sku__icontains=search)
-            )
+        queryset = filter_products(super().get_queryset(), self.request.query_params)
         
-        # Ordering
-        ordering = self.request.query_params.get('ordering', '-created_at')
+        # Ordering (search results are ranked unless an ordering is given)
+        ordering = self.request.query_params.get('ordering')
+        search = get_search_term(self.request.query_params)
         if ordering:
             queryset = queryset.order_by(ordering)
+        elif search:
+            queryset = rank_search_results(queryset, search)
+        else:
+            queryset = queryset.order_by('-created_at')
         
         return queryset
 
 
-class ProductRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
+class ProductRetrieveUpdateDestroyView(CachedResponseMixin, ConditionalGetMixin, SparseFieldsetQueryMixin, RetrieveUpdateDestroyAPIView):
     """
-    GET: Retrieve a product by slug
+    GET: Retrieve a product by slug (ETag / Last-Modified, 304 if unchanged,
+         anonymous responses cached, ?fields= / ?omit= to choose the fields)
     PATCH: Update a product (admin only)
-    DELETE: Delete a product (admin only)
+    DELETE: Soft delete a product (admin only)
     """
     
-    queryset = Product.objects.filter(is_active=True).select_related('category').prefetch_related('images')
+    cache_route = 'product-detail'
+    cache_version_name = CATALOG_VERSION
+    cache_timeout = 300
+    
+    queryset = Product.objects.filter(is_active=True).defer('search_vector')
     lookup_field = 'slug'
+    sparse_select = {'category_detail': ['category']}
+    sparse_prefetch = {'images': ['images']}
+    sparse_defer = {'description': ['description']}
     
     def get_serializer_class(self):
         """Use different serializers for different actions."""
@@ -90,4 +101,37 @@ class ProductRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
         if self.request.method == 'GET':
             return [AllowAny()]
         return [IsAdminUser()]
-
+    
+    def get_cache_version(self):
+        """
+        Keyed on the validators: stock writes bump the product's updated_at,
+        so checkouts of other products leave this entry cached.
+        """
+        validators = self.get_validators()
+        parts = validators[0] if validators else ()
+        digest = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+        return f"{super().get_cache_version()}:{digest}"
+    
+    def get_validators(self):
+        """Latest update across the product, its category and its images."""
+        # Computed once per request: the cache key and the ETag both use it
+        if not hasattr(self, '_validators'):
+            self._validators = self._compute_validators()
+        return self._validators
+    
+    def _compute_validators(self):
+        row = self.get_queryset().filter(slug=self.kwargs['slug']).order_by().aggregate(
+            product_updated=Max('updated_at'),
+            category_updated=Max('category__updated_at'),
+            images_updated=Max('images__updated_at'),
+            image_count=Count('images'),
+        )
+        if row['product_updated'] is None:
+            return None
+        
+        last_modified = latest(row['product_updated'], row['category_updated'], row['images_updated'])
+        return (self.kwargs['slug'], last_modified.isoformat(), row['image_count']), last_modified
+    
+    def perform_destroy(self, instance):
+        """Soft delete: the product stays in the changes feed as a tombstone."""
+        instance.soft_delete()
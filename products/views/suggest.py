@@ -0,0 +1,54 @@
+import hashlib
+from django.core.cache import cache
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from core.utils.versioning import get_version
+from products.services import CATALOG_VERSION, get_suggestions
+
+
+class ProductSuggestView(APIView):
+    """
+    GET: Autocomplete suggestions for the storefront search box
+    
+    Query params:
+        - q: Search text (min 2 characters, typos tolerated)
+        - limit: Number of products returned (default 8, max 20)
+    
+    Hot prefixes are cached for 60 seconds (until the catalog changes).
+    """
+    permission_classes = [AllowAny]
+    
+    min_length = 2
+    default_limit = 8
+    max_limit = 20
+    cache_timeout = 60
+    
+    def get(self, request):
+        # Normalize query: lowercase, collapse whitespace
+        query = ' '.join(request.query_params.get('q', '').split()).lower()
+        if len(query) < self.min_length:
+            return Response({'products': [], 'categories': []})
+        
+        limit = self._parse_limit(request)
+        
+        # Create cache key (catalog changes invalidate it right away)
+        digest = hashlib.md5(query.encode('utf-8')).hexdigest()
+        version = get_version(CATALOG_VERSION)
+        cache_key = f"products:suggest:{version}:{limit}:{digest}"
+        
+        # Try to get from cache
+        data = cache.get(cache_key)
+        if data is None:
+            data = get_suggestions(query, limit)
+            cache.set(cache_key, data, timeout=self.cache_timeout)
+        
+        return Response(data)
+    
+    def _parse_limit(self, request):
+        """Parse limit from query params, clamped to [1, max_limit]."""
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))